@@ -1,6 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,10 +17,146 @@ CORS(app, origins=allowed_origins, supports_credentials=True)
 # Import modules
 from modules.data_collector import DataCollector
 from modules.nlp_processor import NLPProcessor
+from modules.dedup import Deduplicator
+from modules.adaptive_sampler import AdaptiveSampler
+from modules.result_cache import ResultCache
+from modules.cache_backends import make_cache_backend
+from modules.sentiment_cache import SentimentCache
+from modules.item_store import ItemStore
+from modules.trend_store import TrendStore
+from modules.rate_limiter import RateLimitManager, parse_limit
+from modules.prewarmer import Prewarmer
+from modules.response_shaper import shape_results, shape_platform, filter_items, parse_list
+from modules import metrics
 
 # Initialize modules
-data_collector = DataCollector()
-nlp_processor = NLPProcessor()
+item_store_path = os.getenv('ITEM_STORE_PATH')
+# Limits are '<tokens per minute>:<burst>'; YouTube tokens are quota units
+rate_limiter = RateLimitManager({
+    'twitter': parse_limit(os.getenv('RATE_LIMIT_TWITTER', '30:10')),
+    'reddit': parse_limit(os.getenv('RATE_LIMIT_REDDIT', '60:10')),
+    'youtube': parse_limit(os.getenv('RATE_LIMIT_YOUTUBE', '7:1000'))
+}, max_wait=float(os.getenv('RATE_LIMIT_MAX_WAIT', 2)))
+data_collector = DataCollector(
+    item_store=ItemStore(item_store_path) if item_store_path else None,
+    rate_limiter=rate_limiter
+)
+nlp_processor = NLPProcessor(SentimentCache(
+    max_entries=int(os.getenv('SENTIMENT_CACHE_MAX_ENTRIES', 50000)),
+    path=os.getenv('SENTIMENT_CACHE_PATH') or None
+), processes=int(os.getenv('SENTIMENT_PROCESSES', 0)), dedup=Deduplicator(
+    threshold=float(os.getenv('DEDUP_THRESHOLD', 0.8))
+) if os.getenv('DEDUP_ENABLED', 'True').lower() == 'true' else None)
+trend_store = TrendStore(
+    # On disk by default: every worker must read and update the same trend
+    path=os.getenv('TREND_STORE_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trends.db'),
+    retention_days=float(os.getenv('TREND_RETENTION_DAYS', 90))
+)
+# Shared by all worker processes when set; each worker keeps its own LRU in front
+cache_backend = make_cache_backend(
+    os.getenv('CACHE_BACKEND_URL'),
+    max_entries=int(os.getenv('CACHE_BACKEND_MAX_ENTRIES', 1024))
+)
+analysis_cache = ResultCache(
+    ttl=float(os.getenv('CACHE_TTL', 300)),
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 256)),
+    stale_ttl=float(os.getenv('CACHE_STALE_TTL', 600)),
+    backend=cache_backend,
+    namespace='analysis',
+    lock_timeout=float(os.getenv('CACHE_LOCK_TIMEOUT', 60))
+)
+
+# Deep analyses are keyed by limit and query, separately from /analyze
+deep_cache = ResultCache(
+    ttl=float(os.getenv('CACHE_TTL', 300)),
+    max_entries=int(os.getenv('DEEP_CACHE_MAX_ENTRIES', 32)),
+    stale_ttl=float(os.getenv('CACHE_STALE_TTL', 600)),
+    backend=cache_backend,
+    namespace='deep',
+    lock_timeout=float(os.getenv('CACHE_LOCK_TIMEOUT', 60))
+)
+
+# Partial results stay out of analysis_cache, but are kept briefly so that
+# filtering their items (keyword clicks) doesn't re-run the whole collection
+partial_cache = ResultCache(
+    ttl=float(os.getenv('PARTIAL_CACHE_TTL', 60)),
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 256)),
+    stale_ttl=0,
+    backend=cache_backend,
+    namespace='partial',
+    lock_timeout=float(os.getenv('CACHE_LOCK_TIMEOUT', 60))
+)
+
+
+def run_analysis(query: str, priority: int = 0) -> dict:
+    """Collect and process data for a query (uncached)"""
+    for name, results in analysis_events(query, priority):
+        pass
+    return results
+
+
+def record_trends(query: str, results: dict):
+    """Add a finished analysis' new items to the sentiment trend"""
+    for platform, data in results['platforms'].items():
+        trend_store.add(query, platform, data['all_items'])
+
+
+def analysis_events(query: str, priority: int = 0):
+    """Yield ``(platform, platform_result)`` as platforms finish, then ``('combined', results)``"""
+    # Collect data from all platforms and process each one with NLP as it arrives
+    status = {}
+    platform_items = data_collector.collect_iter(query, status, priority)
+    
+    for name, data in nlp_processor.process_iter(platform_items, query):
+        if name == 'combined':
+            # Flag platforms that timed out or failed so clients know the result is partial
+            data['platform_status'] = status
+            data['partial'] = any(s != 'ok' for s in status.values())
+            if data['partial']:
+                partial_cache.put(query, data)
+            record_trends(query, data)
+        yield name, data
+
+
+def to_ndjson(event: dict) -> str:
+    return app.json.dumps(event) + '\n'
+
+
+def _publish_prewarmed(query: str, results: dict):
+    if not results.get('partial'):
+        analysis_cache.put(query, results)
+
+
+# Watched queries are refreshed in the background (at a lower rate-limit
+# priority than user requests) so /analyze answers them from the cache.
+# With a shared cache backend, workers share the watch list and refreshes
+prewarmer = Prewarmer(
+    refresh=lambda query: run_analysis(query, priority=1),
+    publish=_publish_prewarmed,
+    interval=float(os.getenv('PREWARM_INTERVAL', 240)),
+    jitter=float(os.getenv('PREWARM_JITTER', 0.1)),
+    backend=cache_backend
+)
+for watched_query in parse_list(os.getenv('WATCHED_QUERIES')):
+    prewarmer.watch(watched_query)
+if os.getenv('PREWARM_ENABLED', 'True').lower() == 'true':
+    prewarmer.start()
+
+
+@app.before_request
+def start_timings():
+    metrics.start_request()
+
+
+@app.after_request
+def add_server_timing(response):
+    """Expose per-stage timings; streamed bodies are still running at this point"""
+    timings = metrics.current_timings()
+    if timings is not None and not response.is_streamed:
+        response.headers['Server-Timing'] = timings.server_timing()
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - timings.started, endpoint=endpoint)
+    return response
 
 
 @app.route('/health', methods=['GET'])
@@ -42,6 +180,11 @@ def health():
         'status': 'ok',
         'mode': mode,
         'apis': api_status,
+        'cache': analysis_cache.stats(),
+        'sentiment_cache': nlp_processor.sentiment_cache.stats(),
+        'rate_limits': rate_limiter.status(),
+        'circuits': {platform: breaker.status() for platform, breaker in data_collector.breakers.items()},
+        'prewarm': prewarmer.status(),
         'message': 'All systems operational'
     })
 
@@ -55,16 +198,352 @@ def analyze():
         return jsonify({'error': 'Query parameter is required'}), 400
     
     try:
-        # Collect data from all platforms
-        data = data_collector.collect_all(query)
+        # Partial results are served but not cached
+        results, cache_state = analysis_cache.get_or_compute(
+            query,
+            lambda: run_analysis(query),
+            cacheable=lambda r: not r.get('partial')
+        )
         
-        # Process with NLP
-        results = nlp_processor.process(data, query)
+        # Default payload is aggregates plus samples; see fields= and include=
+        shaped = shape_results(
+            {**results, 'query': query},
+            fields=parse_list(request.args.get('fields')),
+            include=parse_list(request.args.get('include'))
+        )
+        if request.args.get('debug', '').lower() in ('1', 'true'):
+            shaped['debug'] = {'cache': cache_state, 'timings_ms': metrics.current_timings().as_dict()}
+        with metrics.span('encode'):
+            response = jsonify(shaped)
+        response.headers['X-Cache'] = cache_state.upper()
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/analyze/stream', methods=['GET'])
+def analyze_stream():
+    """Streaming analysis endpoint (NDJSON)
+    
+    Emits one ``platform`` event per platform as soon as it is processed,
+    then a ``combined`` event with the overall statistics. Cached results
+    are replayed as the same events; stale ones are refreshed in the
+    background, and concurrent streams of an uncached query share one
+    collection (the first streams it, the others wait for its result).
+    """
+    query = request.args.get('query', '').strip()
+    
+    if not query:
+        return jsonify({'error': 'Query parameter is required'}), 400
+    
+    include = parse_list(request.args.get('include'))
+    error = None
+    try:
+        cached, cache_state, lead = analysis_cache.get_or_lead(
+            query,
+            lambda: run_analysis(query),
+            cacheable=lambda r: not r.get('partial')
+        )
+    except Exception as e:
+        # The analysis this request waited for failed
+        cached, cache_state, lead, error = None, 'miss', None, e
+    
+    def generate():
+        if error is not None:
+            yield to_ndjson({'event': 'error', 'error': str(error)})
+            return
+        if lead is None:
+            events = [*cached['platforms'].items(), ('combined', cached)]
+        else:
+            events = analysis_events(query)
         
-        return jsonify(results)
+        try:
+            for name, data in events:
+                if name != 'combined':
+                    yield to_ndjson({'event': 'platform', 'platform': name, 'data': shape_platform(data, include=include)})
+                    continue
+                
+                if lead is not None:
+                    lead.finish(data)
+                # Platforms were already sent, so the final block leaves them out
+                yield to_ndjson({
+                    'event': 'combined',
+                    'data': {**{k: v for k, v in data.items() if k != 'platforms'}, 'query': query}
+                })
+        except Exception as e:
+            if lead is not None:
+                lead.fail(e)
+            yield to_ndjson({'event': 'error', 'error': str(e)})
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    if lead is not None:
+        # If the client goes away before the end, release anyone waiting on us
+        response.call_on_close(lambda: lead.fail(RuntimeError('The streaming analysis was interrupted')))
+    response.headers['X-Cache'] = cache_state.upper()
+    # Ask proxies not to buffer the stream
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/analyze/items', methods=['GET'])
+def analyze_items():
+    """Paginated items of an analysis, filtered on the server"""
+    query = request.args.get('query', '').strip()
+    
+    if not query:
+        return jsonify({'error': 'Query parameter is required'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
     
+    try:
+        # The analysis the client is looking at may have been a partial one
+        results, cache_state = partial_cache.get(query), 'partial'
+        if results is None:
+            results, cache_state = analysis_cache.get_or_compute(
+                query,
+                lambda: run_analysis(query),
+                cacheable=lambda r: not r.get('partial')
+            )
+        page = filter_items(
+            results,
+            platform=request.args.get('platform'),
+            keyword=request.args.get('keyword', '').strip() or None,
+            sentiment=request.args.get('sentiment'),
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    response = jsonify({**page, 'query': query})
+    response.headers['X-Cache'] = cache_state.upper()
+    return response
+
+
+@app.route('/analyze/deep', methods=['GET'])
+def analyze_deep():
+    """Analysis over many more items than RESULT_LIMIT, in bounded memory
+    
+    Pages through each platform's API up to ``limit`` items and folds every
+    page into running aggregates as it arrives, so neither the items nor
+    their scores are ever held all at once. Same shape as /analyze, without
+    ``all_items``.
+    
+    With ``adaptive=true`` a platform stops paging once the confidence
+    intervals of its positive and negative shares are at most ``width``
+    wide, and collection ends after ``budget`` seconds; ``confidence``
+    reports what was achieved.
+    """
+    query = request.args.get('query', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter is required'}), 400
+    
+    max_limit = int(os.getenv('DEEP_MAX_LIMIT', 10000))
+    try:
+        limit = int(request.args.get('limit', 1000))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= max_limit:
+        return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+    
+    adaptive = request.args.get('adaptive', 'false').lower() == 'true'
+    try:
+        width = float(request.args.get('width', os.getenv('ADAPTIVE_TARGET_WIDTH', 0.1)))
+        budget = float(request.args.get('budget', os.getenv('ADAPTIVE_BUDGET', 10)))
+    except ValueError:
+        return jsonify({'error': 'width and budget must be numbers'}), 400
+    if adaptive and not (0 < width < 1 and budget > 0):
+        return jsonify({'error': 'width must be between 0 and 1 and budget positive'}), 400
+    
+    def compute():
+        status = {}
+        sampler = None
+        if adaptive:
+            sampler = AdaptiveSampler(
+                target_width=width,
+                level=float(os.getenv('ADAPTIVE_CONFIDENCE', 0.95)),
+                min_items=int(os.getenv('ADAPTIVE_MIN_ITEMS', 30)),
+                budget=budget
+            )
+        # Below user requests in the rate-limit queues
+        pages = data_collector.iter_pages(
+            query, limit, status, priority=1,
+            deadline=budget if adaptive else None,
+            stopped=sampler.stopped if adaptive else None
+        )
+        results = nlp_processor.process_pages(pages, query, sampler=sampler)
+        results['limit'] = limit
+        results['platform_status'] = status
+        if adaptive:
+            results['confidence'] = sampler.report(status)
+            # Running out of budget is how adaptive collections are meant to end
+            results['partial'] = any(s not in ('ok', 'timeout') for s in status.values())
+        else:
+            results['partial'] = any(s != 'ok' for s in status.values())
+        return results
+    
+    key = f'{limit} {query}'
+    if adaptive:
+        key = f'adaptive {width} {budget} {key}'
+    try:
+        results, cache_state = deep_cache.get_or_compute(
+            key, compute, cacheable=lambda r: not r.get('partial')
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    shaped = shape_results(
+        {**results, 'query': query},
+        fields=parse_list(request.args.get('fields'))
+    )
+    response = jsonify(shaped)
+    response.headers['X-Cache'] = cache_state.upper()
+    return response
+
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze many queries in one request
+    
+    Body: ``{"queries": [...], "fields": "...", "include": "..."}``. Uncached
+    queries are collected concurrently, then their texts are grouped and
+    scored in one batched pass: a text shared between queries is scored
+    once, and duplicates dedup folds into a representative not at all.
+    """
+    body = request.get_json(silent=True) or {}
+    queries = body.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return jsonify({'error': 'queries must be a non-empty list'}), 400
+    
+    max_queries = int(os.getenv('BATCH_MAX_QUERIES', 100))
+    if len(queries) > max_queries:
+        return jsonify({'error': f'At most {max_queries} queries per batch'}), 400
+    
+    # One analysis per normalized query, however often it is repeated
+    unique = {}
+    errors = {}
+    for query in queries:
+        if not isinstance(query, str) or not query.strip():
+            errors[str(query)] = 'Query must be a non-empty string'
+            continue
+        unique.setdefault(ResultCache.normalize_key(query), query.strip())
+    
+    analyses = {}
+    to_collect = {}
+    for key, query in unique.items():
+        cached = analysis_cache.get(query)
+        if cached is not None:
+            analyses[key] = cached
+        else:
+            to_collect[key] = query
+    
+    def collect(query):
+        status = {}
+        return data_collector.collect_all(query, status), status
+    
+    collected = {}
+    if to_collect:
+        with ThreadPoolExecutor(max_workers=int(os.getenv('BATCH_CONCURRENCY', 4))) as executor:
+            futures = {key: executor.submit(collect, query) for key, query in to_collect.items()}
+            for key, future in futures.items():
+                try:
+                    collected[key] = future.result()
+                except Exception as e:
+                    errors[to_collect[key]] = str(e)
+    
+    # Group and score every query's texts in one pass; the per-query
+    # processing below uses those scores instead of scoring again
+    prepared = nlp_processor.prepare_batch({key: data for key, (data, status) in collected.items()})
+    
+    for key, (data, status) in collected.items():
+        query = to_collect[key]
+        try:
+            results = nlp_processor.process(data, query, prepared[key])
+        except Exception as e:
+            errors[query] = str(e)
+            continue
+        results['platform_status'] = status
+        results['partial'] = any(s != 'ok' for s in status.values())
+        record_trends(query, results)
+        if not results['partial']:
+            analysis_cache.put(query, results)
+        analyses[key] = results
+    
+    fields = parse_list(body.get('fields'))
+    include = parse_list(body.get('include'))
+    return jsonify({
+        'results': {
+            query: shape_results({**analyses[ResultCache.normalize_key(query)], 'query': query.strip()}, fields, include)
+            for query in queries
+            if isinstance(query, str) and ResultCache.normalize_key(query) in analyses
+        },
+        'errors': errors
+    })
+
+
+@app.route('/trend', methods=['GET'])
+def trend():
+    """Sentiment over time for a query, in hour or day buckets
+    
+    Built incrementally from every analysis of the query (including
+    background refreshes of watched queries), bucketed by posting time.
+    """
+    query = request.args.get('query', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter is required'}), 400
+    
+    resolution = request.args.get('resolution', 'hour')
+    platform = request.args.get('platform') or None
+    try:
+        days = float(request.args.get('days', 7 if resolution == 'hour' else 30))
+        buckets = trend_store.series(query, resolution, platform, since=time.time() - days * 86400)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'query': query,
+        'resolution': resolution,
+        'platform': platform,
+        'platforms': trend_store.platforms(query),
+        'buckets': buckets
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage latencies, item counts and mock fallbacks in Prometheus text format"""
+    body = metrics.render({
+        'fab_result_cache': analysis_cache.stats(),
+        'fab_sentiment_cache': nlp_processor.sentiment_cache.stats()
+    })
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/watch', methods=['GET', 'POST', 'DELETE'])
+def watch():
+    """List, add or remove queries that are kept warm in the cache"""
+    if request.method == 'GET':
+        return jsonify({'watched': prewarmer.watched()})
+    
+    body = request.get_json(silent=True) or {}
+    query = (body.get('query') or request.args.get('query', '')).strip()
+    if not query:
+        return jsonify({'error': 'Query parameter is required'}), 400
+    
+    if request.method == 'POST':
+        prewarmer.watch(query)
+        return jsonify({'watched': prewarmer.watched()}), 201
+    
+    if not prewarmer.unwatch(query):
+        return jsonify({'error': f"'{query}' is not watched"}), 404
+    return jsonify({'watched': prewarmer.watched()})
 
 
 if __name__ == '__main__':
@@ -0,0 +1,244 @@
+"""
+Async serving path
+
+Run with:  uvicorn asgi:app --host 0.0.0.0 --port $PORT
+
+/analyze and /analyze/stream are served natively with async HTTP clients,
+so one process can hold hundreds of analyses that are waiting on the
+platform APIs. CPU-bound NLP runs on a thread pool off the event loop.
+Every other endpoint is served by the Flask app mounted underneath, and
+both share the same caches, item store and rate limits.
+"""
+
+import asyncio
+import contextvars
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import (
+    app as flask_app, allowed_origins, analysis_cache, partial_cache, data_collector, nlp_processor,
+    ResultCache, record_trends, shape_results, shape_platform, parse_list, to_ndjson
+)
+from modules import metrics
+from modules.async_collector import AsyncDataCollector
+
+async_collector = AsyncDataCollector(
+    item_store=data_collector.item_store,
+    rate_limiter=data_collector.rate_limiter,
+    shared=data_collector
+)
+cpu_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASGI_CPU_WORKERS', 4)),
+    thread_name_prefix='nlp'
+)
+
+# Single-flight for the async path: normalized query -> running analysis
+_inflight = {}
+
+
+async def _run_analysis(query: str) -> dict:
+    """Collect asynchronously, then process off the event loop"""
+    status = {}
+    data = await async_collector.acollect_all(query, status)
+    loop = asyncio.get_running_loop()
+    # run_in_executor doesn't carry the context over, so spans need an explicit copy
+    results = await loop.run_in_executor(
+        cpu_executor, contextvars.copy_context().run, nlp_processor.process, data, query
+    )
+
+    results['platform_status'] = status
+    results['partial'] = any(s != 'ok' for s in status.values())
+    await loop.run_in_executor(cpu_executor, record_trends, query, results)
+    if not results['partial']:
+        # The cache may write to a shared backend; keep that off the event loop
+        await asyncio.to_thread(analysis_cache.put, query, results)
+    else:
+        await asyncio.to_thread(partial_cache.put, query, results)
+    return results
+
+
+def _start_analysis(query: str) -> asyncio.Future:
+    """Join the running analysis for this query, or start one"""
+    key = ResultCache.normalize_key(query)
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(_run_analysis(query))
+        task.add_done_callback(lambda done: _inflight.pop(key, None))
+    return task
+
+
+def _lead_analysis(query: str) -> Optional[asyncio.Future]:
+    """Register a stream as the running analysis for this query
+
+    Returns the future the stream resolves with its combined result, or
+    None if an analysis is already running (join it with _start_analysis).
+    """
+    key = ResultCache.normalize_key(query)
+    if key in _inflight:
+        return None
+    flight = _inflight[key] = asyncio.get_running_loop().create_future()
+
+    def finished(done):
+        _inflight.pop(key, None)
+        # Nobody may be waiting; mark a failure as seen so asyncio doesn't log it
+        if not done.cancelled():
+            done.exception()
+
+    flight.add_done_callback(finished)
+    return flight
+
+
+async def analyze(request):
+    """Main analysis endpoint (async)"""
+    query = request.query_params.get('query', '').strip()
+
+    if not query:
+        return JSONResponse({'error': 'Query parameter is required'}, status_code=400)
+
+    timings = metrics.start_request()
+    results, cache_state = await asyncio.to_thread(analysis_cache.lookup, query)
+    try:
+        if results is None:
+            # Shield so a disconnecting client doesn't cancel the shared analysis
+            results = await asyncio.shield(_start_analysis(query))
+        elif cache_state == 'stale':
+            _start_analysis(query)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    shaped = shape_results(
+        {**results, 'query': query},
+        fields=parse_list(request.query_params.get('fields')),
+        include=parse_list(request.query_params.get('include'))
+    )
+    if request.query_params.get('debug', '').lower() in ('1', 'true'):
+        shaped['debug'] = {'cache': cache_state, 'timings_ms': timings.as_dict()}
+    with metrics.span('encode'):
+        response = JSONResponse(shaped, headers={'X-Cache': cache_state.upper()})
+    response.headers['Server-Timing'] = timings.server_timing()
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - timings.started, endpoint='/analyze')
+    return response
+
+
+async def analyze_stream(request):
+    """Streaming analysis endpoint (NDJSON), see the Flask version for the event format"""
+    query = request.query_params.get('query', '').strip()
+
+    if not query:
+        return JSONResponse({'error': 'Query parameter is required'}, status_code=400)
+
+    include = parse_list(request.query_params.get('include'))
+    # Stale entries are replayed while a refresh runs in the background;
+    # concurrent streams of a miss share one collection, like the Flask version
+    cached, cache_state = await asyncio.to_thread(analysis_cache.lookup, query)
+    lead = None
+    if cached is None:
+        lead = _lead_analysis(query)
+    elif cache_state == 'stale':
+        _start_analysis(query)
+
+    def platform_event(name, data):
+        return to_ndjson({'event': 'platform', 'platform': name, 'data': shape_platform(data, include=include)})
+
+    def combined_event(results):
+        return to_ndjson({
+            'event': 'combined',
+            'data': {**{k: v for k, v in results.items() if k != 'platforms'}, 'query': query}
+        })
+
+    async def replay(results):
+        for name, data in results['platforms'].items():
+            yield platform_event(name, data)
+        yield combined_event(results)
+
+    async def generate():
+        if cached is not None:
+            async for event in replay(cached):
+                yield event
+            return
+        if lead is None:
+            try:
+                # Shield so a disconnecting client doesn't cancel the shared analysis
+                results = await asyncio.shield(_start_analysis(query))
+            except Exception as e:
+                yield to_ndjson({'event': 'error', 'error': str(e)})
+                return
+            async for event in replay(results):
+                yield event
+            return
+
+        # NLPProcessor.process_iter is a sync generator; feed it platforms
+        # through a queue and advance it on the CPU pool as each one arrives
+        feed = queue.SimpleQueue()
+
+        def platform_items():
+            while (item := feed.get()) is not None:
+                yield item
+
+        events = nlp_processor.process_iter(platform_items(), query)
+        loop = asyncio.get_running_loop()
+        status = {}
+        try:
+            async for platform, items in async_collector.acollect_iter(query, status):
+                feed.put((platform, items))
+                if items:
+                    name, data = await loop.run_in_executor(cpu_executor, next, events)
+                    yield platform_event(name, data)
+            feed.put(None)
+            name, results = await loop.run_in_executor(cpu_executor, next, events)
+
+            results['platform_status'] = status
+            results['partial'] = any(s != 'ok' for s in status.values())
+            await loop.run_in_executor(cpu_executor, record_trends, query, results)
+            await asyncio.to_thread(
+                partial_cache.put if results['partial'] else analysis_cache.put, query, results
+            )
+            lead.set_result(results)
+            yield combined_event(results)
+        except Exception as e:
+            feed.put(None)
+            lead.set_exception(e)
+            yield to_ndjson({'event': 'error', 'error': str(e)})
+        finally:
+            # If the client goes away before the end, release anyone waiting on us
+            if not lead.done():
+                feed.put(None)
+                lead.set_exception(RuntimeError('The streaming analysis was interrupted'))
+
+    return StreamingResponse(generate(), media_type='application/x-ndjson', headers={
+        'X-Cache': cache_state.upper(),
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await async_collector.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/analyze', analyze, methods=['GET']),
+        Route('/analyze/stream', analyze_stream, methods=['GET']),
+        # Everything else is served by the Flask app
+        Mount('/', app=WSGIMiddleware(flask_app))
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=allowed_origins, allow_credentials=True,
+                   allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan
+)
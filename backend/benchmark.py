@@ -0,0 +1,327 @@
+"""
+Offline benchmark for the analysis pipeline
+
+Generates items from benchmarks/fixtures/corpus.json (no API keys or
+network needed) and measures:
+
+  process/<n>   NLPProcessor.process on n items split across the platforms
+  pipeline/<n>  collect_all through stand-in API clients with injected
+                latency, then process, i.e. what /analyze does on a cache
+                miss (the collectors' per-call limits apply, so fewer than
+                n items may be collected)
+
+For each scenario it reports throughput, p50/p95/p99 latency and peak
+traced memory. Results can be saved as JSON and compared against an
+earlier run:
+
+  python benchmark.py --output bench.json
+  python benchmark.py --baseline bench.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform as platform_info
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+# Keep the benchmark offline and quiet regardless of the local .env
+for key in ('TWITTER_BEARER_TOKEN', 'REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'YOUTUBE_API_KEY'):
+    os.environ.pop(key, None)
+
+from modules.data_collector import DataCollector
+from modules.dedup import Deduplicator
+from modules.nlp_processor import NLPProcessor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures', 'corpus.json')
+PLATFORMS = ('twitter', 'reddit', 'youtube')
+DEFAULT_SIZES = '50,500,5000,20000,100000'
+DEFAULT_LATENCY = 'twitter=0.3,reddit=0.5,youtube=0.9'
+
+
+def generate_items(query: str, count: int, seed: int = 0, duplicate_ratio: float = 0.1) -> Dict[str, List[Dict]]:
+    """Deterministic fixture items, split evenly across platforms
+
+    ``duplicate_ratio`` of the items repeat an earlier text, like retweets
+    and copy-pasted comments do in live data.
+    """
+    with open(FIXTURES) as f:
+        corpus = json.load(f)
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    texts = []
+    for i in range(count):
+        if texts and rng.random() < duplicate_ratio:
+            texts.append(rng.choice(texts))
+            continue
+        parts = [rng.choice(corpus['openers']).format(query=query)]
+        parts += [s + '.' for s in rng.sample(corpus['opinions'], rng.randint(1, 2))]
+        parts.append(rng.choice(corpus['closers']))
+        texts.append(' '.join(p for p in parts if p))
+
+    data = {platform: [] for platform in PLATFORMS}
+    for i, text in enumerate(texts):
+        platform = PLATFORMS[i % len(PLATFORMS)]
+        created = started + timedelta(seconds=37 * i)
+        if platform == 'twitter':
+            item = {'text': text, 'created_at': created.isoformat(), 'id': str(10 ** 18 + i), 'lang': 'en',
+                    'retweet_count': rng.randint(0, 50), 'like_count': rng.randint(0, 500)}
+        elif platform == 'reddit':
+            item = {'text': text, 'created_at': str(created.timestamp()), 'id': f'rd{i:x}',
+                    'subreddit': rng.choice(corpus['subreddits']), 'score': rng.randint(0, 1000),
+                    'url': f'https://reddit.com/r/x/comments/rd{i:x}'}
+        else:
+            video = rng.randrange(10)
+            item = {'text': text, 'created_at': created.isoformat().replace('+00:00', 'Z'), 'id': f'yt{i:x}',
+                    'video_id': f'vid{video}',
+                    'video_title': corpus['video_titles'][video % len(corpus['video_titles'])].format(query=query),
+                    'like_count': rng.randint(0, 200)}
+        data[platform].append(item)
+    return data
+
+
+class StandInAPI:
+    """Fixture responses for one platform, each call after an injected, jittered delay"""
+
+    def __init__(self, items: List[Dict], latency: float, jitter: float, rng: random.Random):
+        self.items = items
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = rng
+
+    def wait(self):
+        time.sleep(max(0.0, self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter))))
+
+
+class StandInTwitter(StandInAPI):
+    """The part of tweepy.Client that DataCollector uses"""
+
+    def search_recent_tweets(self, query: str, max_results: int = 10, since_id=None, **params):
+        self.wait()
+        return SimpleNamespace(data=[
+            {'id': item['id'], 'text': item['text'], 'created_at': item['created_at'], 'lang': item['lang'],
+             'public_metrics': {'retweet_count': item['retweet_count'], 'like_count': item['like_count']}}
+            for item in self.items[:max_results]
+        ])
+
+
+class StandInReddit(StandInAPI):
+    """The part of praw.Reddit that DataCollector uses; listings fetch 100 posts per call"""
+
+    auth = SimpleNamespace(limits={})
+
+    def subreddit(self, name: str):
+        return self
+
+    def search(self, query: str, limit: int = 100, **params):
+        for i, item in enumerate(self.items[:limit]):
+            if i % 100 == 0:
+                self.wait()
+            yield SimpleNamespace(
+                title=item['text'], selftext='', created_utc=float(item['created_at']), id=item['id'],
+                subreddit=SimpleNamespace(display_name=item['subreddit']), score=item['score'],
+                permalink=item['url'][len('https://reddit.com'):]
+            )
+
+
+class StandInYouTube(StandInAPI):
+    """The part of the googleapiclient YouTube resource that DataCollector uses"""
+
+    def __init__(self, items: List[Dict], latency: float, jitter: float, rng: random.Random):
+        super().__init__(items, latency, jitter, rng)
+        self.videos = {}
+        for item in items:
+            self.videos.setdefault(item['video_id'], []).append(item)
+
+    def search(self):
+        return self
+
+    def commentThreads(self):
+        return SimpleNamespace(list=self._comment_threads)
+
+    def list(self, maxResults: int = 5, **params):
+        return self._request({'items': [
+            {'id': {'videoId': video_id}, 'snippet': {'title': comments[0]['video_title']}}
+            for video_id, comments in list(self.videos.items())[:maxResults]
+        ]})
+
+    def _comment_threads(self, videoId: str, maxResults: int = 20, **params):
+        return self._request({'items': [
+            {'id': item['id'], 'snippet': {'topLevelComment': {'snippet': {
+                'textDisplay': item['text'], 'publishedAt': item['created_at'], 'likeCount': item['like_count']
+            }}}}
+            for item in self.videos.get(videoId, [])[:maxResults]
+        ]})
+
+    def _request(self, response: Dict):
+        """Like googleapiclient's HttpRequest: nothing happens until execute"""
+        def execute(http=None):
+            self.wait()
+            return response
+        return SimpleNamespace(execute=execute)
+
+
+class StandInCollector(DataCollector):
+    """DataCollector talking to stand-in API clients instead of the real APIs
+
+    The clients are injected through the client setters, so the real
+    collect_* methods run, with their per-call limits (e.g. one Twitter
+    search returns at most 100 tweets) and parsing. Latency is per API call.
+    """
+
+    def __init__(self, data: Dict[str, List[Dict]], latency: Dict[str, float], jitter: float = 0.2, seed: int = 0):
+        super().__init__()
+        rng = random.Random(seed)
+        self.result_limit = max(len(items) for items in data.values())
+        self.twitter_client = StandInTwitter(data.get('twitter', []), latency.get('twitter', 0.0), jitter, rng)
+        self.reddit_client = StandInReddit(data.get('reddit', []), latency.get('reddit', 0.0), jitter, rng)
+        self.youtube_client = StandInYouTube(data.get('youtube', []), latency.get('youtube', 0.0), jitter, rng)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def measure(run, items: int, repeat: int, warmup: int = 1) -> Dict:
+    """Time ``run`` ``repeat`` times, then once more under tracemalloc for peak memory"""
+    for _ in range(warmup):
+        run()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+
+    # Tracing slows everything down, so memory gets its own run
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    p50 = percentile(samples, 50)
+    return {
+        'items': items,
+        'runs': repeat,
+        'throughput': round(items / p50, 1) if p50 else None,
+        'p50_ms': round(p50 * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'peak_mb': round(peak / 2 ** 20, 2)
+    }
+
+
+def run_benchmarks(args) -> Dict:
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    latency = {p: float(v) for p, v in (pair.split('=') for pair in args.latency.split(',') if pair)}
+    results = {}
+
+    for size in sizes:
+        data = generate_items(args.query, size, seed=args.seed, duplicate_ratio=args.duplicate_ratio)
+        repeat = args.repeat if size < 20000 else max(1, args.repeat // 2)
+
+        # No sentiment memo, so every run scores all items like new ones would be
+        processor = NLPProcessor(processes=args.processes, dedup=Deduplicator() if args.dedup else None)
+
+        def process():
+            processor.process(data, args.query)
+
+        results[f'process/{size}'] = measure(process, size, repeat)
+        print(format_row(f'process/{size}', results[f'process/{size}']))
+
+        if size <= args.pipeline_max:
+            collector = StandInCollector(data, latency, seed=args.seed)
+            # The collectors' per-call limits cap what one collection returns
+            collected = sum(len(items) for items in collector.collect_all(args.query).values())
+
+            def pipeline():
+                processor.process(collector.collect_all(args.query), args.query)
+
+            results[f'pipeline/{size}'] = measure(pipeline, collected, repeat, warmup=0)
+            print(format_row(f'pipeline/{size}', results[f'pipeline/{size}']))
+
+    return results
+
+
+def format_row(name: str, result: Dict) -> str:
+    return (f"{name:<18} {result['throughput'] or 0:>12,.0f} items/s   "
+            f"p50 {result['p50_ms']:>9.1f} ms   p95 {result['p95_ms']:>9.1f} ms   "
+            f"p99 {result['p99_ms']:>9.1f} ms   peak {result['peak_mb']:>8.1f} MB")
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Scenarios whose p50 latency or peak memory grew by more than ``threshold``"""
+    regressions = []
+    print(f"\nCompared with baseline ({baseline.get('meta', {}).get('timestamp', 'unknown')}):")
+    for name, base in baseline.get('results', {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric in ('p50_ms', 'peak_mb'):
+            if not base.get(metric):
+                continue
+            change = current[metric] / base[metric] - 1
+            flag = ''
+            if change > threshold:
+                flag = '  <-- regression'
+                regressions.append(f'{name} {metric}')
+            print(f"  {name:<18} {metric:<8} {base[metric]:>10.2f} -> {current[metric]:>10.2f} ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark for the analysis pipeline')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated item counts')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per scenario (halved from 20k items)')
+    parser.add_argument('--query', default='iPhone 16')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1)
+    parser.add_argument('--dedup', action='store_true', help='group near-duplicate texts before scoring (DEDUP_ENABLED)')
+    parser.add_argument('--processes', type=int, default=0, help='sentiment worker processes (SENTIMENT_PROCESSES)')
+    parser.add_argument('--latency', default=DEFAULT_LATENCY,
+                        help='injected latency per stand-in API call in seconds, e.g. twitter=0.3,reddit=0.5')
+    parser.add_argument('--pipeline-max', type=int, default=5000,
+                        help='largest size that also runs the end-to-end pipeline scenario')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against a JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative slowdown before a scenario counts as a regression')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform_info.platform(),
+            'cpus': os.cpu_count(),
+            'args': vars(args)
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
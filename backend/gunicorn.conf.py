@@ -0,0 +1,15 @@
+# Gunicorn reads this file from the working directory (backend/) on startup.
+#
+# The VADER lexicons are loaded once here, in the master, so every forked
+# worker inherits them instead of parsing the files itself. The app itself is
+# not preloaded: it opens SQLite connections and starts the prewarmer thread
+# at import, which must happen in each worker.
+import gc
+import os
+
+if os.getenv('PRELOAD_LEXICON', 'True').lower() == 'true':
+    from modules.sentiment_engine import shared_analyzer
+
+    shared_analyzer()
+    # Keep the collector from touching (and so copying) the inherited pages
+    gc.freeze()
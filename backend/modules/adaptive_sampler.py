@@ -0,0 +1,93 @@
+import math
+import time
+from statistics import NormalDist
+from typing import Dict, Optional, Tuple
+
+from .online_stats import RunningSentiment
+
+
+def wilson_interval(successes: float, n: float, z: float) -> Tuple[float, float]:
+    """Wilson score interval for a proportion; (0, 1) when there is no data"""
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class AdaptiveSampler:
+    """Stops paging a platform once its sentiment split is known precisely enough
+
+    After every scored page, the Wilson intervals of the platform's positive
+    and negative proportions are recomputed. When both are at most
+    ``target_width`` wide (and at least ``min_items`` items were seen), the
+    platform is added to ``stopped``, which DataCollector.iter_pages checks
+    before requesting another page or video. The latency budget itself is
+    enforced through iter_pages' deadline.
+    """
+
+    def __init__(self, target_width: float = 0.1, level: float = 0.95, min_items: int = 30,
+                 budget: Optional[float] = None):
+        self.target_width = target_width
+        self.level = level
+        self.min_items = min_items
+        self.budget = budget
+        self.z = NormalDist().inv_cdf(0.5 + level / 2)
+        self.stopped = set()
+        self.started = time.monotonic()
+        self._tallies = {}   # platform -> (negative, neutral, positive) counts
+        self._stopped_at = {}
+
+    def observe(self, platform: str, sentiment: RunningSentiment) -> bool:
+        """Record a platform's running counts; True once it has been stopped"""
+        self._tallies[platform] = tuple(int(count) for count in sentiment.tally)
+        if platform not in self.stopped and self._width(self._tallies[platform]) <= self.target_width:
+            self.stopped.add(platform)
+            self._stopped_at[platform] = time.monotonic() - self.started
+        return platform in self.stopped
+
+    def report(self, status: Dict[str, str]) -> Dict:
+        """Achieved intervals per platform and combined, and why each platform stopped"""
+        report = {'level': self.level, 'target_width': self.target_width, 'budget': self.budget, 'platforms': {}}
+        for platform, tally in self._tallies.items():
+            entry = self._describe(tally)
+            if platform in self.stopped:
+                entry['stopped'] = 'confident'
+                entry['stopped_after'] = round(self._stopped_at[platform], 3)
+            elif status.get(platform) == 'timeout':
+                entry['stopped'] = 'budget'
+            else:
+                entry['stopped'] = 'exhausted'
+            report['platforms'][platform] = entry
+        combined = tuple(sum(tally[i] for tally in self._tallies.values()) for i in range(3))
+        report['combined'] = self._describe(combined)
+        return report
+
+    def _width(self, tally: Tuple[int, int, int]) -> float:
+        n = sum(tally)
+        if n < self.min_items:
+            return 1.0
+        low_pos, high_pos = wilson_interval(tally[2], n, self.z)
+        low_neg, high_neg = wilson_interval(tally[0], n, self.z)
+        return max(high_pos - low_pos, high_neg - low_neg)
+
+    def _describe(self, tally: Tuple[int, int, int]) -> Dict:
+        n = sum(tally)
+        positive = wilson_interval(tally[2], n, self.z)
+        negative = wilson_interval(tally[0], n, self.z)
+        width = max(positive[1] - positive[0], negative[1] - negative[0])
+        return {
+            'items': n,
+            'positive': {
+                'proportion': round(tally[2] / n, 4) if n else 0.0,
+                'interval': [round(positive[0], 4), round(positive[1], 4)]
+            },
+            'negative': {
+                'proportion': round(tally[0] / n, 4) if n else 0.0,
+                'interval': [round(negative[0], 4), round(negative[1], 4)]
+            },
+            'width': round(width, 4),
+            'target_met': width <= self.target_width
+        }
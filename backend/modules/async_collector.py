@@ -0,0 +1,325 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .data_collector import DataCollector, rejected_request
+from . import metrics
+
+TWITTER_SEARCH_URL = 'https://api.twitter.com/2/tweets/search/recent'
+REDDIT_TOKEN_URL = 'https://www.reddit.com/api/v1/access_token'
+REDDIT_SEARCH_URL = 'https://oauth.reddit.com/r/all/search'
+YOUTUBE_API_URL = 'https://www.googleapis.com/youtube/v3'
+
+
+class AsyncDataCollector(DataCollector):
+    """Async counterpart of DataCollector for the ASGI server
+
+    Talks to the Twitter, Reddit and YouTube REST APIs directly through one
+    shared ``httpx.AsyncClient``, so an in-flight analysis waiting on I/O only
+    holds a coroutine, not a thread. Mock data, the item store and rate
+    limits are shared with DataCollector. Given the ``shared`` sync
+    collector, its circuit breakers, last-good results and search latencies
+    are used as well, so both paths trip, fall back and hedge together.
+    """
+
+    def __init__(self, item_store=None, rate_limiter=None, http: Optional[httpx.AsyncClient] = None,
+                 shared: Optional[DataCollector] = None):
+        super().__init__(item_store=item_store, rate_limiter=rate_limiter)
+        if shared is not None:
+            self.breakers = shared.breakers
+            self._last_good = shared._last_good
+            self._last_good_lock = shared._last_good_lock
+            self._search_latency = shared._search_latency
+        self.http = http or httpx.AsyncClient(
+            timeout=httpx.Timeout(self.platform_timeout),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+        )
+        self._reddit_token = None
+        self._reddit_token_expires = 0.0
+
+    async def acollect_all(self, query: str, status: Optional[Dict[str, str]] = None,
+                           priority: int = 0) -> Dict[str, List[Dict]]:
+        """Collect data from all platforms (see DataCollector.collect_all)"""
+        collected = {platform: items async for platform, items in self.acollect_iter(query, status, priority)}
+        return {platform: collected[platform] for platform in self._collectors() if platform in collected}
+
+    async def acollect_iter(self, query: str, status: Optional[Dict[str, str]] = None,
+                            priority: int = 0) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Yield ``(platform, items)`` as each platform finishes or times out"""
+        if status is None:
+            status = {}
+
+        collectors = {
+            'twitter': self.acollect_twitter,
+            'reddit': self.acollect_reddit,
+            'youtube': self.acollect_youtube
+        }
+
+        async def run(platform, collect):
+            # All platforms start together, so the global deadline caps each timeout
+            timeout = min(self._platform_timeout(platform), self.deadline)
+            try:
+                with metrics.span('collect', platform):
+                    items = await asyncio.wait_for(collect(query, priority), timeout)
+                metrics.ITEMS_COLLECTED.inc(len(items), platform=platform)
+                return platform, items
+            except asyncio.TimeoutError:
+                print(f"{platform} collector timed out after {timeout:.1f}s")
+                status[platform] = 'timeout'
+            except Exception as e:
+                print(f"{platform} collector error: {e}")
+                status[platform] = 'error'
+            return platform, None
+
+        for next_done in asyncio.as_completed([run(p, c) for p, c in collectors.items()]):
+            platform, items = await next_done
+            if items is not None:
+                status[platform] = 'ok'
+                yield platform, items
+
+    async def acollect_twitter(self, query: str, priority: int = 0) -> List[Dict]:
+        """Collect tweets via the v2 recent search endpoint"""
+        if self.twitter_token and self._allow('twitter') and await asyncio.to_thread(self._acquire, 'twitter', 1, priority):
+            try:
+                with self._guarded('twitter'):
+                    since_id = await asyncio.to_thread(self._twitter_since_id, query)
+                    params = {
+                        'query': query,
+                        'max_results': max(10, min(self.result_limit, 100)),
+                        'tweet.fields': 'created_at,public_metrics,author_id,lang'
+                    }
+                    if since_id:
+                        params['since_id'] = since_id
+                    response = await self._atwitter_search(params)
+                    try:
+                        response.raise_for_status()
+                    except httpx.HTTPStatusError as e:
+                        # A watermark can still fall out of the search window
+                        if not (since_id and rejected_request(e)
+                                and await asyncio.to_thread(self._acquire, 'twitter', 1, priority)):
+                            raise
+                        print(f"Twitter API rejected since_id {since_id}, retrying without it")
+                        del params['since_id']
+                        response = await self._atwitter_search(params)
+                        response.raise_for_status()
+
+                    new_tweets = self._parse_tweets(response.json().get('data', []))
+                    newest = max((int(t['id']) for t in new_tweets), default=None)
+                    tweets_found = await asyncio.to_thread(self._merge_stored, query, 'twitter', new_tweets, newest)
+                    if tweets_found:
+                        return self._remember(query, 'twitter', tweets_found)
+                    print(f"Twitter API: No tweets found for query '{query}'")
+            except Exception as e:
+                print(f"Twitter API error: {e}")
+                self._note_api_error('twitter', e)
+                print("Falling back to cached or mock data")
+
+        return await asyncio.to_thread(self._fallback, query, 'twitter', self._mock_twitter_data)
+
+    async def _atwitter_search(self, params: Dict) -> httpx.Response:
+        response = await self.http.get(
+            TWITTER_SEARCH_URL, params=params,
+            headers={'Authorization': f'Bearer {self.twitter_token}'}
+        )
+        self._note_quota_headers('twitter', response, 'x-rate-limit-remaining', 'x-rate-limit-reset')
+        return response
+
+    async def acollect_reddit(self, query: str, priority: int = 0) -> List[Dict]:
+        """Collect posts via Reddit's OAuth search endpoint"""
+        pages = max(1, -(-self.result_limit // 100))
+        if (self.reddit_client_id and self.reddit_client_secret and self._allow('reddit')
+                and await asyncio.to_thread(self._acquire, 'reddit', pages, priority)):
+            try:
+                with self._guarded('reddit'):
+                    since = await asyncio.to_thread(self._watermark, query, 'reddit')
+                    headers = {
+                        'Authorization': f'Bearer {await self._reddit_access_token()}',
+                        'User-Agent': self.reddit_user_agent
+                    }
+                    posts = []
+                    after = None
+                    while len(posts) < self.result_limit:
+                        params = {
+                            'q': query,
+                            'limit': min(100, self.result_limit - len(posts)),
+                            'sort': 'new' if since else 'relevance',
+                            't': 'week'
+                        }
+                        if after:
+                            params['after'] = after
+                        response = await self.http.get(REDDIT_SEARCH_URL, params=params, headers=headers)
+                        remaining = response.headers.get('x-ratelimit-remaining')
+                        reset = response.headers.get('x-ratelimit-reset')
+                        if remaining is not None and self.rate_limiter is not None:
+                            # Reddit sends seconds until the reset, not a timestamp
+                            self.rate_limiter.update_quota(
+                                'reddit', float(remaining), time.time() + float(reset) if reset else None
+                            )
+                        response.raise_for_status()
+
+                        listing = response.json()['data']
+                        reached_watermark = False
+                        for child in listing['children']:
+                            submission = child['data']
+                            if since and submission['created_utc'] <= float(since):
+                                reached_watermark = True
+                                break
+                            posts.append(self._submission_item(submission))
+                        after = listing.get('after')
+                        if reached_watermark or not after:
+                            break
+
+                    posts = posts[:self.result_limit]
+                    newest = max((float(p['created_at']) for p in posts), default=None)
+                    posts = await asyncio.to_thread(self._merge_stored, query, 'reddit', posts, newest)
+                    if posts:
+                        return self._remember(query, 'reddit', posts)
+                    print(f"Reddit API: No posts found for query '{query}'")
+            except Exception as e:
+                print(f"Reddit API error: {e}")
+                self._note_api_error('reddit', e)
+                print("Falling back to cached or mock data")
+
+        return await asyncio.to_thread(self._fallback, query, 'reddit', self._mock_reddit_data)
+
+    async def acollect_youtube(self, query: str, priority: int = 0) -> List[Dict]:
+        """Collect comments on the top videos via the YouTube Data API"""
+        max_videos = min(10, self.result_limit // 5)
+        if (self.youtube_key and self._allow('youtube')
+                and await asyncio.to_thread(self._acquire, 'youtube', 100 + max_videos, priority)):
+            try:
+                with self._guarded('youtube'):
+                    async def search():
+                        response = await self.http.get(f'{YOUTUBE_API_URL}/search', params={
+                            'q': query,
+                            'part': 'id,snippet',
+                            'type': 'video',
+                            'maxResults': max_videos,
+                            'order': 'relevance',
+                            'key': self.youtube_key
+                        })
+                        response.raise_for_status()
+                        return response
+
+                    # Hedged: a search slower than usual gets a second, racing attempt
+                    response = await self._ahedged_search('youtube', 100, priority, search)
+                    videos_found = response.json().get('items', [])
+
+                    since = await asyncio.to_thread(self._watermark, query, 'youtube')
+                    comments = (await self._afetch_youtube_comments(videos_found, since))[:self.result_limit]
+
+                    newest = max((c['created_at'] for c in comments), default=None)
+                    comments = await asyncio.to_thread(self._merge_stored, query, 'youtube', comments, newest)
+                    if comments:
+                        return self._remember(query, 'youtube', comments)
+                    print(f"YouTube API: No comments found for query '{query}'")
+            except Exception as e:
+                print(f"YouTube API error: {e}")
+                self._note_api_error('youtube', e)
+                print("Falling back to cached or mock data")
+
+        return await asyncio.to_thread(self._fallback, query, 'youtube', self._mock_youtube_data)
+
+    async def _ahedged_search(self, platform: str, cost: float, priority: int, call):
+        """Async counterpart of _hedged_search; the losing attempt is cancelled"""
+        latency = self._search_latency
+
+        async def attempt():
+            started = time.monotonic()
+            result = await call()
+            latency.add(time.monotonic() - started)
+            return result
+
+        delay = latency.percentile(self.hedge_percentile) if self.hedge_percentile else None
+        if delay is None:
+            return await attempt()
+
+        first = asyncio.ensure_future(attempt())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        # try_acquire never waits, so this doesn't block the event loop
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire(platform, cost, priority):
+            return await first
+        metrics.HEDGED_REQUESTS.inc(platform=platform)
+        second = asyncio.ensure_future(attempt())
+
+        try:
+            done, pending = await asyncio.wait({first, second}, return_when=asyncio.FIRST_COMPLETED)
+            if all(task.exception() is not None for task in done) and pending:
+                done |= (await asyncio.wait(pending))[0]
+        finally:
+            for task in (first, second):
+                if not task.done():
+                    task.cancel()
+        for task in (first, second):
+            if task in done and task.exception() is None:
+                return task.result()
+        return first.result()
+
+    async def _afetch_youtube_comments(self, videos: List[Dict], since: Optional[str] = None) -> List[Dict]:
+        """Concurrent comment fetching with the same ordering and early stop as the sync version"""
+        if not videos:
+            return []
+
+        per_video = min(20, self.result_limit // len(videos))
+        semaphore = asyncio.Semaphore(max(1, self.youtube_comment_concurrency))
+
+        async def fetch(item):
+            video_id = item['id']['videoId']
+            async with semaphore:
+                try:
+                    response = await self.http.get(f'{YOUTUBE_API_URL}/commentThreads', params={
+                        'part': 'snippet',
+                        'videoId': video_id,
+                        'maxResults': per_video,
+                        'order': 'relevance',
+                        'key': self.youtube_key
+                    })
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    # Some videos may have comments disabled
+                    print(f"YouTube API: Could not fetch comments for video {video_id}: {e}")
+                    return []
+            return self._parse_youtube_comments(response.json(), video_id, item['snippet']['title'], since)
+
+        tasks = [asyncio.ensure_future(fetch(item)) for item in videos]
+        comments = []
+        try:
+            # Awaiting in video order keeps the serial ordering while the
+            # remaining requests keep running in the background
+            for task in tasks:
+                comments.extend(await task)
+                if len(comments) >= self.result_limit:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+        return comments
+
+    async def _reddit_access_token(self) -> str:
+        """App-only OAuth token, refreshed shortly before it expires"""
+        if self._reddit_token is None or time.monotonic() >= self._reddit_token_expires:
+            response = await self.http.post(
+                REDDIT_TOKEN_URL,
+                data={'grant_type': 'client_credentials'},
+                auth=(self.reddit_client_id, self.reddit_client_secret),
+                headers={'User-Agent': self.reddit_user_agent}
+            )
+            response.raise_for_status()
+            token = response.json()
+            self._reddit_token = token['access_token']
+            self._reddit_token_expires = time.monotonic() + token.get('expires_in', 3600) - 60
+        return self._reddit_token
+
+    def _note_quota_headers(self, platform: str, response: httpx.Response, remaining_header: str, reset_header: str):
+        """Feed remaining-quota response headers to the rate limiter"""
+        remaining = response.headers.get(remaining_header)
+        if remaining is not None and self.rate_limiter is not None:
+            reset = response.headers.get(reset_header)
+            self.rate_limiter.update_quota(platform, float(remaining), float(reset) if reset else None)
+
+    async def aclose(self):
+        await self.http.aclose()
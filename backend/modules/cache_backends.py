@@ -0,0 +1,171 @@
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class SQLiteCacheBackend:
+    """Result cache shared by every worker process on one host
+
+    Values are pickled (and compressed) into a SQLite file in WAL mode, so
+    readers in other processes don't block the writer. Locks are rows with
+    an expiry, taken with an atomic insert, so a worker that dies while
+    holding one only blocks the key until the lock expires.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                payload BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_entries_stored ON cache_entries (stored_at);
+            CREATE TABLE IF NOT EXISTS cache_locks (
+                key TEXT PRIMARY KEY,
+                token TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        ''')
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """``(value, stored_at)`` with ``stored_at`` in epoch seconds, or None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT payload, stored_at FROM cache_entries WHERE key = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(zlib.decompress(row[0])), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float, ttl: float):
+        payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        with self._lock:
+            try:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)',
+                    (key, stored_at, stored_at + ttl, payload)
+                )
+                self._db.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+                self._db.execute(
+                    'DELETE FROM cache_entries WHERE key IN ('
+                    'SELECT key FROM cache_entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                print(f"Cache backend: write for '{key}' failed: {e}")
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Take the cross-process lock for ``key``; returns a token, or None if it is held"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute('DELETE FROM cache_locks WHERE key = ? AND expires_at <= ?', (key, now))
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO cache_locks VALUES (?, ?, ?)', (key, token, now + ttl)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                print(f"Cache backend: lock for '{key}' failed: {e}")
+                return None
+        return token if cursor.rowcount else None
+
+    def release_lock(self, key: str, token: str):
+        with self._lock:
+            self._db.execute('DELETE FROM cache_locks WHERE key = ? AND token = ?', (key, token))
+            self._db.commit()
+
+    def is_locked(self, key: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT 1 FROM cache_locks WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._db.execute(
+                'SELECT COUNT(*) FROM cache_entries WHERE expires_at > ?', (time.time(),)
+            ).fetchone()[0]
+        return {'type': 'sqlite', 'path': self.path, 'entries': entries}
+
+
+class RedisCacheBackend:
+    """Result cache shared across hosts through Redis (needs the ``redis`` package)
+
+    Entries expire through Redis TTLs. Locks use ``SET NX PX`` and are
+    released with a compare-and-delete script, so a lock that expired and
+    was taken by another worker is never released by the old holder.
+    """
+
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str, prefix: str = 'fab:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND_URL is a redis:// URL but the redis package is not installed')
+        self.url = url
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._release = self._redis.register_script(self._RELEASE)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        payload = self._redis.get(self.prefix + key)
+        if payload is None:
+            return None
+        return pickle.loads(zlib.decompress(payload))
+
+    def set(self, key: str, value: Any, stored_at: float, ttl: float):
+        payload = zlib.compress(pickle.dumps((value, stored_at), protocol=pickle.HIGHEST_PROTOCOL), 1)
+        remaining = stored_at + ttl - time.time()
+        if remaining > 0:
+            self._redis.set(self.prefix + key, payload, px=int(remaining * 1000))
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self._redis.set(f'{self.prefix}lock:{key}', token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def release_lock(self, key: str, token: str):
+        self._release(keys=[f'{self.prefix}lock:{key}'], args=[token])
+
+    def is_locked(self, key: str) -> bool:
+        return bool(self._redis.exists(f'{self.prefix}lock:{key}'))
+
+    def stats(self) -> Dict:
+        parsed = urlparse(self.url)
+        return {'type': 'redis', 'host': parsed.hostname, 'port': parsed.port}
+
+
+def make_cache_backend(url: Optional[str], max_entries: int = 1024):
+    """Backend for a CACHE_BACKEND_URL
+
+    ``sqlite:///relative/path`` or ``sqlite:////absolute/path`` (as in
+    SQLAlchemy) for workers on one host, ``redis://host:port/db`` otherwise.
+    """
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == 'sqlite':
+        return SQLiteCacheBackend(url[len('sqlite:///'):], max_entries=max_entries)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported CACHE_BACKEND_URL scheme '{scheme}'")
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Per-platform breaker: closed -> open -> half-open -> closed
+
+    ``failure_threshold`` consecutive failures open the circuit; a call that
+    succeeds but takes longer than ``slow_call`` seconds counts as a failure
+    too. While open, ``allow`` returns False and callers serve cached data.
+    After ``open_seconds`` the breaker lets one probe call through at a
+    time (half-open); ``probes`` successful probes in a row close it again,
+    a failed one reopens it. A probe that never reports back (e.g. it was
+    never made) frees its slot after ``slow_call`` seconds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, slow_call: float = 8.0,
+                 open_seconds: float = 30.0, probes: int = 3):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.probes = probes
+
+        self.state = CLOSED
+        self.failures = 0         # consecutive failures while closed
+        self.successes = 0        # consecutive successful probes while half-open
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.open_count = 0
+        self.short_circuits = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the API now"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.open_seconds:
+                    self.short_circuits += 1
+                    return False
+                self.state = HALF_OPEN
+                self.successes = 0
+                self.probe_started = None
+            if self.state == HALF_OPEN:
+                if self.probe_started is not None and now - self.probe_started < self.slow_call:
+                    self.short_circuits += 1
+                    return False
+                self.probe_started = now
+            return True
+
+    def record(self, success: bool, duration: float):
+        """Report how a call that ``allow`` let through went"""
+        failed = not success or duration > self.slow_call
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probe_started = None
+                if failed:
+                    self._open()
+                else:
+                    self.successes += 1
+                    if self.successes >= self.probes:
+                        self.state = CLOSED
+                        self.failures = 0
+                        print(f"{self.name} circuit closed after {self.successes} good probes")
+            elif failed:
+                self.failures += 1
+                if self.state == CLOSED and self.failures >= self.failure_threshold:
+                    self._open()
+            else:
+                self.failures = 0
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_in': round(max(0.0, self.opened_at + self.open_seconds - time.monotonic()), 1)
+                if self.state == OPEN else 0.0,
+                'open_count': self.open_count,
+                'short_circuits': self.short_circuits
+            }
+
+    def _open(self):
+        """Open the circuit (lock held)"""
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.open_count += 1
+        print(f"{self.name} circuit opened for {self.open_seconds:.0f}s")
+
+
+class LatencyWindow:
+    """Rolling window of recent call durations, for percentile-based hedging"""
+
+    def __init__(self, size: int = 100, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The ``q``-th percentile, or None until ``min_samples`` calls were seen"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
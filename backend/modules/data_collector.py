@@ -1,11 +1,37 @@
+import contextvars
 import os
+import queue
 import random
-from typing import Dict, List
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from .rate_limiter import rate_limit_retry_after
+from .circuit_breaker import CircuitBreaker, LatencyWindow
+from .http_pool import pooled_session, thread_http, discovery_document
+from . import metrics
+
+# Recent search only reaches back 7 days and rejects older since_ids; tweet
+# ids are snowflakes whose top bits are milliseconds since TWITTER_EPOCH_MS
+TWITTER_SEARCH_WINDOW = 7 * 24 * 3600
+TWITTER_EPOCH_MS = 1288834974657
+
+
+def tweet_timestamp(tweet_id) -> float:
+    """Epoch seconds at which a tweet id was issued"""
+    return ((int(tweet_id) >> 22) + TWITTER_EPOCH_MS) / 1000
+
+
+def rejected_request(error: Exception) -> bool:
+    """Whether ``error`` is a 400 Bad Request response (tweepy or httpx)"""
+    return getattr(getattr(error, 'response', None), 'status_code', None) == 400
 
 class DataCollector:
     """Collects data from Twitter, Reddit, and YouTube"""
     
-    def __init__(self):
+    def __init__(self, item_store=None, rate_limiter=None):
         self.twitter_token = os.getenv('TWITTER_BEARER_TOKEN')
         self.reddit_client_id = os.getenv('REDDIT_CLIENT_ID')
         self.reddit_client_secret = os.getenv('REDDIT_CLIENT_SECRET')
@@ -13,190 +39,839 @@ class DataCollector:
         self.youtube_key = os.getenv('YOUTUBE_API_KEY')
         self.result_limit = int(os.getenv('RESULT_LIMIT', 50))
         
-        # Initialize API clients if keys are available
-        self.twitter_client = None
-        self.reddit_client = None
-        self.youtube_client = None
+        # Concurrent collection settings (seconds)
+        self.concurrent = os.getenv('COLLECT_CONCURRENT', 'True').lower() == 'true'
+        self.platform_timeout = float(os.getenv('COLLECT_PLATFORM_TIMEOUT', 15))
+        self.deadline = float(os.getenv('COLLECT_DEADLINE', 20))
+        self.max_workers = int(os.getenv('COLLECT_MAX_WORKERS', 6))
+        self.youtube_comment_concurrency = int(os.getenv('YOUTUBE_COMMENT_CONCURRENCY', 4))
+        # Paged collection for large limits (iter_pages)
+        self.page_buffer = int(os.getenv('PAGE_BUFFER', 8))
+        self.page_deadline = float(os.getenv('PAGE_DEADLINE', 120))
+        # Shared bounded pool; threads are only spawned on first use
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='collector'
+        )
+        self._comment_executor = ThreadPoolExecutor(
+            max_workers=max(1, self.youtube_comment_concurrency),
+            thread_name_prefix='yt-comments'
+        )
+        
+        # Optional ItemStore for incremental "since last fetch" collection
+        self.item_store = item_store
         
-        self._init_clients()
+        # Optional RateLimitManager; throttled platforms are served from
+        # the last good results instead of calling the API
+        self.rate_limiter = rate_limiter
+        self._last_good = OrderedDict()  # (platform, query key) -> items
+        self._last_good_lock = threading.Lock()
+        self.max_last_good = int(os.getenv('LAST_GOOD_MAX_ENTRIES', 256))
+        
+        # Per-platform circuit breakers: while a platform keeps failing or
+        # answering slowly, its calls are skipped and cached data is served
+        self.breakers = {
+            platform: CircuitBreaker(
+                platform,
+                failure_threshold=int(os.getenv('BREAKER_FAILURES', 5)),
+                slow_call=float(os.getenv('BREAKER_SLOW_CALL', 8)),
+                open_seconds=float(os.getenv('BREAKER_OPEN_SECONDS', 30)),
+                probes=int(os.getenv('BREAKER_PROBES', 3))
+            )
+            for platform in ('twitter', 'reddit', 'youtube')
+        }
+        
+        # YouTube searches still running after this percentile of recent
+        # search latencies get a second, racing attempt (0 disables)
+        self.hedge_percentile = float(os.getenv('HEDGE_PERCENTILE', 95))
+        self._search_latency = LatencyWindow()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hedge')
+        
+        # API clients are created on first use (see _get_client), so importing
+        # the client libraries doesn't slow down worker start-up
+        self._clients = {}
+        self._clients_lock = threading.Lock()
     
-    def _init_clients(self):
-        """Initialize API clients if credentials are available"""
-        # Twitter
-        if self.twitter_token:
-            try:
-                import tweepy
-                self.twitter_client = tweepy.Client(bearer_token=self.twitter_token)
-            except Exception as e:
-                print(f"Twitter client init failed: {e}")
+    @property
+    def twitter_client(self):
+        return self._get_client('twitter', self._create_twitter_client)
+    
+    @twitter_client.setter
+    def twitter_client(self, client):
+        self._clients['twitter'] = client
+    
+    @property
+    def reddit_client(self):
+        return self._get_client('reddit', self._create_reddit_client)
+    
+    @reddit_client.setter
+    def reddit_client(self, client):
+        self._clients['reddit'] = client
+    
+    @property
+    def youtube_client(self):
+        return self._get_client('youtube', self._create_youtube_client)
+    
+    @youtube_client.setter
+    def youtube_client(self, client):
+        self._clients['youtube'] = client
+    
+    def _get_client(self, platform: str, create: Callable):
+        """Create a platform client once, thread-safely; None if not configured"""
+        if platform not in self._clients:
+            with self._clients_lock:
+                if platform not in self._clients:
+                    try:
+                        self._clients[platform] = create()
+                    except Exception as e:
+                        print(f"{platform.capitalize()} client init failed: {e}")
+                        self._clients[platform] = None
+        return self._clients[platform]
+    
+    def _create_twitter_client(self):
+        """Initialize the Twitter client if credentials are available"""
+        if not self.twitter_token:
+            return None
+        import tweepy
+        client = tweepy.Client(bearer_token=self.twitter_token)
+        client.session = pooled_session()
+        return client
+    
+    def _create_reddit_client(self):
+        """Initialize the Reddit client if credentials are available"""
+        if not (self.reddit_client_id and self.reddit_client_secret):
+            return None
+        import praw
+        return praw.Reddit(
+            client_id=self.reddit_client_id,
+            client_secret=self.reddit_client_secret,
+            user_agent=self.reddit_user_agent,
+            requestor_kwargs={'session': pooled_session()}
+        )
+    
+    def _create_youtube_client(self):
+        """Initialize the YouTube client from the bundled discovery document"""
+        if not self.youtube_key:
+            return None
+        from googleapiclient.discovery import build_from_document
+        # Requests are executed with per-thread connections (thread_http)
+        return build_from_document(discovery_document('youtube', 'v3'), developerKey=self.youtube_key)
+    
+    def collect_all(self, query: str, status: Optional[Dict[str, str]] = None,
+                    priority: int = 0) -> Dict[str, List[Dict]]:
+        """Collect data from all platforms
         
-        # Reddit
-        if self.reddit_client_id and self.reddit_client_secret:
-            try:
-                import praw
-                self.reddit_client = praw.Reddit(
-                    client_id=self.reddit_client_id,
-                    client_secret=self.reddit_client_secret,
-                    user_agent=self.reddit_user_agent
-                )
-            except Exception as e:
-                print(f"Reddit client init failed: {e}")
+        If a ``status`` dict is given it is filled with 'ok', 'timeout' or
+        'error' per platform. Timed-out platforms are left out of the result.
+        Lower ``priority`` values are served first when a platform's rate
+        limit makes requests queue up.
+        """
+        collected = dict(self.collect_iter(query, status, priority))
         
-        # YouTube
-        if self.youtube_key:
-            try:
-                from googleapiclient.discovery import build
-                self.youtube_client = build('youtube', 'v3', developerKey=self.youtube_key)
-            except Exception as e:
-                print(f"YouTube client init failed: {e}")
+        # Keep the usual platform ordering
+        return {platform: collected[platform] for platform in self._collectors() if platform in collected}
+    
+    def collect_iter(self, query: str, status: Optional[Dict[str, str]] = None,
+                     priority: int = 0) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield ``(platform, items)`` pairs as each platform finishes"""
+        if status is None:
+            status = {}
+        
+        collectors = self._collectors()
+        
+        if not self.concurrent:
+            for platform, collect in collectors.items():
+                items = self._timed_collect(platform, collect, query, priority)
+                status[platform] = 'ok'
+                yield platform, items
+            return
+        
+        yield from self._collect_concurrent(query, collectors, status, priority)
     
-    def collect_all(self, query: str) -> Dict[str, List[Dict]]:
-        """Collect data from all platforms"""
+    def _collectors(self) -> Dict:
         return {
-            'twitter': self.collect_twitter(query),
-            'reddit': self.collect_reddit(query),
-            'youtube': self.collect_youtube(query)
+            'twitter': self.collect_twitter,
+            'reddit': self.collect_reddit,
+            'youtube': self.collect_youtube
         }
     
-    def collect_twitter(self, query: str) -> List[Dict]:
+    def _timed_collect(self, platform: str, collect: Callable, query: str, priority: int = 0) -> List[Dict]:
+        """Run one collector inside a timing span and count what it returned"""
+        with metrics.span('collect', platform):
+            items = collect(query, priority)
+        metrics.ITEMS_COLLECTED.inc(len(items), platform=platform)
+        return items
+    
+    def _platform_timeout(self, platform: str) -> float:
+        """Timeout for one platform, e.g. COLLECT_TIMEOUT_YOUTUBE overrides the default"""
+        return float(os.getenv(f'COLLECT_TIMEOUT_{platform.upper()}', self.platform_timeout))
+    
+    def _collect_concurrent(self, query: str, collectors: Dict, status: Dict[str, str],
+                            priority: int = 0) -> Iterator[Tuple[str, List[Dict]]]:
+        """Run collectors in parallel with a per-platform timeout and a global deadline
+
+        The executor is shared (e.g. by batch requests), so a collector may
+        wait for a free thread: its platform timeout only starts once it
+        runs, while the global deadline counts from submission.
+        """
+        submitted = time.monotonic()
+        deadline = submitted + self.deadline
+        running_since = {}  # platform -> monotonic time its collector started
+        
+        def run(platform, collect):
+            running_since[platform] = time.monotonic()
+            return self._timed_collect(platform, collect, query, priority)
+        
+        def expires(future):
+            platform = futures[future]
+            if platform not in running_since:
+                return deadline
+            return min(running_since[platform] + self._platform_timeout(platform), deadline)
+        
+        futures = {}
+        for platform, collect in collectors.items():
+            # Copy the context so spans land in this request's timings
+            future = self._executor.submit(contextvars.copy_context().run, run, platform, collect)
+            futures[future] = platform
+        
+        pending = set(futures)
+        
+        while pending:
+            now = time.monotonic()
+            expired = {f for f in pending if expires(f) <= now}
+            for future in expired:
+                # Threads can't be interrupted; a late result is simply dropped
+                platform = futures[future]
+                future.cancel()
+                status[platform] = 'timeout'
+                print(f"{platform} collector timed out after {now - running_since.get(platform, submitted):.1f}s")
+            pending -= expired
+            if not pending:
+                break
+            
+            timeout = min(expires(f) for f in pending) - now
+            if any(futures[f] not in running_since for f in pending):
+                # Queued collectors get their own timeout once they start
+                timeout = min(timeout, 0.05)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                platform = futures[future]
+                try:
+                    items = future.result()
+                except Exception as e:
+                    print(f"{platform} collector error: {e}")
+                    status[platform] = 'error'
+                    continue
+                status[platform] = 'ok'
+                yield platform, items
+    
+    def collect_twitter(self, query: str, priority: int = 0) -> List[Dict]:
         """Collect tweets from Twitter/X"""
-        if self.twitter_client:
+        if self.twitter_client and self._allow('twitter') and self._acquire('twitter', 1, priority):
             try:
-                # Search for recent tweets
-                tweets = self.twitter_client.search_recent_tweets(
-                    query=query,
-                    max_results=min(self.result_limit, 100),
-                    tweet_fields=['created_at', 'public_metrics', 'author_id', 'lang']
-                )
-                if tweets.data:
-                    return [
-                        {
-                            'text': tweet.text,
-                            'created_at': str(tweet.created_at),
-                            'id': str(tweet.id),
-                            'lang': getattr(tweet, 'lang', 'en'),
-                            'retweet_count': getattr(tweet.public_metrics, 'retweet_count', 0) if hasattr(tweet, 'public_metrics') else 0,
-                            'like_count': getattr(tweet.public_metrics, 'like_count', 0) if hasattr(tweet, 'public_metrics') else 0,
-                        }
-                        for tweet in tweets.data
-                    ]
-                else:
-                    print(f"Twitter API: No tweets found for query '{query}'")
+                with self._guarded('twitter'):
+                    # Search for recent tweets, only newer than the last fetch if we have one
+                    since_id = self._twitter_since_id(query)
+                    
+                    def search(since_id):
+                        return self.twitter_client.search_recent_tweets(
+                            query=query,
+                            max_results=min(self.result_limit, 100),
+                            tweet_fields=['created_at', 'public_metrics', 'author_id', 'lang'],
+                            **({'since_id': since_id} if since_id else {})
+                        )
+                    
+                    try:
+                        tweets = search(since_id)
+                    except Exception as e:
+                        # A watermark can still fall out of the search window
+                        if not (since_id and rejected_request(e) and self._acquire('twitter', 1, priority)):
+                            raise
+                        print(f"Twitter API rejected since_id {since_id}, retrying without it")
+                        tweets = search(None)
+                    
+                    new_tweets = self._parse_tweets(tweets.data)
+                
+                    newest = max((int(t['id']) for t in new_tweets), default=None)
+                    tweets_found = self._merge_stored(query, 'twitter', new_tweets, newest)
+                    if tweets_found:
+                        return self._remember(query, 'twitter', tweets_found)
+                    else:
+                        print(f"Twitter API: No tweets found for query '{query}'")
             except Exception as e:
                 print(f"Twitter API error: {e}")
-                print("Falling back to mock data")
+                self._note_api_error('twitter', e)
+                print("Falling back to cached or mock data")
         
-        # Mock data fallback
-        return self._mock_twitter_data(query)
+        # Cached or mock data fallback
+        return self._fallback(query, 'twitter', self._mock_twitter_data)
     
-    def collect_reddit(self, query: str) -> List[Dict]:
+    def collect_reddit(self, query: str, priority: int = 0) -> List[Dict]:
         """Collect posts from Reddit"""
-        if self.reddit_client:
+        # One request per listing page of up to 100 posts
+        pages = max(1, -(-self.result_limit // 100))
+        if self.reddit_client and self._allow('reddit') and self._acquire('reddit', pages, priority):
             try:
-                posts = []
-                # Search across all subreddits
-                search_results = self.reddit_client.subreddit('all').search(
-                    query, 
-                    limit=self.result_limit,
-                    sort='relevance',
-                    time_filter='week'  # Get posts from last week
-                )
+                with self._guarded('reddit'):
+                    posts = []
+                    # After a previous fetch, walk the newest posts and stop at the
+                    # high-water mark; the listing only fetches pages as we iterate
+                    since = self._watermark(query, 'reddit')
+                    search_results = self.reddit_client.subreddit('all').search(
+                        query, 
+                        limit=self.result_limit,
+                        sort='new' if since else 'relevance',
+                        time_filter='week'  # Get posts from last week
+                    )
                 
-                for submission in search_results:
-                    # Combine title and selftext
-                    text = f"{submission.title}"
-                    if submission.selftext:
-                        text += f" {submission.selftext}"
+                    for submission in search_results:
+                        if since and submission.created_utc <= float(since):
+                            break
                     
-                    posts.append({
-                        'text': text[:500],  # Limit text length
-                        'created_at': str(submission.created_utc),
-                        'id': submission.id,
-                        'subreddit': submission.subreddit.display_name,
-                        'score': submission.score,
-                        'url': f"https://reddit.com{submission.permalink}"
-                    })
+                        posts.append(self._parse_submission(submission))
                     
-                    if len(posts) >= self.result_limit:
-                        break
+                        if len(posts) >= self.result_limit:
+                            break
+                
+                    if posts:
+                        print(f"Reddit API: Found {len(posts)} posts for query '{query}'")
                 
-                if posts:
-                    print(f"Reddit API: Found {len(posts)} posts for query '{query}'")
-                    return posts
-                else:
-                    print(f"Reddit API: No posts found for query '{query}'")
+                    if self.rate_limiter is not None:
+                        # praw tracks Reddit's X-Ratelimit-* headers for us
+                        limits = self.reddit_client.auth.limits
+                        self.rate_limiter.update_quota('reddit', limits.get('remaining'), limits.get('reset_timestamp'))
+                
+                    newest = max((float(p['created_at']) for p in posts), default=None)
+                    posts = self._merge_stored(query, 'reddit', posts, newest)
+                    if posts:
+                        return self._remember(query, 'reddit', posts)
+                    else:
+                        print(f"Reddit API: No posts found for query '{query}'")
             except Exception as e:
                 print(f"Reddit API error: {e}")
-                print("Falling back to mock data")
+                self._note_api_error('reddit', e)
+                print("Falling back to cached or mock data")
         
-        # Mock data fallback
-        return self._mock_reddit_data(query)
+        # Cached or mock data fallback
+        return self._fallback(query, 'reddit', self._mock_reddit_data)
     
-    def collect_youtube(self, query: str) -> List[Dict]:
+    def collect_youtube(self, query: str, priority: int = 0) -> List[Dict]:
         """Collect comments from YouTube videos"""
-        if self.youtube_client:
+        # Quota units: 100 per search plus 1 per video's comment threads
+        max_videos = min(10, self.result_limit // 5)
+        if self.youtube_client and self._allow('youtube') and self._acquire('youtube', 100 + max_videos, priority):
             try:
-                # First, search for videos
-                search_response = self.youtube_client.search().list(
-                    q=query,
-                    part='id,snippet',
-                    type='video',
-                    maxResults=min(10, self.result_limit // 5),  # Get more videos for more comments
-                    order='relevance'
-                ).execute()
+                with self._guarded('youtube'):
+                    # First, search for videos; each attempt builds its own request
+                    def search():
+                        return self.youtube_client.search().list(
+                            q=query,
+                            part='id,snippet',
+                            type='video',
+                            maxResults=max_videos,  # Get more videos for more comments
+                            order='relevance'
+                        ).execute(http=thread_http())
+                    
+                    # Hedged: a search slower than usual gets a second, racing attempt
+                    search_response = self._hedged_search('youtube', 100, priority, search)
                 
-                comments = []
-                videos_found = search_response.get('items', [])
+                    videos_found = search_response.get('items', [])
                 
-                if not videos_found:
-                    print(f"YouTube API: No videos found for query '{query}'")
-                else:
-                    print(f"YouTube API: Found {len(videos_found)} videos for query '{query}'")
+                    if not videos_found:
+                        print(f"YouTube API: No videos found for query '{query}'")
+                    else:
+                        print(f"YouTube API: Found {len(videos_found)} videos for query '{query}'")
                 
-                for item in videos_found:
-                    video_id = item['id']['videoId']
-                    video_title = item['snippet']['title']
-                    
-                    try:
-                        # Get comments for each video
-                        comment_response = self.youtube_client.commentThreads().list(
-                            part='snippet',
-                            videoId=video_id,
-                            maxResults=min(20, self.result_limit // len(videos_found) if videos_found else 10),
-                            order='relevance'
-                        ).execute()
-                        
-                        for comment_item in comment_response.get('items', []):
-                            comment = comment_item['snippet']['topLevelComment']['snippet']
-                            comments.append({
-                                'text': comment['textDisplay'],
-                                'created_at': comment['publishedAt'],
-                                'id': comment_item['id'],
-                                'video_id': video_id,
-                                'video_title': video_title,
-                                'video_url': f"https://www.youtube.com/watch?v={video_id}",
-                                'like_count': comment.get('likeCount', 0)
-                            })
-                    except Exception as e:
-                        # Some videos may have comments disabled
-                        print(f"YouTube API: Could not fetch comments for video {video_id}: {e}")
-                        continue
-                    
-                    # Stop if we have enough comments
-                    if len(comments) >= self.result_limit:
-                        break
+                    # Comments can't be queried by date, so older ones are dropped here
+                    since = self._watermark(query, 'youtube')
+                    comments = self._fetch_youtube_comments(videos_found, since)[:self.result_limit]
+                
+                    if comments:
+                        print(f"YouTube API: Collected {len(comments)} comments")
                 
-                if comments:
-                    print(f"YouTube API: Collected {len(comments)} comments")
-                    return comments[:self.result_limit]
-                else:
-                    print(f"YouTube API: No comments found for query '{query}'")
+                    newest = max((c['created_at'] for c in comments), default=None)
+                    comments = self._merge_stored(query, 'youtube', comments, newest)
+                    if comments:
+                        return self._remember(query, 'youtube', comments)
+                    else:
+                        print(f"YouTube API: No comments found for query '{query}'")
             except Exception as e:
                 print(f"YouTube API error: {e}")
-                print("Falling back to mock data")
+                self._note_api_error('youtube', e)
+                print("Falling back to cached or mock data")
         
-        # Mock data fallback
-        return self._mock_youtube_data(query)
+        # Cached or mock data fallback
+        return self._fallback(query, 'youtube', self._mock_youtube_data)
+    
+    def iter_pages(self, query: str, limit: int, status: Optional[Dict[str, str]] = None,
+                   priority: int = 1, deadline: Optional[float] = None,
+                   stopped: Optional[Set[str]] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield ``(platform, page)`` pairs for up to ``limit`` items per platform
+        
+        For result limits far beyond one API call: every platform is paged
+        through on its own thread, and at most ``page_buffer`` pages wait to
+        be consumed, so memory stays bounded however large ``limit`` is.
+        Pages arrive in whatever order the platforms deliver them. There is
+        no item store or last-good merging here; a platform without API
+        credentials contributes one page of mock data.
+        
+        ``status`` gets 'ok', 'throttled' (rate limit hit before ``limit``),
+        'error' or 'timeout' per platform.
+        
+        The consumer may add platforms to ``stopped`` once it has seen enough
+        of them (see AdaptiveSampler): their pagers check it before every API
+        call and request nothing further, and pages of theirs still in the
+        buffer are skipped. When ``stopped`` is given, the buffer holds about
+        one page per platform, so little is fetched past the point where the
+        consumer decides to stop.
+        """
+        if status is None:
+            status = {}
+        generators = {
+            'twitter': self._twitter_pages,
+            'reddit': self._reddit_pages,
+            'youtube': self._youtube_pages
+        }
+        buffer = self.page_buffer
+        if stopped is None:
+            stopped = set()
+        else:
+            buffer = min(buffer, len(generators))
+        deadline = time.monotonic() + (self.page_deadline if deadline is None else deadline)
+        
+        pages = queue.Queue(maxsize=buffer)
+        stop = threading.Event()
+        
+        def offer(entry) -> bool:
+            # Blocks while the consumer is behind, which is what bounds memory
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce(platform, generate):
+            def halted():
+                return platform in stopped or stop.is_set()
+            
+            try:
+                for page in generate(query, limit, priority, status, halted):
+                    if halted():
+                        break
+                    if page and not offer((platform, page)):
+                        return
+                status.setdefault(platform, 'ok')
+            except Exception as e:
+                print(f"{platform} pager error: {e}")
+                status[platform] = 'error'
+            finally:
+                offer((platform, None))
+        
+        context = contextvars.copy_context()
+        for platform, generate in generators.items():
+            threading.Thread(
+                target=context.copy().run, args=(produce, platform, generate),
+                name=f'pager-{platform}', daemon=True
+            ).start()
+        
+        running = set(generators)
+        try:
+            while running - stopped:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise queue.Empty
+                    platform, page = pages.get(timeout=remaining)
+                except queue.Empty:
+                    for platform in running - stopped:
+                        status[platform] = 'timeout'
+                        print(f"{platform} pager stopped at the deadline")
+                    return
+                if page is None:
+                    running.discard(platform)
+                    continue
+                if platform in stopped:
+                    continue
+                metrics.ITEMS_COLLECTED.inc(len(page), platform=platform)
+                yield platform, page
+            # Stopped early by the consumer, not by a failure
+            for platform in stopped:
+                status.setdefault(platform, 'ok')
+        finally:
+            stop.set()
+    
+    def _twitter_pages(self, query: str, limit: int, priority: int, status: Dict[str, str],
+                       halted: Callable[[], bool] = lambda: False) -> Iterator[List[Dict]]:
+        """Recent-search pages of up to 100 tweets via tweepy's Paginator, until ``halted()``"""
+        if not self.twitter_client:
+            metrics.MOCK_FALLBACKS.inc(platform='twitter')
+            yield self._mock_twitter_data(query)
+            return
+        import tweepy
+        responses = iter(tweepy.Paginator(
+            self.twitter_client.search_recent_tweets,
+            query=query,
+            max_results=100,
+            tweet_fields=['created_at', 'public_metrics', 'author_id', 'lang'],
+            limit=-(-limit // 100)
+        ))
+        fetched = 0
+        while fetched < limit and not halted():
+            if not self._acquire('twitter', 1, priority):
+                status['twitter'] = 'throttled'
+                return
+            try:
+                response = next(responses)
+            except StopIteration:
+                return
+            except Exception as e:
+                self._note_api_error('twitter', e)
+                raise
+            tweets = self._parse_tweets(response.data)[:limit - fetched]
+            if not tweets:
+                return
+            fetched += len(tweets)
+            yield tweets
+    
+    def _reddit_pages(self, query: str, limit: int, priority: int, status: Dict[str, str],
+                      halted: Callable[[], bool] = lambda: False) -> Iterator[List[Dict]]:
+        """Search results in pages of 100, as praw's ListingGenerator fetches them, until ``halted()``"""
+        if not self.reddit_client:
+            metrics.MOCK_FALLBACKS.inc(platform='reddit')
+            yield self._mock_reddit_data(query)
+            return
+        submissions = iter(self.reddit_client.subreddit('all').search(query, limit=limit, time_filter='week'))
+        page = []
+        while True:
+            # The listing requests the next 100 posts when we step past the last one
+            if len(page) % 100 == 0:
+                if halted():
+                    break
+                if not self._acquire('reddit', 1, priority):
+                    status['reddit'] = 'throttled'
+                    break
+            try:
+                submission = next(submissions)
+            except StopIteration:
+                break
+            except Exception as e:
+                self._note_api_error('reddit', e)
+                raise
+            page.append(self._parse_submission(submission))
+            if len(page) == 100:
+                yield page
+                page = []
+        if page:
+            yield page
+    
+    def _youtube_pages(self, query: str, limit: int, priority: int, status: Dict[str, str],
+                       halted: Callable[[], bool] = lambda: False) -> Iterator[List[Dict]]:
+        """Comment pages for search results, following nextPageToken for both, until ``halted()``"""
+        if not self.youtube_client:
+            metrics.MOCK_FALLBACKS.inc(platform='youtube')
+            yield self._mock_youtube_data(query)
+            return
+        # Keep one popular video from using up the whole limit
+        per_video = max(100, limit // 10)
+        fetched = 0
+        search_token = None
+        try:
+            while fetched < limit and not halted():
+                if not self._acquire('youtube', 100, priority):
+                    status['youtube'] = 'throttled'
+                    return
+                search_response = self.youtube_client.search().list(
+                    q=query, part='id,snippet', type='video', maxResults=50,
+                    order='relevance', pageToken=search_token
+                ).execute(http=thread_http())
+                
+                for video in search_response.get('items', []):
+                    video_id = video['id']['videoId']
+                    video_fetched = 0
+                    comment_token = None
+                    while fetched < limit and video_fetched < per_video:
+                        if halted():
+                            return
+                        if not self._acquire('youtube', 1, priority):
+                            status['youtube'] = 'throttled'
+                            return
+                        try:
+                            comment_response = self.youtube_client.commentThreads().list(
+                                part='snippet', videoId=video_id, maxResults=100,
+                                order='relevance', pageToken=comment_token
+                            ).execute(http=thread_http())
+                        except Exception as e:
+                            # Some videos may have comments disabled
+                            print(f"YouTube API: Could not fetch comments for video {video_id}: {e}")
+                            break
+                        comments = self._parse_youtube_comments(
+                            comment_response, video_id, video['snippet']['title']
+                        )[:min(limit - fetched, per_video - video_fetched)]
+                        if comments:
+                            fetched += len(comments)
+                            video_fetched += len(comments)
+                            yield comments
+                        comment_token = comment_response.get('nextPageToken')
+                        if not comment_token:
+                            break
+                    if fetched >= limit:
+                        return
+                
+                search_token = search_response.get('nextPageToken')
+                if not search_token:
+                    return
+        except Exception as e:
+            self._note_api_error('youtube', e)
+            raise
+    
+    def _acquire(self, platform: str, cost: float, priority: int) -> bool:
+        """Take rate-limit tokens for an API call; False means serve cached data"""
+        if self.rate_limiter is None:
+            return True
+        if self.rate_limiter.acquire(platform, cost, priority):
+            return True
+        print(f"{platform} API throttled, serving cached data")
+        return False
+    
+    def _allow(self, platform: str) -> bool:
+        """Whether the platform's circuit lets an API call through; False means serve cached data"""
+        if self.breakers[platform].allow():
+            return True
+        metrics.SHORT_CIRCUITS.inc(platform=platform)
+        print(f"{platform} circuit open, serving cached data")
+        return False
+    
+    @contextmanager
+    def _guarded(self, platform: str):
+        """Report the outcome and duration of the wrapped API calls to the platform's breaker"""
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            # Cancelled and timed-out calls count as failures too
+            self.breakers[platform].record(False, time.monotonic() - started)
+            raise
+        self.breakers[platform].record(True, time.monotonic() - started)
+    
+    def _hedged_search(self, platform: str, cost: float, priority: int, call: Callable):
+        """Run ``call``, racing a second attempt if the first is slower than usual
+        
+        Once enough calls have been timed, an attempt still running after
+        the ``hedge_percentile`` of recent latencies gets a second one, if
+        the rate limiter has tokens for it right away. The first successful
+        result wins and the other attempt's is dropped; an error is only
+        raised if both attempts failed.
+        """
+        latency = self._search_latency
+        
+        def attempt():
+            started = time.monotonic()
+            result = call()
+            latency.add(time.monotonic() - started)
+            return result
+        
+        delay = latency.percentile(self.hedge_percentile) if self.hedge_percentile else None
+        if delay is None:
+            return attempt()
+        
+        first = self._hedge_executor.submit(contextvars.copy_context().run, attempt)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire(platform, cost, priority):
+            return first.result()
+        metrics.HEDGED_REQUESTS.inc(platform=platform)
+        second = self._hedge_executor.submit(contextvars.copy_context().run, attempt)
+        
+        done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+        if all(future.exception() is not None for future in done) and pending:
+            done |= wait(pending)[0]
+        for future in (first, second):
+            if future in done and future.exception() is None:
+                return future.result()
+        return first.result()
+    
+    def _note_api_error(self, platform: str, error: Exception):
+        """Back off a platform if ``error`` is a rate-limit response"""
+        if self.rate_limiter is None:
+            return
+        retry_after = rate_limit_retry_after(error)
+        if retry_after is not None:
+            self.rate_limiter.throttle(platform, retry_after or None)
+    
+    def _remember(self, query: str, platform: str, items: List[Dict]) -> List[Dict]:
+        """Keep the latest live results per query for throttled or failed calls"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_success(platform)
+        key = (platform, ' '.join(query.lower().split()))
+        with self._last_good_lock:
+            self._last_good[key] = items
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > self.max_last_good:
+                self._last_good.popitem(last=False)
+        return items
+    
+    def _fallback(self, query: str, platform: str, mock: Callable[[str], List[Dict]]) -> List[Dict]:
+        """Stored or last good live items for the query, mock data only as a last resort"""
+        if self.item_store is not None:
+            stored = self.item_store.recent(query, platform, self.result_limit)
+            if stored:
+                return stored
+        with self._last_good_lock:
+            items = self._last_good.get((platform, ' '.join(query.lower().split())))
+        if items:
+            return items
+        metrics.MOCK_FALLBACKS.inc(platform=platform)
+        return mock(query)
+    
+    def _watermark(self, query: str, platform: str) -> Optional[str]:
+        """High-water mark of the last fetch for this query, if items are stored"""
+        if self.item_store is None:
+            return None
+        return self.item_store.watermark(query, platform)
+    
+    def _twitter_since_id(self, query: str) -> Optional[str]:
+        """The Twitter watermark as a since_id, unless it is too old for recent search"""
+        since_id = self._watermark(query, 'twitter')
+        # An hour's margin so it doesn't expire between here and the request
+        if since_id and time.time() - tweet_timestamp(since_id) > TWITTER_SEARCH_WINDOW - 3600:
+            return None
+        return since_id
+    
+    def _merge_stored(self, query: str, platform: str, new_items: List[Dict], watermark) -> List[Dict]:
+        """Append freshly fetched items to the store and return the newest stored ones"""
+        if self.item_store is None:
+            return new_items
+        if new_items:
+            self.item_store.add(query, platform, new_items, watermark)
+        return self.item_store.recent(query, platform, self.result_limit)
+    
+    def _fetch_youtube_comments(self, videos: List[Dict], since: Optional[str] = None) -> List[Dict]:
+        """Fetch comment threads for several videos concurrently
+        
+        Results are concatenated in video order, exactly like the serial loop,
+        and outstanding requests are cancelled once the videos fetched so far
+        already cover result_limit comments.
+        """
+        if not videos:
+            return []
+        
+        per_video = min(20, self.result_limit // len(videos))
+        futures = [
+            self._comment_executor.submit(self._fetch_video_comments, item, per_video, since)
+            for item in videos
+        ]
+        
+        by_video = [None] * len(videos)
+        index = {future: i for i, future in enumerate(futures)}
+        pending = set(futures)
+        prefix = 0       # number of leading videos with results in hand
+        prefix_count = 0  # comments in those leading videos
+        
+        while pending and prefix_count < self.result_limit:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                by_video[index[future]] = future.result()
+            while prefix < len(videos) and by_video[prefix] is not None:
+                prefix_count += len(by_video[prefix])
+                prefix += 1
+        
+        for future in pending:
+            future.cancel()
+        
+        comments = []
+        for video_comments in by_video[:prefix]:
+            comments.extend(video_comments)
+        return comments
+    
+    def _fetch_video_comments(self, item: Dict, max_results: int, since: Optional[str] = None) -> List[Dict]:
+        """Fetch comment threads for a single video, optionally only those published after ``since``"""
+        video_id = item['id']['videoId']
+        video_title = item['snippet']['title']
+        
+        try:
+            comment_response = self.youtube_client.commentThreads().list(
+                part='snippet',
+                videoId=video_id,
+                maxResults=max_results,
+                order='relevance'
+            ).execute(http=thread_http())
+        except Exception as e:
+            # Some videos may have comments disabled
+            print(f"YouTube API: Could not fetch comments for video {video_id}: {e}")
+            return []
+        
+        return self._parse_youtube_comments(comment_response, video_id, video_title, since)
+    
+    @classmethod
+    def _parse_tweets(cls, tweets) -> List[Dict]:
+        """Turn tweets into collected items: tweepy Tweet objects or v2 API JSON"""
+        return [cls._tweet_item(tweet if isinstance(tweet, dict) else tweet.data) for tweet in tweets or []]
+    
+    @staticmethod
+    def _tweet_item(tweet: Dict) -> Dict:
+        """A collected item from a tweet as the v2 API returns it"""
+        public_metrics = tweet.get('public_metrics') or {}
+        return {
+            'text': tweet['text'],
+            'created_at': tweet.get('created_at', ''),
+            'id': str(tweet['id']),
+            'lang': tweet.get('lang', 'en'),
+            'retweet_count': public_metrics.get('retweet_count', 0),
+            'like_count': public_metrics.get('like_count', 0),
+        }
+    
+    @classmethod
+    def _parse_submission(cls, submission) -> Dict:
+        """Turn a praw Submission into a collected item"""
+        return cls._submission_item({
+            'title': submission.title,
+            'selftext': submission.selftext,
+            'created_utc': submission.created_utc,
+            'id': submission.id,
+            'subreddit': submission.subreddit.display_name,
+            'score': submission.score,
+            'permalink': submission.permalink
+        })
+    
+    @staticmethod
+    def _submission_item(submission: Dict) -> Dict:
+        """A collected item from a submission as Reddit's listing JSON has it"""
+        # Combine title and selftext
+        text = f"{submission['title']}"
+        if submission.get('selftext'):
+            text += f" {submission['selftext']}"
+        
+        return {
+            'text': text[:500],  # Limit text length
+            'created_at': str(submission['created_utc']),
+            'id': submission['id'],
+            'subreddit': submission['subreddit'],
+            'score': submission['score'],
+            'url': f"https://reddit.com{submission['permalink']}"
+        }
+    
+    @staticmethod
+    def _parse_youtube_comments(comment_response: Dict, video_id: str, video_title: str,
+                                since: Optional[str] = None) -> List[Dict]:
+        """Turn a commentThreads response into collected items"""
+        comments = []
+        for comment_item in comment_response.get('items', []):
+            comment = comment_item['snippet']['topLevelComment']['snippet']
+            if since and comment['publishedAt'] <= since:
+                continue
+            comments.append({
+                'text': comment['textDisplay'],
+                'created_at': comment['publishedAt'],
+                'id': comment_item['id'],
+                'video_id': video_id,
+                'video_title': video_title,
+                'video_url': f"https://www.youtube.com/watch?v={video_id}",
+                'like_count': comment.get('likeCount', 0)
+            })
+        return comments
     
     def _mock_twitter_data(self, query: str) -> List[Dict]:
         """Generate mock Twitter data"""
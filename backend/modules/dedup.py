@@ -0,0 +1,140 @@
+import hashlib
+import re
+from typing import FrozenSet, List, Tuple
+
+import numpy as np
+
+# Words per shingle: texts are compared as sets of overlapping word pairs,
+# so the same words in another order (e.g. "not good ... bad" against
+# "not bad ... good") don't look alike
+SHINGLE = 2
+
+# MinHash signature length, split into LSH bands of ROWS values. Texts whose
+# shingle sets have Jaccard similarity s share a band with probability
+# 1 - (1 - s**ROWS)**BANDS: about 0.99 at s=0.8, 0.5 at s=0.6
+PERMUTATIONS = 32
+ROWS = 4
+BANDS = PERMUTATIONS // ROWS
+
+# Groups compared per LSH bucket; bounds the work for very repetitive inputs
+MAX_CANDIDATES = 8
+
+# Texts per vectorized MinHash chunk, to bound the temporary arrays
+CHUNK_SIZE = 1000
+
+
+class Deduplicator:
+    """Groups exact and near-duplicate texts (retweets, copy-pasted comments)
+
+    Texts are normalized (case, punctuation, URLs, mentions, "RT" prefixes)
+    and grouped by exact match first. Texts with at least ``min_tokens``
+    tokens are then merged into an earlier group when the Jaccard similarity
+    of their word-pair shingle sets is at least ``threshold``. MinHash signatures with
+    LSH banding find the candidate groups, so each text is only compared
+    with the few groups it is likely to match. The first text of each group
+    is its representative.
+    """
+
+    _NOISE = re.compile(r'^rt\s+@\w+:?|https?://\S+|@\w+')
+    _TOKEN = re.compile(r'\w+')
+
+    def __init__(self, threshold: float = 0.8, min_tokens: int = 4, seed: int = 0):
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: (a * x + b) mod 2**64, top 32 bits
+        self._a = rng.integers(1, 2 ** 63, PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, PERMUTATIONS, dtype=np.uint64)
+        self._shingle_hashes = {}
+
+    def normalize(self, text: str) -> str:
+        return ' '.join(self._TOKEN.findall(self._NOISE.sub(' ', text.lower())))
+
+    def shingles(self, normalized: str) -> FrozenSet[str]:
+        """Overlapping ``SHINGLE``-word runs of a normalized text; empty below ``min_tokens`` words"""
+        words = normalized.split()
+        if len(words) < self.min_tokens:
+            return frozenset()
+        return frozenset(' '.join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1))
+
+    def group(self, texts: List[str]) -> Tuple[List[int], np.ndarray]:
+        """Return ``(representatives, weights)``
+
+        ``representatives`` are indices into ``texts`` in their original
+        order; ``weights[i]`` is how many texts representative ``i`` stands for.
+        """
+        representatives, groups = self.assign(texts)
+        return representatives, np.bincount(groups, minlength=len(representatives)).astype(np.int64)
+
+    def assign(self, texts: List[str]) -> Tuple[List[int], np.ndarray]:
+        """Return ``(representatives, groups)``: like ``group``, but ``groups[j]`` is the group of text ``j``"""
+        representatives = []
+        groups = np.empty(len(texts), dtype=np.intp)
+        exact = {}          # normalized text -> group
+        buckets = {}        # (band, band signature) -> groups
+        shingle_sets = []   # shingle set per group, None for short texts
+
+        normalized = [self.normalize(text) for text in texts]
+        shingles = [self.shingles(text) for text in normalized]
+        signatures = self._signatures(shingles)
+
+        for i, norm in enumerate(normalized):
+            group = exact.get(norm)
+            bands = None
+            if group is None and signatures[i] is not None:
+                bands = [(band, signatures[i][band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+                group = self._find_similar(shingles[i], bands, buckets, shingle_sets)
+            if group is None:
+                group = len(representatives)
+                representatives.append(i)
+                shingle_sets.append(shingles[i] if bands else None)
+                for band in bands or ():
+                    buckets.setdefault(band, []).append(group)
+            exact.setdefault(norm, group)
+            groups[i] = group
+
+        return representatives, groups
+
+    def _find_similar(self, shingles: FrozenSet[str], bands: list, buckets: dict, shingle_sets: list):
+        checked = set()
+        size = len(shingles)
+        for band in bands:
+            # Newest groups first, and only the most recent few per bucket
+            for group in reversed(buckets.get(band, ())[-MAX_CANDIDATES:]):
+                if group in checked:
+                    continue
+                checked.add(group)
+                other = shingle_sets[group]
+                # Jaccard can't reach the threshold if the sizes differ too much
+                if min(size, len(other)) < self.threshold * max(size, len(other)):
+                    continue
+                if len(shingles & other) >= self.threshold * len(shingles | other):
+                    return group
+        return None
+
+    def _signatures(self, shingle_sets: List[FrozenSet[str]]) -> list:
+        """MinHash signature per shingle set (None for empty ones), vectorized in chunks"""
+        signatures = [None] * len(shingle_sets)
+        eligible = [i for i, shingles in enumerate(shingle_sets) if shingles]
+
+        for start in range(0, len(eligible), CHUNK_SIZE):
+            chunk = eligible[start:start + CHUNK_SIZE]
+            hashes = np.array(
+                [self._shingle_hash(shingle) for i in chunk for shingle in shingle_sets[i]], dtype=np.uint64
+            )
+            offsets = np.cumsum([0] + [len(shingle_sets[i]) for i in chunk[:-1]])
+            # Overflow is the point: the products wrap mod 2**64
+            with np.errstate(over='ignore'):
+                permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+            for i, signature in zip(chunk, np.minimum.reduceat(permuted, offsets, axis=0)):
+                signatures[i] = signature
+        return signatures
+
+    def _shingle_hash(self, shingle: str) -> int:
+        value = self._shingle_hashes.get(shingle)
+        if value is None:
+            if len(self._shingle_hashes) > 200000:
+                self._shingle_hashes.clear()
+            value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+            self._shingle_hashes[shingle] = value
+        return value
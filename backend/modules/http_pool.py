@@ -0,0 +1,48 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict
+
+# Keep-alive pool sizes for the per-platform HTTP sessions
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))
+
+_thread_local = threading.local()
+
+
+def pooled_session():
+    """A requests.Session with a tuned keep-alive connection pool
+
+    ``pool_maxsize`` should be at least the number of threads that call the
+    same host at once, otherwise extra connections are opened and dropped
+    instead of reused. Retries are left to the rate limiter.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def thread_http():
+    """This thread's httplib2 connection for googleapiclient requests
+
+    httplib2.Http is not thread-safe, so each thread keeps its own, which
+    also keeps the TLS connection alive across that thread's requests.
+    """
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        from googleapiclient.http import build_http
+        http = _thread_local.http = build_http()
+    return http
+
+
+@lru_cache(maxsize=None)
+def discovery_document(service: str, version: str) -> Dict:
+    """Parsed discovery document shipped with googleapiclient, loaded once per process"""
+    from googleapiclient import discovery_cache
+    return json.loads(discovery_cache.get_static_doc(service, version))
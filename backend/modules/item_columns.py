@@ -0,0 +1,123 @@
+from array import array
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .keywords import KeywordExtractor
+
+LABEL_NAMES = ('negative', 'neutral', 'positive')
+LABEL_CODES = {name: code for code, name in enumerate(LABEL_NAMES, start=-1)}
+
+
+class ItemColumns:
+    """Scored items of one platform, stored column-wise
+
+    Keeps the texts, a compact label code and compound score per item, and
+    references to the collected item dicts for their remaining fields. Item
+    dicts in the API shape are only built for the rows that are actually
+    sent, via ``to_dicts``. When duplicates were grouped, ``weights`` holds
+    how many collected items each row stands for and ``members`` the
+    collected items themselves, representative first. ``index`` maps each token
+    to the rows it occurs in (see KeywordExtractor.count), so keyword
+    filters cost O(matches) instead of a scan over every text.
+    """
+
+    __slots__ = ('texts', 'label_codes', 'scores', 'sources', 'weights', 'index', 'members', '_lowered')
+
+    def __init__(self, texts: List[str], label_codes: np.ndarray, scores: np.ndarray, sources: List[Dict],
+                 weights: Optional[np.ndarray] = None, index: Optional[Dict[str, array]] = None,
+                 members: Optional[List[List[Dict]]] = None):
+        self.texts = texts
+        self.label_codes = label_codes.astype(np.int8, copy=False)
+        self.scores = scores
+        self.sources = sources
+        self.weights = weights
+        self.index = index
+        self.members = members
+        self._lowered = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getstate__(self):
+        return self.texts, self.label_codes, self.scores, self.sources, self.weights, self.index, self.members
+
+    def __setstate__(self, state):
+        self.texts, self.label_codes, self.scores, self.sources, self.weights, self.index, self.members = state
+        self._lowered = None
+
+    def group(self, index: int) -> List[Dict]:
+        """The collected items a row stands for"""
+        return self.members[index] if self.members is not None else [self.sources[index]]
+
+    def row(self, index: int, max_text: Optional[int] = None) -> Dict:
+        """One item as a dict: text, sentiment, score, then the collected fields"""
+        text = self.texts[index]
+        row = {
+            'text': text[:max_text] if max_text else text,
+            'sentiment': LABEL_NAMES[self.label_codes[index] + 1],
+            'score': float(self.scores[index]),
+            **{k: v for k, v in self.sources[index].items() if k != 'text'}
+        }
+        if self.weights is not None:
+            row['duplicates'] = int(self.weights[index]) - 1
+        return row
+
+    def to_dicts(self, indices: Optional[Sequence[int]] = None, max_text: Optional[int] = None) -> List[Dict]:
+        """Rows as dicts, all of them or just ``indices``"""
+        if indices is None:
+            indices = range(len(self))
+        return [self.row(i, max_text) for i in indices]
+
+    def matches(self, keyword: str) -> np.ndarray:
+        """Ascending indices of rows containing ``keyword`` as whole words
+
+        Looked up in the token index: a single word is one posting list, a
+        phrase intersects its words' lists and checks word order on those
+        rows only. Without an index the texts are scanned for the substring.
+        """
+        if self.index is None:
+            if self._lowered is None:
+                self._lowered = [text.lower() for text in self.texts]
+            needle = keyword.lower()
+            return np.flatnonzero(np.fromiter((needle in text for text in self._lowered), dtype=bool, count=len(self)))
+
+        tokens = KeywordExtractor.tokenize(keyword)
+        postings = [self.index.get(token) for token in tokens]
+        if not tokens or any(p is None for p in postings):
+            return np.empty(0, dtype=np.intp)
+        rows = np.frombuffer(postings[0], dtype=np.uint32)
+        for other in postings[1:]:
+            rows = np.intersect1d(rows, np.frombuffer(other, dtype=np.uint32), assume_unique=True)
+        rows = rows.astype(np.intp)
+        if len(tokens) > 1:
+            phrase = f" {' '.join(tokens)} "
+            in_order = [phrase in f" {' '.join(KeywordExtractor.tokenize(self.texts[i]))} " for i in rows]
+            rows = rows[np.array(in_order, dtype=bool)]
+        return rows
+
+    def select(self, keyword: Union[str, Sequence[str], None] = None, sentiment: Optional[str] = None) -> np.ndarray:
+        """Indices of rows containing ``keyword`` (any of them, if several) that have ``sentiment``"""
+        code = None
+        if sentiment:
+            code = LABEL_CODES.get(sentiment)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+        if not keyword:
+            if code is None:
+                return np.arange(len(self))
+            return np.flatnonzero(self.label_codes == code)
+
+        keywords = [keyword] if isinstance(keyword, str) else keyword
+        rows = self.matches(keywords[0])
+        for other in keywords[1:]:
+            rows = np.union1d(rows, self.matches(other))
+        if code is not None:
+            rows = rows[self.label_codes[rows] == code]
+        return rows
+
+    def sentiment_counts(self, indices: np.ndarray) -> Dict[str, int]:
+        """Positive, neutral and negative counts over ``indices``, duplicates included"""
+        weights = self.weights[indices] if self.weights is not None else None
+        tally = np.bincount(self.label_codes[indices] + 1, weights=weights, minlength=3)
+        return {'positive': int(tally[2]), 'neutral': int(tally[1]), 'negative': int(tally[0])}
@@ -0,0 +1,106 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def item_timestamp(platform: str, created_at: str) -> float:
+    """Epoch seconds for a collected item's ``created_at`` (0 if unparseable)"""
+    try:
+        if platform == 'reddit':
+            return float(created_at)
+        return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ItemStore:
+    """Append-only SQLite store of collected items with per-query high-water marks
+
+    Items are keyed by ``(platform, item id)`` and linked to every query that
+    returned them. The high-water mark is the newest thing seen for a query on
+    a platform (tweet id, Reddit ``created_utc``, YouTube ``publishedAt``), so
+    the next collection only has to ask for what came after it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS items (
+                platform TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                created_ts REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (platform, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS query_items (
+                query_key TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                PRIMARY KEY (query_key, platform, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS watermarks (
+                query_key TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (query_key, platform)
+            );
+        ''')
+        self._db.commit()
+
+    @staticmethod
+    def query_key(query: str) -> str:
+        return ' '.join(query.lower().split())
+
+    def watermark(self, query: str, platform: str) -> Optional[str]:
+        """Newest value seen for this query on this platform, if any"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value FROM watermarks WHERE query_key = ? AND platform = ?',
+                (self.query_key(query), platform)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, query: str, platform: str, items: List[Dict], watermark: Optional[str] = None):
+        """Append new items for a query and advance its high-water mark"""
+        key = self.query_key(query)
+        with self._lock:
+            try:
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?)',
+                    [
+                        (platform, item['id'], item_timestamp(platform, item.get('created_at')), json.dumps(item))
+                        for item in items
+                    ]
+                )
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO query_items VALUES (?, ?, ?)',
+                    [(key, platform, item['id']) for item in items]
+                )
+                if watermark is not None:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)',
+                        (key, platform, str(watermark), time.time())
+                    )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                print(f"Item store: write for '{query}' on {platform} failed: {e}")
+
+    def recent(self, query: str, platform: str, limit: int) -> List[Dict]:
+        """Newest stored items for a query on a platform"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT i.payload FROM query_items q '
+                'JOIN items i ON i.platform = q.platform AND i.item_id = q.item_id '
+                'WHERE q.query_key = ? AND q.platform = ? '
+                'ORDER BY i.created_ts DESC LIMIT ?',
+                (self.query_key(query), platform, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
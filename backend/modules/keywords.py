@@ -0,0 +1,78 @@
+import re
+from array import array
+from collections import Counter
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Common stop words
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should',
+    'could', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
+    'i', 'you', 'he', 'she', 'it', 'we', 'they', 'my', 'your', 'his', 'her',
+    'its', 'our', 'their', 'me', 'him', 'us', 'them', 'what', 'which', 'who',
+    'when', 'where', 'why', 'how', 'all', 'each', 'every', 'both', 'few',
+    'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only',
+    'own', 'same', 'so', 'than', 'too', 'very', 'just', 'now'
+})
+
+
+class KeywordExtractor:
+    """Counts keywords and two-word phrases in one pass over each text
+
+    A keyword is a lowercased token of more than ``min_length`` characters
+    that is not a stop word. A phrase is two keywords that are adjacent in
+    the original text, e.g. "battery life".
+    """
+
+    _PUNCTUATION = re.compile(r'[^\w\s]')
+
+    def __init__(self, stop_words: frozenset = STOP_WORDS, min_length: int = 3):
+        self.stop_words = stop_words
+        self.min_length = min_length
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Lowercase, strip punctuation and split on whitespace"""
+        return cls._PUNCTUATION.sub('', text.lower()).split()
+
+    def is_keyword(self, token: str) -> bool:
+        return len(token) > self.min_length and token not in self.stop_words
+
+    def count(self, texts: Iterable[str], weights: Optional[Iterable[int]] = None,
+              index: Optional[Dict[str, array]] = None) -> Tuple[Counter, Counter]:
+        """Return ``(keyword_counts, phrase_counts)`` for ``texts``
+
+        With ``weights``, each text counts as that many occurrences. With
+        ``index``, every token (stop words included) is also mapped to the
+        ascending positions of the texts it occurs in, from the same
+        tokenization pass.
+        """
+        words = Counter()
+        phrases = Counter()
+        is_keyword = self.is_keyword
+
+        for position, (text, weight) in enumerate(zip(texts, weights if weights is not None else repeat(1))):
+            previous = None
+            for token in self.tokenize(text):
+                if index is not None:
+                    postings = index.get(token)
+                    if postings is None:
+                        index[token] = array('I', (position,))
+                    elif postings[-1] != position:
+                        postings.append(position)
+                if is_keyword(token):
+                    words[token] += weight
+                    if previous is not None:
+                        phrases[f'{previous} {token}'] += weight
+                    previous = token
+                else:
+                    previous = None
+
+        return words, phrases
+
+    @staticmethod
+    def top(counts: Counter, n: int) -> List[str]:
+        """The ``n`` most frequent entries, most frequent first"""
+        return [word for word, count in counts.most_common(n)]
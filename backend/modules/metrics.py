@@ -0,0 +1,155 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Prometheus-style counter with labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(labels)} {value}')
+        return lines
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels"""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    bucket_labels = _format_labels(labels, 'le="%s"' % bound)
+                    lines.append(f'{self.name}_bucket{bucket_labels} {count}')
+                inf_labels = _format_labels(labels, 'le="+Inf"')
+                lines.append(f'{self.name}_bucket{inf_labels} {series[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {series[-2]}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {series[-1]}')
+        return lines
+
+
+STAGE_SECONDS = Histogram('fab_stage_duration_seconds', 'Time spent in each stage of the analysis pipeline')
+REQUEST_SECONDS = Histogram('fab_request_duration_seconds', 'End-to-end request latency by endpoint')
+ITEMS_COLLECTED = Counter('fab_items_collected_total', 'Items returned by each platform collector')
+MOCK_FALLBACKS = Counter('fab_mock_fallbacks_total', 'Collections that fell back to mock data')
+SHORT_CIRCUITS = Counter('fab_circuit_short_circuits_total', 'API calls skipped because the circuit was open')
+HEDGED_REQUESTS = Counter('fab_hedged_requests_total', 'Second attempts sent for slow API calls')
+
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, ITEMS_COLLECTED, MOCK_FALLBACKS, SHORT_CIRCUITS, HEDGED_REQUESTS]
+
+
+def render(gauges: Optional[Dict[str, Dict]] = None) -> str:
+    """Prometheus text exposition of all metrics
+
+    ``gauges`` maps a metric prefix to a stats dict (e.g. cache counters);
+    its numeric values are exported as ``<prefix>_<key>``.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for prefix, stats in (gauges or {}).items():
+        for key, value in sorted(stats.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestTimings:
+    """Stage durations collected while serving one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans = {}  # name -> seconds, summed if a stage runs more than once
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self._spans[name] = self._spans.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """Durations in milliseconds"""
+        with self._lock:
+            return {name: round(seconds * 1000, 2) for name, seconds in self._spans.items()}
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header"""
+        spans = self.as_dict()
+        spans['total'] = round((time.perf_counter() - self.started) * 1000, 2)
+        return ', '.join(f'{name};dur={duration}' for name, duration in spans.items())
+
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+def start_request() -> RequestTimings:
+    """Begin collecting timings for the current request"""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def span(stage: str, platform: Optional[str] = None):
+    """Time a pipeline stage into the stage histogram and the current request's timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        labels = {'stage': stage}
+        if platform:
+            labels['platform'] = platform
+        STAGE_SECONDS.observe(elapsed, **labels)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(f'{stage}.{platform}' if platform else stage, elapsed)
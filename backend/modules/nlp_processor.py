@@ -1,16 +1,71 @@
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from collections import Counter
-import re
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+import numpy as np
+
+from .sentiment_cache import SentimentCache
+from .sentiment_engine import SentimentBatch, SentimentEngine, shared_analyzer
+from .keywords import KeywordExtractor
+from .item_columns import ItemColumns
+from .dedup import Deduplicator
+from .adaptive_sampler import AdaptiveSampler
+from .online_stats import RunningSentiment, TopK
+from . import metrics
 
 class NLPProcessor:
     """Processes text data with NLP: sentiment analysis and keyword extraction"""
     
-    def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+    def __init__(self, sentiment_cache: Optional[SentimentCache] = None, processes: int = 0,
+                 dedup: Optional[Deduplicator] = None):
+        self.analyzer = shared_analyzer()
+        self.sentiment_cache = sentiment_cache
+        self.engine = SentimentEngine(self.analyzer, cache=sentiment_cache, processes=processes)
+        self.keywords = KeywordExtractor()
+        self.dedup = dedup
+    
+    def process(self, data: Dict[str, List[Dict]], query: str, prepared: Optional[Dict[str, Tuple]] = None) -> Dict:
+        """Process all collected data and return analysis results
+        
+        ``prepared`` holds the platforms' grouped and scored items from
+        ``prepare_batch``; without it they are grouped and scored here.
+        """
+        for name, results in self.process_iter(data.items(), query, prepared):
+            pass
+        return results
+    
+    def prepare_batch(self, datasets: Dict[str, Dict[str, List[Dict]]]) -> Dict[str, Dict[str, Tuple]]:
+        """Group and score the items of several collections in one batched pass
+        
+        Returns the ``prepared`` argument of ``process`` per collection. Only
+        the representatives dedup keeps are scored, and a text appearing in
+        several collections is scored once.
+        """
+        grouped = {
+            key: {platform: self._group(platform, items) for platform, items in data.items() if items}
+            for key, data in datasets.items()
+        }
+        texts = list(dict.fromkeys(
+            text for platforms in grouped.values() for group in platforms.values() for text in group[1]
+        ))
+        with metrics.span('sentiment'):
+            batch = self.engine.score_batch(texts)
+        rows = np.column_stack([batch.pos, batch.neu, batch.neg, batch.compound])
+        position = {text: i for i, text in enumerate(texts)}
+        return {
+            key: {
+                platform: (group, SentimentBatch(rows[[position[text] for text in group[1]]]))
+                for platform, group in platforms.items()
+            }
+            for key, platforms in grouped.items()
+        }
     
-    def process(self, data: Dict[str, List[Dict]], query: str) -> Dict:
-        """Process all collected data and return analysis results"""
+    def process_iter(self, platform_items: Iterable[Tuple[str, List[Dict]]], query: str,
+                     prepared: Optional[Dict[str, Tuple]] = None) -> Iterator[Tuple[str, Dict]]:
+        """Process platforms as they arrive
+        
+        Yields ``(platform, platform_result)`` for each platform with items,
+        then ``('combined', results)`` with the full analysis.
+        """
         results = {
             'query': query,
             'platforms': {},
@@ -19,130 +74,189 @@ class NLPProcessor:
                 'sentiment_counts': {'positive': 0, 'neutral': 0, 'negative': 0},
                 'sentiment_scores': {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0},
                 'top_keywords': [],
+                'top_phrases': [],
                 'summary': ''
             },
             'timestamp': None
         }
+        # Full keyword frequencies, merged across platforms
+        word_counts = Counter()
+        phrase_counts = Counter()
         
         # Process each platform
-        for platform, items in data.items():
+        for platform, items in platform_items:
             if items:
-                platform_result = self._process_platform(platform, items)
+                with metrics.span('process', platform):
+                    platform_result, (words, phrases) = self._process_platform(
+                        platform, items, (prepared or {}).get(platform)
+                    )
                 results['platforms'][platform] = platform_result
                 results['combined']['total_items'] += len(items)
+                word_counts.update(words)
+                phrase_counts.update(phrases)
+                yield platform, platform_result
         
-        # Calculate combined statistics
-        self._calculate_combined(results)
+        # Calculate combined statistics and the summary
+        with metrics.span('combined'):
+            self._calculate_combined(results, word_counts, phrase_counts)
+            results['combined']['summary'] = self._generate_summary(results, query)
         
-        # Generate summary
-        results['combined']['summary'] = self._generate_summary(results, query)
+        yield 'combined', results
+    
+    def _group(self, platform: str, items: List[Dict]) -> Tuple[List[Dict], List[str], Optional[np.ndarray], Optional[List[List[Dict]]]]:
+        """Items with text, reduced to dedup representatives: ``(items, texts, weights, members)``"""
+        scored_items = [item for item in items if item.get('text')]
+        all_text = [item['text'] for item in scored_items]
         
-        return results
+        # Retweets and near-duplicate comments are scored once, through one
+        # representative that counts as many times as its group is large
+        weights = members = None
+        if self.dedup is not None:
+            with metrics.span('dedup', platform):
+                representatives, groups = self.dedup.assign(all_text)
+            weights = np.bincount(groups, minlength=len(representatives))
+            # Every collected item is kept with its group, e.g. for the trend store
+            members = [[] for _ in representatives]
+            for item, group in zip(scored_items, groups.tolist()):
+                members[group].append(item)
+            scored_items = [scored_items[i] for i in representatives]
+            all_text = [all_text[i] for i in representatives]
+        return scored_items, all_text, weights, members
     
-    def _process_platform(self, platform: str, items: List[Dict]) -> Dict:
-        """Process data from a single platform"""
-        sentiments = []
-        all_text = []
-        
-        for item in items:
-            text = item.get('text', '')
-            if text:
-                all_text.append(text)
-                sentiment = self.analyzer.polarity_scores(text)
-                sentiments.append(sentiment)
-        
-        # Count sentiments
-        pos_count = sum(1 for s in sentiments if s['compound'] > 0.05)
-        neu_count = sum(1 for s in sentiments if -0.05 <= s['compound'] <= 0.05)
-        neg_count = sum(1 for s in sentiments if s['compound'] < -0.05)
-        
-        # Calculate average scores
-        avg_positive = sum(s['pos'] for s in sentiments) / len(sentiments) if sentiments else 0
-        avg_neutral = sum(s['neu'] for s in sentiments) / len(sentiments) if sentiments else 0
-        avg_negative = sum(s['neg'] for s in sentiments) / len(sentiments) if sentiments else 0
-        
-        # Extract keywords
-        keywords = self._extract_keywords(' '.join(all_text))
-        
-        # Get sample items with sentiment (for display)
-        sample_items = []
-        for i, item in enumerate(items[:5]):  # Top 5 samples
-            if i < len(sentiments):
-                sentiment_label = self._get_sentiment_label(sentiments[i]['compound'])
-                sample_items.append({
-                    'text': item.get('text', '')[:200],  # Truncate long text
-                    'sentiment': sentiment_label,
-                    'score': sentiments[i]['compound'],
-                    **{k: v for k, v in item.items() if k != 'text'}
-                })
-        
-        # Get all items with sentiment (for keyword filtering)
-        all_items = []
-        for i, item in enumerate(items):
-            if i < len(sentiments):
-                sentiment_label = self._get_sentiment_label(sentiments[i]['compound'])
-                all_items.append({
-                    'text': item.get('text', ''),
-                    'sentiment': sentiment_label,
-                    'score': sentiments[i]['compound'],
-                    **{k: v for k, v in item.items() if k != 'text'}
-                })
+    def _process_platform(self, platform: str, items: List[Dict],
+                          prepared: Optional[Tuple] = None) -> Tuple[Dict, Tuple[Counter, Counter]]:
+        """Process data from a single platform
         
-        return {
+        Returns the platform result and its ``(keyword, phrase)`` counters.
+        ``prepared`` is the platform's entry from ``prepare_batch``.
+        """
+        if prepared is None:
+            group = self._group(platform, items)
+            # One batched scoring call, then vectorized counts and averages
+            with metrics.span('sentiment', platform):
+                batch = self.engine.score_batch(group[1])
+        else:
+            group, batch = prepared
+        scored_items, all_text, weights, members = group
+        counts = batch.counts(weights)
+        averages = batch.means(weights)
+        
+        # Extract keywords, indexing which items each token occurs in
+        index = {}
+        with metrics.span('keywords', platform):
+            words, phrases = self._extract_keywords(all_text, weights, index)
+        
+        # All items with sentiment (for keyword filtering), kept column-wise;
+        # dicts are built only for the rows a response includes
+        columns = ItemColumns(all_text, batch.label_codes(), batch.compound, scored_items, weights, index, members)
+        
+        platform_result = {
             'total': len(items),
-            'sentiment_counts': {
-                'positive': pos_count,
-                'neutral': neu_count,
-                'negative': neg_count
-            },
+            'sentiment_counts': counts,
             'sentiment_scores': {
-                'positive': round(avg_positive, 3),
-                'neutral': round(avg_neutral, 3),
-                'negative': round(avg_negative, 3)
+                'positive': round(averages['positive'], 3),
+                'neutral': round(averages['neutral'], 3),
+                'negative': round(averages['negative'], 3)
             },
-            'top_keywords': keywords[:10],
-            'sample_items': sample_items,
-            'all_items': all_items  # Include all items for filtering
+            'top_keywords': self.keywords.top(words, 10),
+            'top_phrases': self.keywords.top(phrases, 5),
+            'sample_items': columns.to_dicts(range(min(5, len(columns))), max_text=200),  # Top 5 samples
+            'all_items': columns
         }
+        return platform_result, (words, phrases)
     
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract keywords from text"""
-        # Simple keyword extraction: remove common words and get frequent terms
-        # Remove special characters and convert to lowercase
-        text = re.sub(r'[^\w\s]', '', text.lower())
-        
-        # Common stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should',
-            'could', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
-            'i', 'you', 'he', 'she', 'it', 'we', 'they', 'my', 'your', 'his', 'her',
-            'its', 'our', 'their', 'me', 'him', 'us', 'them', 'what', 'which', 'who',
-            'when', 'where', 'why', 'how', 'all', 'each', 'every', 'both', 'few',
-            'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only',
-            'own', 'same', 'so', 'than', 'too', 'very', 'just', 'now'
-        }
+    def process_pages(self, pages: Iterable[Tuple[str, List[Dict]]], query: str,
+                      keyword_capacity: int = 2000, sample_size: int = 5,
+                      sampler: Optional[AdaptiveSampler] = None) -> Dict:
+        """Aggregate an arbitrarily long stream of item pages in bounded memory
         
-        # Split into words and filter
-        words = [w for w in text.split() if len(w) > 3 and w not in stop_words]
+        Each page is scored and folded into running counts, score sums and
+        bounded keyword/phrase counters (see TopK), then dropped. Results
+        have the same shape as ``process`` without ``all_items``; keyword
+        rankings are approximate once more than ``keyword_capacity``
+        distinct keywords have been seen. A ``sampler`` sees each platform's
+        running counts after every page and may stop its collection early.
+        """
+        running = {}
+        for platform, items in pages:
+            state = running.get(platform)
+            if state is None:
+                state = running[platform] = {
+                    'total': 0, 'sentiment': RunningSentiment(), 'samples': [],
+                    'words': TopK(keyword_capacity), 'phrases': TopK(keyword_capacity)
+                }
+            
+            scored_items = [item for item in items if item.get('text')]
+            texts = [item['text'] for item in scored_items]
+            weights = None
+            if self.dedup is not None:
+                representatives, weights = self.dedup.group(texts)
+                scored_items = [scored_items[i] for i in representatives]
+                texts = [texts[i] for i in representatives]
+            
+            with metrics.span('sentiment', platform):
+                batch = self.engine.score_batch(texts)
+            state['sentiment'].add(batch, weights)
+            with metrics.span('keywords', platform):
+                words, phrases = self._extract_keywords(texts, weights)
+            state['words'].update(words)
+            state['phrases'].update(phrases)
+            state['total'] += len(items)
+            if sampler is not None:
+                sampler.observe(platform, state['sentiment'])
+            
+            missing = sample_size - len(state['samples'])
+            if missing > 0:
+                columns = ItemColumns(texts, batch.label_codes(), batch.compound, scored_items, weights)
+                state['samples'].extend(columns.to_dicts(range(min(missing, len(columns))), max_text=200))
         
-        # Count frequency
-        word_counts = Counter(words)
+        results = {
+            'query': query,
+            'platforms': {},
+            'combined': {
+                'total_items': 0,
+                'sentiment_counts': {'positive': 0, 'neutral': 0, 'negative': 0},
+                'sentiment_scores': {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0},
+                'top_keywords': [],
+                'top_phrases': [],
+                'summary': ''
+            },
+            'timestamp': None
+        }
+        word_counts = Counter()
+        phrase_counts = Counter()
+        for platform, state in running.items():
+            averages = state['sentiment'].means()
+            results['platforms'][platform] = {
+                'total': state['total'],
+                'sentiment_counts': state['sentiment'].counts(),
+                'sentiment_scores': {
+                    'positive': round(averages['positive'], 3),
+                    'neutral': round(averages['neutral'], 3),
+                    'negative': round(averages['negative'], 3)
+                },
+                'top_keywords': [word for word, count in state['words'].most_common(10)],
+                'top_phrases': [phrase for phrase, count in state['phrases'].most_common(5)],
+                'sample_items': state['samples']
+            }
+            results['combined']['total_items'] += state['total']
+            word_counts.update(state['words'].counts)
+            phrase_counts.update(state['phrases'].counts)
         
-        # Return top keywords
-        return [word for word, count in word_counts.most_common(20)]
+        with metrics.span('combined'):
+            self._calculate_combined(results, word_counts, phrase_counts)
+            results['combined']['summary'] = self._generate_summary(results, query)
+        return results
     
-    def _get_sentiment_label(self, compound_score: float) -> str:
-        """Get sentiment label from compound score"""
-        if compound_score > 0.05:
-            return 'positive'
-        elif compound_score < -0.05:
-            return 'negative'
-        else:
-            return 'neutral'
+    def score_texts(self, texts: List[str]):
+        """Score many texts at once; returns a columnar SentimentBatch"""
+        return self.engine.score_batch(texts)
     
-    def _calculate_combined(self, results: Dict):
+    def _extract_keywords(self, texts: List[str], weights=None, index=None) -> Tuple[Counter, Counter]:
+        """Count keywords and two-word phrases across texts (optionally weighted, optionally indexing tokens)"""
+        return self.keywords.count(texts, weights.tolist() if weights is not None else None, index)
+    
+    def _calculate_combined(self, results: Dict, word_counts: Counter, phrase_counts: Counter):
         """Calculate combined statistics across all platforms"""
         total_pos = sum(p['sentiment_counts']['positive'] for p in results['platforms'].values())
         total_neu = sum(p['sentiment_counts']['neutral'] for p in results['platforms'].values())
@@ -178,15 +292,9 @@ class NLPProcessor:
                 'negative': round(avg_neg, 3)
             }
         
-        # Combine keywords from all platforms
-        all_keywords = []
-        for platform_data in results['platforms'].values():
-            all_keywords.extend(platform_data.get('top_keywords', []))
-        
-        keyword_counts = Counter(all_keywords)
-        results['combined']['top_keywords'] = [
-            word for word, count in keyword_counts.most_common(15)
-        ]
+        # Combine keywords from all platforms by their real frequencies
+        results['combined']['top_keywords'] = self.keywords.top(word_counts, 15)
+        results['combined']['top_phrases'] = self.keywords.top(phrase_counts, 10)
     
     def _generate_summary(self, results: Dict, query: str) -> str:
         """Generate a text summary of the analysis"""
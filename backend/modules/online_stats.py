@@ -0,0 +1,60 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .sentiment_engine import SentimentBatch
+
+
+class TopK:
+    """Approximate heavy-hitter counter that keeps at most ``2 * capacity`` entries
+
+    Counts are merged exactly until the table doubles in size, then cut back
+    to the ``capacity`` most frequent entries. ``error`` is the largest count
+    dropped so far, an upper bound on how much any kept count is too low.
+    """
+
+    __slots__ = ('capacity', 'counts', 'error')
+
+    def __init__(self, capacity: int = 2000):
+        self.capacity = capacity
+        self.counts = Counter()
+        self.error = 0
+
+    def update(self, counts: Counter):
+        self.counts.update(counts)
+        if len(self.counts) > 2 * self.capacity:
+            kept = self.counts.most_common(self.capacity + 1)
+            self.error = max(self.error, kept[-1][1])
+            self.counts = Counter(dict(kept[:self.capacity]))
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        return self.counts.most_common(n)
+
+
+class RunningSentiment:
+    """Label counts and pos/neu/neg sums over scored batches, in constant memory"""
+
+    __slots__ = ('tally', 'sums', 'weight')
+
+    def __init__(self):
+        self.tally = np.zeros(3, dtype=np.int64)   # negative, neutral, positive
+        self.sums = np.zeros(3)                    # pos, neu, neg
+        self.weight = 0
+
+    def add(self, batch: SentimentBatch, weights: Optional[np.ndarray] = None):
+        if not len(batch):
+            return
+        w = np.ones(len(batch)) if weights is None else weights
+        self.tally += np.bincount(batch.label_codes() + 1, weights=w, minlength=3).astype(np.int64)
+        self.sums += [float(batch.pos @ w), float(batch.neu @ w), float(batch.neg @ w)]
+        self.weight += int(w.sum())
+
+    def counts(self) -> Dict[str, int]:
+        return {'positive': int(self.tally[2]), 'neutral': int(self.tally[1]), 'negative': int(self.tally[0])}
+
+    def means(self) -> Dict[str, float]:
+        if not self.weight:
+            return {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0}
+        positive, neutral, negative = self.sums / self.weight
+        return {'positive': float(positive), 'neutral': float(neutral), 'negative': float(negative)}
@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Keys in a shared cache backend (see cache_backends)
+WATCHED_KEY = 'prewarm:watched'
+# The watch list is rewritten on every change; it should never expire
+WATCHED_TTL = 10 * 365 * 24 * 3600
+
+
+class Prewarmer:
+    """Background refresher for a registry of watched queries
+
+    Every ``interval`` seconds (plus or minus ``jitter`` as a fraction, so
+    queries don't all refresh at once) each watched query is recomputed
+    with ``refresh`` and handed to ``publish``, typically a result cache.
+
+    Every worker process runs its own Prewarmer. With a shared ``backend``
+    they keep one watch list in it (picked up every ``sync_interval``
+    seconds) and coordinate refreshes through its locks, so each query is
+    refreshed by one worker per interval. Without one, each worker has its
+    own watch list and refreshes it on its own.
+    """
+
+    def __init__(self, refresh: Callable[[str], Any], publish: Callable[[str, Any], None],
+                 interval: float = 240, jitter: float = 0.1, backend=None, sync_interval: float = 30):
+        self.refresh = refresh
+        self.publish = publish
+        self.interval = interval
+        self.jitter = jitter
+        self.backend = backend
+        self.sync_interval = sync_interval
+
+        self._due = {}  # query -> monotonic time of the next refresh
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.refreshes = 0
+        self.skipped = 0        # refreshes left to another worker
+        self.failures = 0
+        self.last_refresh = {}  # query -> wall-clock time of the last successful refresh
+
+    def watch(self, query: str):
+        """Add a query; it is refreshed right away"""
+        query = ' '.join(query.split())
+        self._update_shared(lambda watched: watched.add(query))
+        with self._lock:
+            self._due.setdefault(query, time.monotonic())
+        self._wakeup.set()
+
+    def unwatch(self, query: str) -> bool:
+        query = ' '.join(query.split())
+        shared = self._update_shared(lambda watched: watched.discard(query))
+        with self._lock:
+            self.last_refresh.pop(query, None)
+            local = self._due.pop(query, None) is not None
+        return local or (shared is not None and query in shared)
+
+    def watched(self) -> List[str]:
+        self._sync()
+        with self._lock:
+            return sorted(self._due)
+
+    def start(self):
+        """Start the background thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._loop, name='prewarmer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def status(self) -> Dict:
+        self._sync()
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'shared': self.backend is not None,
+                'interval': self.interval,
+                'watched': sorted(self._due),
+                'refreshes': self.refreshes,
+                'skipped': self.skipped,
+                'failures': self.failures,
+                'last_refresh': dict(self.last_refresh)
+            }
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._sync()
+            with self._lock:
+                now = time.monotonic()
+                due = [query for query, at in self._due.items() if at <= now]
+                next_at = min(self._due.values(), default=now + self.interval)
+
+            for query in due:
+                if self._stopped.is_set():
+                    return
+                self._refresh(query)
+
+            if not due:
+                wait = next_at - time.monotonic()
+                if self.backend is not None:
+                    # Come back in time to notice other workers' watch list changes
+                    wait = min(wait, self.sync_interval)
+                self._wakeup.wait(max(0.0, wait))
+                self._wakeup.clear()
+
+    def _refresh(self, query: str):
+        token = None
+        if self.backend is not None:
+            token, refreshed_at = self._claim(query)
+            if token is None:
+                # Another worker is refreshing it, or just did
+                with self._lock:
+                    self.skipped += 1
+                    if query in self._due:
+                        self._due[query] = time.monotonic() + max(0.0, refreshed_at + self.interval - time.time())
+                return
+
+        try:
+            self.publish(query, self.refresh(query))
+            ok = True
+        except Exception as e:
+            print(f"Prewarmer: refreshing '{query}' failed: {e}")
+            ok = False
+
+        if token is not None:
+            self._backend_call('set', f'prewarm:last:{query}', time.time(), time.time(), self.interval * 2)
+            self._backend_call('release_lock', f'prewarm:{query}', token)
+
+        delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        with self._lock:
+            if ok:
+                self.refreshes += 1
+                self.last_refresh[query] = time.time()
+            else:
+                self.failures += 1
+            if query in self._due:
+                self._due[query] = time.monotonic() + delay
+
+    def _claim(self, query: str):
+        """Take the refresh of ``query`` for this worker; ``(token, last refresh time)``
+
+        The token is None if another worker holds the refresh lock or
+        refreshed the query less than an interval (minus jitter) ago. If the
+        backend fails, this worker refreshes on its own (with an empty token).
+        """
+        try:
+            token = self.backend.acquire_lock(f'prewarm:{query}', self.interval)
+        except Exception as e:
+            print(f"Prewarmer: shared backend acquire_lock failed: {e}")
+            return '', time.time()
+        if token is None:
+            return None, time.time() - self.interval * self.jitter
+        last = self._backend_call('get', f'prewarm:last:{query}')
+        if last is not None and time.time() - last[1] < self.interval * (1 - self.jitter):
+            self._backend_call('release_lock', f'prewarm:{query}', token)
+            return None, last[1]
+        return token, time.time()
+
+    def _sync(self):
+        """Pick up queries other workers watched or unwatched through the backend"""
+        if self.backend is None:
+            return
+        entry = self._backend_call('get', WATCHED_KEY)
+        if entry is None:
+            return
+        shared = set(entry[0])
+        with self._lock:
+            now = time.monotonic()
+            for query in shared - set(self._due):
+                self._due[query] = now
+            for query in set(self._due) - shared:
+                del self._due[query]
+                self.last_refresh.pop(query, None)
+
+    def _update_shared(self, change: Callable[[set], None]) -> Optional[set]:
+        """Apply ``change`` to the shared watch list under its lock; the list before the change"""
+        if self.backend is None:
+            return None
+        deadline = time.monotonic() + 5
+        token = self._backend_call('acquire_lock', WATCHED_KEY, 5)
+        while token is None:
+            if time.monotonic() >= deadline:
+                print("Prewarmer: the shared watch list stayed locked; changing this worker's only")
+                return None
+            time.sleep(0.05)
+            token = self._backend_call('acquire_lock', WATCHED_KEY, 5)
+        try:
+            entry = self._backend_call('get', WATCHED_KEY)
+            before = set(entry[0]) if entry is not None else set()
+            watched = set(before)
+            change(watched)
+            if watched != before or entry is None:
+                self._backend_call('set', WATCHED_KEY, sorted(watched), time.time(), WATCHED_TTL)
+            return before
+        finally:
+            self._backend_call('release_lock', WATCHED_KEY, token)
+
+    def _backend_call(self, method: str, *args):
+        """Backend errors leave this worker on its own instead of stopping the refresher"""
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            print(f"Prewarmer: shared backend {method} failed: {e}")
+            return None
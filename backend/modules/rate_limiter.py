@@ -0,0 +1,213 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until ``cost`` tokens are available (after refill)"""
+        if self.tokens >= cost:
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (cost - self.tokens) / self.rate
+
+
+class _PlatformLimit:
+    """Bucket plus backoff state for one platform"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.bucket = TokenBucket(rate, capacity)
+        self.blocked_until = 0.0
+        self.failures = 0
+        self.remaining = None   # last remaining-quota signal from the API
+        self.reset_at = None    # epoch seconds when that quota resets
+        self.throttle_count = 0
+        self.waiters = []       # heap of (priority, seq)
+
+
+class RateLimitManager:
+    """Per-platform token buckets with prioritized waiting and jittered backoff
+
+    ``acquire`` queues callers per platform; lower ``priority`` values go
+    first, ties are served in arrival order. A rate-limit response from an
+    API (or a remaining-quota signal of zero) blocks the platform until its
+    reset time, or for an exponentially growing, jittered backoff.
+    """
+
+    def __init__(self, limits: Dict[str, tuple], max_wait: float = 2.0,
+                 base_backoff: float = 5.0, max_backoff: float = 900.0):
+        self.max_wait = max_wait
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._limits = {
+            platform: _PlatformLimit(rate, capacity)
+            for platform, (rate, capacity) in limits.items()
+        }
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+    def acquire(self, platform: str, cost: float = 1, priority: int = 0,
+                timeout: Optional[float] = None) -> bool:
+        """Wait for ``cost`` tokens; False if the platform stays throttled past ``timeout``"""
+        limit = self._limits.get(platform)
+        if limit is None:
+            return True
+
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        entry = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(limit.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    limit.bucket.refill(now)
+                    if limit.waiters[0] == entry:
+                        wait = max(limit.blocked_until - now, limit.bucket.wait_time(cost))
+                        if wait <= 0:
+                            limit.bucket.tokens -= cost
+                            return True
+                    elif now >= deadline:
+                        return False
+                    else:
+                        wait = deadline - now
+                    if now + wait > deadline:
+                        # Not worth waiting: we'd pass the deadline anyway
+                        return False
+                    self._cond.wait(wait)
+            finally:
+                limit.waiters.remove(entry)
+                heapq.heapify(limit.waiters)
+                self._cond.notify_all()
+
+    def try_acquire(self, platform: str, cost: float = 1, priority: int = 0) -> bool:
+        """Take ``cost`` tokens if they are available right now, without queueing or waiting
+
+        Callers already queued with the same or a lower ``priority`` value
+        keep their turn. Safe to call from an event loop: the lock is only
+        held for the bookkeeping.
+        """
+        limit = self._limits.get(platform)
+        if limit is None:
+            return True
+        with self._cond:
+            now = time.monotonic()
+            limit.bucket.refill(now)
+            if limit.waiters and limit.waiters[0][0] <= priority:
+                return False
+            if limit.blocked_until > now or limit.bucket.tokens < cost:
+                return False
+            limit.bucket.tokens -= cost
+            return True
+
+    def record_success(self, platform: str):
+        """Reset the backoff after a successful call"""
+        limit = self._limits.get(platform)
+        if limit is not None:
+            with self._cond:
+                limit.failures = 0
+
+    def throttle(self, platform: str, retry_after: Optional[float] = None):
+        """Block a platform after a rate-limit response
+
+        Uses the API's reset hint when there is one, otherwise exponential
+        backoff with full jitter.
+        """
+        limit = self._limits.get(platform)
+        if limit is None:
+            return
+        with self._cond:
+            limit.failures += 1
+            limit.throttle_count += 1
+            if retry_after is None:
+                ceiling = min(self.max_backoff, self.base_backoff * 2 ** (limit.failures - 1))
+                retry_after = random.uniform(self.base_backoff / 2, ceiling)
+            limit.blocked_until = max(limit.blocked_until, time.monotonic() + retry_after)
+            limit.bucket.tokens = min(limit.bucket.tokens, 0)
+            self._cond.notify_all()
+        print(f"{platform} rate limited, backing off for {retry_after:.0f}s")
+
+    def update_quota(self, platform: str, remaining: Optional[float], reset_at: Optional[float] = None):
+        """Record a remaining-quota signal; zero remaining blocks until ``reset_at``"""
+        limit = self._limits.get(platform)
+        if limit is None or remaining is None:
+            return
+        with self._cond:
+            limit.remaining = remaining
+            limit.reset_at = reset_at
+            limit.bucket.tokens = min(limit.bucket.tokens, remaining)
+            if remaining <= 0 and reset_at:
+                limit.blocked_until = max(limit.blocked_until, time.monotonic() + max(0.0, reset_at - time.time()))
+
+    def is_throttled(self, platform: str) -> bool:
+        limit = self._limits.get(platform)
+        return limit is not None and limit.blocked_until > time.monotonic()
+
+    def status(self) -> Dict:
+        """Throttle state per platform for the health endpoint"""
+        with self._cond:
+            now = time.monotonic()
+            report = {}
+            for platform, limit in self._limits.items():
+                limit.bucket.refill(now)
+                report[platform] = {
+                    'throttled': limit.blocked_until > now,
+                    'retry_in': round(max(0.0, limit.blocked_until - now), 1),
+                    'tokens': round(limit.bucket.tokens, 2),
+                    'capacity': limit.bucket.capacity,
+                    'queued': len(limit.waiters),
+                    'remaining_quota': limit.remaining,
+                    'throttle_count': limit.throttle_count
+                }
+            return report
+
+
+def parse_limit(value: str) -> tuple:
+    """Parse a '<tokens per minute>:<burst>' setting into (rate per second, capacity)"""
+    per_minute, burst = value.split(':')
+    return float(per_minute) / 60.0, float(burst)
+
+
+def rate_limit_retry_after(error: Exception) -> Optional[float]:
+    """If ``error`` is a rate-limit/quota response, seconds to wait (0 if unknown), else None
+
+    Works on tweepy, prawcore and googleapiclient errors without importing them.
+    """
+    name = type(error).__name__
+
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if name == 'TooManyRequests' or status == 429:
+        headers = getattr(response, 'headers', None) or {}
+        if headers.get('x-rate-limit-reset'):
+            return max(0.0, float(headers['x-rate-limit-reset']) - time.time())
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+        return 0.0
+
+    # googleapiclient's HttpError, or a raw 403 quota response from the REST API
+    if name == 'HttpError':
+        status = getattr(getattr(error, 'resp', None), 'status', None)
+        reason = str(getattr(error, 'content', b''))
+    else:
+        reason = str(getattr(response, 'text', ''))
+    if status == 429 or (status == 403 and ('quotaExceeded' in reason or 'rateLimitExceeded' in reason)):
+        return 0.0
+
+    return None
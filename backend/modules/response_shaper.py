@@ -0,0 +1,144 @@
+import base64
+import json
+from typing import Dict, Iterable, List, Optional
+
+from .item_columns import ItemColumns
+
+# Heavy per-platform fields that are only sent when asked for
+OPTIONAL_PLATFORM_FIELDS = ('all_items',)
+
+
+def shape_results(results: Dict, fields: Optional[Iterable[str]] = None,
+                  include: Iterable[str] = ()) -> Dict:
+    """Build the /analyze payload from a full (possibly cached) analysis
+
+    ``fields`` keeps only the listed top-level keys; ``platforms.<name>``
+    entries select individual per-platform fields. Optional per-platform
+    fields such as ``all_items`` are dropped unless listed in ``include``.
+    The cached analysis itself is never modified.
+    """
+    include = set(include)
+    top_fields = set()
+    platform_fields = set()
+    for field in fields or ():
+        if field.startswith('platforms.'):
+            top_fields.add('platforms')
+            platform_fields.add(field[len('platforms.'):])
+        else:
+            top_fields.add(field)
+
+    shaped = {
+        key: value for key, value in results.items()
+        if not top_fields or key in top_fields
+    }
+
+    if 'platforms' in shaped:
+        shaped['platforms'] = {
+            platform: shape_platform(data, platform_fields, include)
+            for platform, data in results['platforms'].items()
+        }
+
+    return shaped
+
+
+def shape_platform(data: Dict, fields: Iterable[str] = (), include: Iterable[str] = ()) -> Dict:
+    """Select per-platform fields, dropping optional ones not in ``include``
+
+    Column-stored items are turned into item dicts here, at the edge.
+    """
+    fields = set(fields)
+    include = set(include)
+    return {
+        key: value.to_dicts() if isinstance(value, ItemColumns) else value
+        for key, value in data.items()
+        if (not fields or key in fields)
+        and (key not in OPTIONAL_PLATFORM_FIELDS or key in include)
+    }
+
+
+def parse_list(value: Optional[str]) -> List[str]:
+    """Split a comma-separated query parameter"""
+    if not value:
+        return []
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'o': offset}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Offset encoded in a cursor; raises ValueError for malformed cursors"""
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))['o']
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def filter_items(results: Dict, platform: Optional[str] = None, keyword: Optional[str] = None,
+                 sentiment: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50) -> Dict:
+    """Page through analyzed items, optionally filtered by platform, keyword and sentiment
+
+    ``keyword`` may list several comma-separated keywords; items matching
+    any of them are returned, and ``keywords`` breaks down the sentiment of
+    each keyword's matches (ignoring the ``sentiment`` filter). Like the
+    sentiment counts, its ``total`` counts duplicates of matching items;
+    ``unique`` counts the distinct items listed.
+    """
+    offset = decode_cursor(cursor)
+    keywords = parse_list(keyword)
+
+    selections = []
+    counts = {}
+    breakdown = {
+        word: {'total': 0, 'unique': 0, 'sentiment_counts': {'positive': 0, 'neutral': 0, 'negative': 0}}
+        for word in keywords
+    }
+    # Sorted so pages are stable however the platforms finished
+    for name, data in sorted(results['platforms'].items()):
+        if platform and name != platform:
+            continue
+        columns = data.get('all_items')
+        if columns is None:
+            continue
+        for word in keywords:
+            matches = columns.matches(word)
+            sentiment_counts = columns.sentiment_counts(matches)
+            breakdown[word]['total'] += sum(sentiment_counts.values())
+            breakdown[word]['unique'] += len(matches)
+            for label, count in sentiment_counts.items():
+                breakdown[word]['sentiment_counts'][label] += count
+        indices = columns.select(keywords, sentiment)
+        if len(indices):
+            selections.append((name, columns, indices))
+            counts[name] = len(indices)
+
+    # Only the rows on this page are turned into dicts
+    total = sum(counts.values())
+    items = []
+    skip = offset
+    for name, columns, indices in selections:
+        if skip >= len(indices):
+            skip -= len(indices)
+            continue
+        for row in columns.to_dicts(indices[skip:skip + limit - len(items)].tolist()):
+            items.append({**row, 'platform': name})
+        skip = 0
+        if len(items) >= limit:
+            break
+    next_offset = offset + len(items)
+
+    return {
+        'query': results['query'],
+        'keyword': keyword,
+        'keywords': breakdown,
+        'total': total,
+        'counts': counts,
+        'items': items,
+        'next_cursor': encode_cursor(next_offset) if next_offset < total else None
+    }
@@ -0,0 +1,337 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class Lead:
+    """A caller's turn to produce a missed entry itself (see ResultCache.get_or_lead)
+
+    Exactly one of ``finish`` or ``fail`` takes effect; until then other
+    callers asking for the key wait for it. Later calls are ignored, so
+    ``fail`` can sit in a ``finally`` as a safety net.
+    """
+
+    def __init__(self, cache: 'ResultCache', key: str, flight: _Flight,
+                 cacheable: Callable[[Any], bool], token: Optional[str]):
+        self._cache = cache
+        self._key = key
+        self._flight = flight
+        self._cacheable = cacheable
+        self._token = token
+        self._done = False
+
+    def finish(self, value: Any):
+        if not self._done:
+            self._done = True
+            self._cache._complete(self._key, self._flight, value, None, self._cacheable, self._token)
+
+    def fail(self, error: Exception):
+        if not self._done:
+            self._done = True
+            self._cache._complete(self._key, self._flight, None, error, self._cacheable, self._token)
+
+
+class ResultCache:
+    """TTL + LRU cache for analysis results with single-flight deduplication
+
+    Entries are fresh for ``ttl`` seconds. For a further ``stale_ttl`` seconds
+    they are still served, while one background refresh brings them up to
+    date (stale-while-revalidate). Concurrent misses for the same key share a
+    single computation.
+
+    With a shared ``backend`` (see cache_backends) this in-process LRU is a
+    first level in front of it: entries computed by any worker are visible
+    to all of them, and the single-flight extends across processes through
+    the backend's locks. ``namespace`` separates caches sharing a backend.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 256, stale_ttl: float = 600,
+                 backend=None, namespace: str = 'analysis', lock_timeout: float = 60):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.backend = backend
+        self.namespace = namespace
+        self.lock_timeout = lock_timeout
+
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}            # key -> _Flight
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.shared_hits = 0
+
+    @staticmethod
+    def normalize_key(query: str) -> str:
+        """Case- and whitespace-insensitive cache key"""
+        return ' '.join(query.lower().split())
+
+    def get(self, query: str) -> Optional[Any]:
+        """Return a fresh or stale cached value without computing anything"""
+        return self.lookup(query)[0]
+
+    def lookup(self, query: str) -> Tuple[Optional[Any], str]:
+        """Like get() but also returns the state: 'hit', 'stale' or 'miss'
+
+        Unlike get_or_compute() a stale entry does not start a refresh; that
+        is left to the caller.
+        """
+        key = self.normalize_key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or self._age(entry) >= self.ttl:
+            entry = self._load_shared(key) or entry
+
+        with self._lock:
+            age = self._age(entry) if entry is not None else None
+            if age is None or age >= self.ttl + self.stale_ttl:
+                self.misses += 1
+                return None, 'miss'
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            if age < self.ttl:
+                self.hits += 1
+                return entry[0], 'hit'
+            self.stale_hits += 1
+            return entry[0], 'stale'
+
+    def put(self, query: str, value: Any):
+        """Store a value, evicting the least recently used entries if needed"""
+        key = self.normalize_key(query)
+        with self._lock:
+            self._store(key, value)
+        self._save_shared(key, value)
+
+    def get_or_compute(self, query: str, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str]:
+        """Return ``(value, state)`` where state is 'hit', 'stale' or 'miss'
+
+        ``cacheable`` decides whether a freshly computed value is stored, e.g.
+        to keep partial results out of the cache.
+        """
+        key = self.normalize_key(query)
+        value, state, flight = self._claim(key, compute, cacheable)
+        if state == 'lead':
+            self._run(key, flight, compute, cacheable)
+            return self._outcome(flight), 'miss'
+        return value, state
+
+    def get_or_lead(self, query: str, compute: Callable[[], Any],
+                    cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str, Optional[Lead]]:
+        """Like get_or_compute, but a miss nobody is computing yet is left to the caller
+
+        Returns ``(value, state, None)`` for hits, stale entries (refreshed
+        in the background with ``compute``) and misses another caller
+        produced, or ``(None, 'miss', lead)`` when the caller should produce
+        the value, e.g. while streaming it, and hand it to ``lead.finish``.
+        """
+        key = self.normalize_key(query)
+        value, state, flight = self._claim(key, compute, cacheable)
+        if state != 'lead':
+            return value, state, None
+        token, resolved = self._lead(key, flight)
+        if resolved:
+            return self._outcome(flight), 'miss', None
+        return None, 'miss', Lead(self, key, flight, cacheable, token)
+
+    def stats(self) -> Dict:
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                'backend': self.backend.stats() if self.backend is not None else None,
+                'shared_hits': self.shared_hits,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'refreshes': self.refreshes,
+                'inflight': len(self._inflight)
+            }
+
+    def _claim(self, key: str, compute: Callable[[], Any],
+               cacheable: Callable[[Any], bool]) -> Tuple[Any, str, Optional[_Flight]]:
+        """Serve a hit or stale entry, wait for a computation in progress, or register a new one
+
+        Returns ``(value, 'hit' | 'stale' | 'miss', None)``, or
+        ``(None, 'lead', flight)`` when the caller has to compute the value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or self._age(entry) >= self.ttl:
+            entry = self._load_shared(key) or entry
+
+        with self._lock:
+            if entry is not None:
+                age = self._age(entry)
+                if age < self.ttl:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], 'hit', None
+                if age < self.ttl + self.stale_ttl:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        flight = self._inflight[key] = _Flight()
+                        self.refreshes += 1
+                        threading.Thread(
+                            target=self._run, args=(key, flight, compute, cacheable),
+                            name='cache-refresh', daemon=True
+                        ).start()
+                    return entry[0], 'stale', None
+
+            self.misses += 1
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = _Flight()
+                return None, 'lead', flight
+
+        flight.event.wait()
+        return self._outcome(flight), 'miss', None
+
+    @staticmethod
+    def _outcome(flight: _Flight) -> Any:
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _run(self, key: str, flight: _Flight, compute: Callable[[], Any], cacheable: Callable[[Any], bool]):
+        """Compute a value for ``key`` and release everyone waiting on it"""
+        token, resolved = self._lead(key, flight)
+        if resolved:
+            return
+        value, error = None, None
+        try:
+            value = compute()
+        except Exception as e:
+            print(f"Result cache: computing '{key}' failed: {e}")
+            error = e
+        self._complete(key, flight, value, error, cacheable, token)
+
+    def _lead(self, key: str, flight: _Flight) -> Tuple[Optional[str], bool]:
+        """Prepare to compute ``key``; returns ``(lock token, resolved)``
+
+        With a shared backend only the worker holding the key's lock
+        computes. If another worker's result shows up instead, the flight
+        is resolved with it and ``resolved`` is True.
+        """
+        if self.backend is None:
+            return None, False
+        token, shared = self._lock_shared(key, flight)
+        if shared is None:
+            return token, False
+        flight.value = shared[0]
+        with self._lock:
+            self._store(key, shared[0], shared[1])
+            self._inflight.pop(key, None)
+        flight.event.set()
+        return None, True
+
+    def _complete(self, key: str, flight: _Flight, value: Any, error: Optional[Exception],
+                  cacheable: Callable[[Any], bool], token: Optional[str]):
+        """Store a computed value if cacheable, release the lock and wake the waiters"""
+        flight.value, flight.error = value, error
+        store = False
+        try:
+            store = error is None and cacheable(value)
+        except Exception as e:
+            print(f"Result cache: cacheable check for '{key}' failed: {e}")
+        with self._lock:
+            if store:
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        if store:
+            self._save_shared(key, value)
+        if token is not None:
+            self._backend_call('release_lock', self._shared_key(key), token)
+        flight.event.set()
+
+    def _lock_shared(self, key: str, flight: _Flight) -> Tuple[Optional[str], Optional[Tuple[Any, float]]]:
+        """Take the cross-process lock, or wait for the holder's result
+
+        Returns ``(token, None)`` when this worker should compute (token is
+        None if the lock couldn't be had in time), or ``(None, entry)`` with
+        the value another worker just stored.
+        """
+        shared_key = self._shared_key(key)
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.05
+        while True:
+            token = self._backend_call('acquire_lock', shared_key, self.lock_timeout)
+            # Either someone else is computing, or the holder may have just
+            # finished between our miss and taking the lock: check for a result
+            entry = self._load_shared(key)
+            if entry is not None and self._age(entry) < self.ttl:
+                if token is not None:
+                    self._backend_call('release_lock', shared_key, token)
+                return None, entry
+            if token is not None:
+                return token, None
+            if time.monotonic() >= deadline:
+                print(f"Result cache: gave up waiting for '{key}' in another worker")
+                return None, None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _load_shared(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Newest of the shared and local entry, as ``(value, stored_at)`` on this process' monotonic clock"""
+        if self.backend is None:
+            return None
+        shared = self._backend_call('get', self._shared_key(key))
+        if shared is None:
+            return None
+        value, stored_at = shared
+        entry = (value, time.monotonic() - (time.time() - stored_at))
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[1] >= entry[1]:
+                return current
+            self.shared_hits += 1
+            self._store(key, value, entry[1])
+        return entry
+
+    def _save_shared(self, key: str, value: Any):
+        if self.backend is not None:
+            self._backend_call('set', self._shared_key(key), value, time.time(), self.ttl + self.stale_ttl)
+
+    def _backend_call(self, method: str, *args):
+        """Backend errors degrade to a per-process cache instead of failing requests"""
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            print(f"Result cache: shared backend {method} failed: {e}")
+            return None
+
+    def _shared_key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    def _store(self, key: str, value: Any, stored_at: Optional[float] = None):
+        """Insert under the lock and enforce the LRU bound"""
+        self._entries[key] = (value, time.monotonic() if stored_at is None else stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _age(entry: Tuple[Any, float]) -> float:
+        return time.monotonic() - entry[1]
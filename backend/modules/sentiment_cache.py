@@ -0,0 +1,121 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class SentimentCache:
+    """Bounded LRU memo of VADER scores keyed by a hash of the text
+
+    With a ``path`` the scores are also written to a local SQLite file, so
+    they survive worker restarts and are shared by workers on the same host.
+    """
+
+    def __init__(self, max_entries: int = 50000, path: Optional[str] = None, max_persisted: int = 500000):
+        self.max_entries = max_entries
+        self.path = path
+        self.max_persisted = max_persisted
+
+        self._entries = OrderedDict()  # key -> scores
+        self._pending = []             # scores not yet written to disk
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS sentiment ('
+                    'key TEXT PRIMARY KEY, pos REAL, neu REAL, neg REAL, compound REAL)'
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Sentiment cache: could not open {path}: {e}")
+                self._db = None
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Content hash used as the cache key"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict[str, float]]:
+        """Return cached scores for ``text`` or None"""
+        key = self.key(text)
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return scores
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT pos, neu, neg, compound FROM sentiment WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    scores = dict(zip(('pos', 'neu', 'neg', 'compound'), row))
+                    self._remember(key, scores)
+                    self.disk_hits += 1
+                    return scores
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, scores: Dict[str, float]):
+        """Remember scores for ``text``; disk writes are buffered until flush()"""
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, scores)
+            if self._db is not None:
+                self._pending.append(
+                    (key, scores['pos'], scores['neu'], scores['neg'], scores['compound'])
+                )
+
+    def flush(self):
+        """Write buffered scores to disk and trim the table to max_persisted rows"""
+        with self._lock:
+            if self._db is None or not self._pending:
+                return
+            try:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO sentiment VALUES (?, ?, ?, ?, ?)', self._pending
+                )
+                # rowid grows with every insert, so this drops the oldest rows
+                self._db.execute(
+                    'DELETE FROM sentiment WHERE rowid <= '
+                    '(SELECT MAX(rowid) FROM sentiment) - ?', (self.max_persisted,)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Sentiment cache: write to {self.path} failed: {e}")
+            self._pending = []
+
+    def stats(self) -> Dict:
+        """Counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'persistent': self._db is not None,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+            }
+
+    def _remember(self, key: str, scores: Dict[str, float]):
+        """Insert under the lock and enforce the LRU bound"""
+        self._entries[key] = scores
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
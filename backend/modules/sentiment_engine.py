@@ -0,0 +1,165 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from .sentiment_cache import SentimentCache
+
+# VADER's conventional thresholds on the compound score
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+SCORE_FIELDS = ('pos', 'neu', 'neg', 'compound')
+
+# Analyzer shared by everything in a process; see shared_analyzer()
+_shared_analyzer = None
+_shared_lock = threading.Lock()
+
+# Analyzer owned by each process-pool child
+_worker_analyzer = None
+
+
+def shared_analyzer() -> SentimentIntensityAnalyzer:
+    """The process-wide VADER analyzer, loading the lexicons on first use
+
+    Loaded before forking (gunicorn.conf.py does this in the master), the
+    lexicon dicts are inherited by every worker and shared copy-on-write
+    instead of being parsed again in each of them. Scoring pool children
+    come from a forkserver and load their own. The raw
+    file contents VADER keeps after parsing are dropped; scoring only uses
+    the dicts.
+    """
+    global _shared_analyzer
+    with _shared_lock:
+        if _shared_analyzer is None:
+            analyzer = SentimentIntensityAnalyzer()
+            analyzer.lexicon_full_filepath = analyzer.emoji_full_filepath = ''
+            _shared_analyzer = analyzer
+        return _shared_analyzer
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = shared_analyzer()
+
+
+def _score_chunk(texts: List[str]) -> List[tuple]:
+    """Score a chunk of texts inside a pool process"""
+    return [
+        tuple(scores[field] for field in SCORE_FIELDS)
+        for scores in map(_worker_analyzer.polarity_scores, texts)
+    ]
+
+
+class SentimentBatch:
+    """Columnar VADER scores for a list of texts"""
+
+    __slots__ = ('pos', 'neu', 'neg', 'compound')
+
+    def __init__(self, rows: np.ndarray):
+        rows = rows.reshape(-1, len(SCORE_FIELDS))
+        self.pos, self.neu, self.neg, self.compound = (rows[:, i] for i in range(len(SCORE_FIELDS)))
+
+    def __len__(self) -> int:
+        return len(self.compound)
+
+    def label_codes(self) -> np.ndarray:
+        """1 for positive, 0 for neutral, -1 for negative"""
+        return (self.compound > POSITIVE_THRESHOLD).astype(np.int8) - (self.compound < NEGATIVE_THRESHOLD)
+
+    def labels(self) -> List[str]:
+        """Sentiment label per text"""
+        names = np.array(['negative', 'neutral', 'positive'])
+        return names[self.label_codes() + 1].tolist()
+
+    def counts(self, weights: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Number of positive, neutral and negative texts, each counted ``weights[i]`` times if given"""
+        tally = np.bincount(self.label_codes() + 1, weights=weights, minlength=3)
+        return {'positive': int(tally[2]), 'neutral': int(tally[1]), 'negative': int(tally[0])}
+
+    def means(self, weights: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Average pos/neu/neg scores, optionally weighted (0 for an empty batch)"""
+        if not len(self):
+            return {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0}
+        return {
+            'positive': float(np.average(self.pos, weights=weights)),
+            'neutral': float(np.average(self.neu, weights=weights)),
+            'negative': float(np.average(self.neg, weights=weights))
+        }
+
+
+class SentimentEngine:
+    """Scores lists of texts at once, using the memo and optionally a process pool
+
+    Batches with at least ``parallel_threshold`` uncached texts are split into
+    chunks and spread over ``processes`` worker processes, so large jobs are
+    not limited to one GIL-bound thread.
+    """
+
+    def __init__(self, analyzer: SentimentIntensityAnalyzer, cache: Optional[SentimentCache] = None,
+                 processes: int = 0, parallel_threshold: int = 2000, chunk_size: int = 500):
+        self.analyzer = analyzer
+        self.cache = cache
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def score_batch(self, texts: List[str]) -> SentimentBatch:
+        """Score ``texts`` and return the results as columns in input order"""
+        rows = np.empty((len(texts), len(SCORE_FIELDS)), dtype=np.float64)
+
+        # Duplicates within the batch and cached texts are scored only once
+        missing = {}
+        for i, text in enumerate(texts):
+            scores = self.cache.get(text) if self.cache is not None else None
+            if scores is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                rows[i] = [scores[field] for field in SCORE_FIELDS]
+
+        if missing:
+            unique = list(missing)
+            for text, values in zip(unique, self._score_uncached(unique)):
+                rows[missing[text]] = values
+                if self.cache is not None:
+                    self.cache.put(text, dict(zip(SCORE_FIELDS, values)))
+
+        if self.cache is not None:
+            self.cache.flush()
+
+        return SentimentBatch(rows)
+
+    def _score_uncached(self, texts: List[str]) -> List[tuple]:
+        """Run VADER in-process, or across the pool for large batches"""
+        if self.processes > 1 and len(texts) >= self.parallel_threshold:
+            chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+            rows = []
+            for chunk_rows in self._get_pool().map(_score_chunk, chunks):
+                rows.extend(chunk_rows)
+            return rows
+
+        return [
+            tuple(scores[field] for field in SCORE_FIELDS)
+            for scores in map(self.analyzer.polarity_scores, texts)
+        ]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Process pool, started on the first large batch
+
+        Children are started by a forkserver, not forked from this process:
+        by then it runs collector, prewarmer and refresh threads, and a
+        forked child could inherit a lock one of them was holding.
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('forkserver'),
+                    initializer=_init_worker
+                )
+            return self._pool
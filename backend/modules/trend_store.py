@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .item_columns import ItemColumns
+from .item_store import item_timestamp
+
+# Bucket widths in seconds
+RESOLUTIONS = {'hour': 3600, 'day': 86400}
+
+
+class TrendStore:
+    """Sentiment counts per query, platform and hour/day bucket, updated incrementally
+
+    Every analysis adds the items it has not counted before for that query
+    and platform, bucketed by the time they were posted. Repeated analyses
+    of overlapping results therefore only add what is new, and /trend reads
+    pre-aggregated rows instead of re-scoring anything.
+    """
+
+    def __init__(self, path: str = ':memory:', retention_days: float = 90):
+        self.path = path
+        self.retention = retention_days * 86400
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS trend_items (
+                query_key TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                created_ts REAL NOT NULL,
+                PRIMARY KEY (query_key, platform, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS trend_buckets (
+                query_key TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                positive INTEGER NOT NULL,
+                neutral INTEGER NOT NULL,
+                negative INTEGER NOT NULL,
+                compound_sum REAL NOT NULL,
+                PRIMARY KEY (query_key, platform, resolution, bucket_start)
+            );
+        ''')
+        self._db.commit()
+        self._last_prune = 0.0
+
+    @staticmethod
+    def query_key(query: str) -> str:
+        return ' '.join(query.lower().split())
+
+    def add(self, query: str, platform: str, columns: ItemColumns) -> int:
+        """Count the items not seen before for this query and platform; returns how many were new
+
+        Every member of a group of duplicates is counted by its own id (with
+        the group's sentiment), so a later analysis that picks a different
+        representative for the group doesn't count it again.
+        """
+        key = self.query_key(query)
+        cutoff = time.time() - self.retention
+        buckets = {}
+        added = 0
+
+        with self._lock:
+            try:
+                for i in range(len(columns)):
+                    code = int(columns.label_codes[i])
+                    score = float(columns.scores[i])
+                    for item in columns.group(i):
+                        created = item_timestamp(platform, item.get('created_at'))
+                        if not item.get('id') or created < cutoff:
+                            continue
+                        cursor = self._db.execute(
+                            'INSERT OR IGNORE INTO trend_items VALUES (?, ?, ?, ?)',
+                            (key, platform, str(item['id']), created)
+                        )
+                        if not cursor.rowcount:
+                            continue
+                        added += 1
+                        for resolution, width in RESOLUTIONS.items():
+                            tally = buckets.setdefault((resolution, int(created // width * width)), [0, 0, 0, 0.0])
+                            tally[1 - code] += 1  # positive, neutral, negative
+                            tally[3] += score
+
+                self._db.executemany(
+                    'INSERT INTO trend_buckets VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (query_key, platform, resolution, bucket_start) DO UPDATE SET '
+                    'positive = positive + excluded.positive, neutral = neutral + excluded.neutral, '
+                    'negative = negative + excluded.negative, compound_sum = compound_sum + excluded.compound_sum',
+                    [(key, platform, resolution, start, *tally) for (resolution, start), tally in buckets.items()]
+                )
+                self._prune(cutoff)
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                print(f"Trend store: update for '{query}' on {platform} failed: {e}")
+                return 0
+        return added
+
+    def series(self, query: str, resolution: str = 'hour', platform: Optional[str] = None,
+               since: Optional[float] = None) -> List[Dict]:
+        """Buckets in time order, for one platform or summed across all of them"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+
+        sql = ('SELECT bucket_start, SUM(positive), SUM(neutral), SUM(negative), SUM(compound_sum) '
+               'FROM trend_buckets WHERE query_key = ? AND resolution = ?')
+        params = [self.query_key(query), resolution]
+        if platform:
+            sql += ' AND platform = ?'
+            params.append(platform)
+        if since is not None:
+            sql += ' AND bucket_start >= ?'
+            params.append(int(since // RESOLUTIONS[resolution] * RESOLUTIONS[resolution]))
+        sql += ' GROUP BY bucket_start ORDER BY bucket_start'
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        series = []
+        for start, positive, neutral, negative, compound_sum in rows:
+            total = positive + neutral + negative
+            series.append({
+                'start': datetime.fromtimestamp(start, timezone.utc).isoformat().replace('+00:00', 'Z'),
+                'total': total,
+                'sentiment_counts': {'positive': positive, 'neutral': neutral, 'negative': negative},
+                'mean_compound': round(compound_sum / total, 3) if total else 0.0
+            })
+        return series
+
+    def platforms(self, query: str) -> List[str]:
+        """Platforms with trend data for a query"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT DISTINCT platform FROM trend_items WHERE query_key = ? ORDER BY platform',
+                (self.query_key(query),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _prune(self, cutoff: float):
+        """Drop rows past the retention window, at most once an hour (lock held)"""
+        if time.time() - self._last_prune < 3600:
+            return
+        self._last_prune = time.time()
+        self._db.execute('DELETE FROM trend_items WHERE created_ts < ?', (cutoff,))
+        self._db.execute('DELETE FROM trend_buckets WHERE bucket_start < ?', (int(cutoff),))
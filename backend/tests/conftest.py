@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend modules the way app.py does (``modules.*``)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never talk to the real APIs from tests, whatever the developer's .env says
+for name in ('TWITTER_BEARER_TOKEN', 'REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'YOUTUBE_API_KEY'):
+    os.environ.pop(name, None)
+
+# Keep the app's on-disk stores out of the source tree and fresh for each run
+os.environ['TREND_STORE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='fab-tests-'), 'trends.db')
@@ -0,0 +1,73 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from modules.adaptive_sampler import AdaptiveSampler, wilson_interval
+from modules.data_collector import DataCollector
+from modules.online_stats import RunningSentiment
+
+
+def running(negative, neutral, positive):
+    sentiment = RunningSentiment()
+    sentiment.tally = np.array([negative, neutral, positive])
+    return sentiment
+
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0, 1.96) == (0.0, 1.0)
+    low, high = wilson_interval(50, 100, 1.96)
+    assert low == pytest.approx(0.4038, abs=1e-4) and high == pytest.approx(0.5962, abs=1e-4)
+    # Never outside [0, 1], even for extreme proportions
+    assert wilson_interval(0, 10, 1.96)[0] == 0.0 and wilson_interval(10, 10, 1.96)[1] == 1.0
+
+
+def test_platform_stops_once_the_split_is_narrow_enough():
+    sampler = AdaptiveSampler(target_width=0.1, min_items=30)
+    assert not sampler.observe('reddit', running(5, 5, 10))
+    assert not sampler.observe('reddit', running(50, 50, 100))
+    assert sampler.observe('reddit', running(400, 400, 800))
+    assert sampler.stopped == {'reddit'}
+
+    sampler.observe('twitter', running(1, 1, 1))
+    report = sampler.report({'reddit': 'ok', 'twitter': 'timeout'})
+    assert report['platforms']['reddit']['stopped'] == 'confident'
+    assert report['platforms']['reddit']['target_met']
+    assert report['platforms']['twitter']['stopped'] == 'budget'
+    assert report['combined']['items'] == 1603
+
+
+class CountingReddit:
+    """Endless search results; counts the listing pages fetched"""
+
+    def __init__(self):
+        self.fetches = 0
+
+    def subreddit(self, name):
+        return self
+
+    def search(self, query, limit=100, **params):
+        for i in range(limit):
+            if i % 100 == 0:
+                self.fetches += 1
+            yield SimpleNamespace(title=f'post {i}', selftext='', created_utc=1.0, id=str(i),
+                                  subreddit=SimpleNamespace(display_name='all'), score=1, permalink='/')
+
+
+def test_stopped_platform_makes_no_further_requests(monkeypatch):
+    monkeypatch.setenv('PAGE_BUFFER', '8')
+    collector = DataCollector()
+    collector.reddit_client = reddit = CountingReddit()
+    collector.twitter_client = collector.youtube_client = None
+    stopped = set()
+    for platform, page in collector.iter_pages('phone', 5000, stopped=stopped):
+        if platform == 'reddit':
+            # A consumer slower than the API, stopping after the first page
+            time.sleep(0.2)
+            stopped.add('reddit')
+            fetched = reddit.fetches
+    time.sleep(0.2)
+    # Read-ahead is capped at one queued page per platform (plus the page
+    # waiting to be queued), and nothing is fetched once the platform stopped
+    assert fetched <= 1 + 3 + 1 and reddit.fetches == fetched
@@ -0,0 +1,47 @@
+import os
+from collections import Counter
+
+os.environ['PREWARM_ENABLED'] = 'False'
+import app as app_module  # noqa: E402
+del os.environ['PREWARM_ENABLED']
+
+app_module.data_collector.concurrent = False
+
+SHARED = 'this phone has a great battery and a sharp screen'
+
+
+def tweet(text, i):
+    return {'text': text, 'id': str(i), 'created_at': '2024-01-01T00:00:00.000Z'}
+
+
+def test_batch_scores_shared_texts_and_duplicates_once(monkeypatch):
+    collected = {
+        'batch phone': [tweet(SHARED, 1), tweet(f'RT @fan: {SHARED}', 2), tweet('battery died after a week', 3)],
+        'batch battery': [tweet(SHARED, 4), tweet('battery died after a week', 5), tweet('charges fast', 6)]
+    }
+
+    def collect_all(query, status=None, priority=0):
+        status['twitter'] = 'ok'
+        return {'twitter': collected[query]}
+
+    engine = app_module.nlp_processor.engine
+    scored = Counter()
+    polarity_scores = engine.analyzer.polarity_scores
+
+    class CountingAnalyzer:
+        def polarity_scores(self, text):
+            scored[text] += 1
+            return polarity_scores(text)
+
+    monkeypatch.setattr(app_module.data_collector, 'collect_all', collect_all)
+    monkeypatch.setattr(engine, 'analyzer', CountingAnalyzer())
+    # Without the sentiment cache, nothing scored earlier can be looked up again
+    monkeypatch.setattr(engine, 'cache', None)
+
+    response = app_module.app.test_client().post('/analyze/batch', json={'queries': list(collected)})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['errors'] == {}
+    assert scored == Counter({SHARED: 1, 'battery died after a week': 1, 'charges fast': 1})
+    # The retweet still counts towards the first query's sentiment
+    assert sum(body['results']['batch phone']['platforms']['twitter']['sentiment_counts'].values()) == 3
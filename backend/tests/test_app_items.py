@@ -0,0 +1,39 @@
+import os
+
+os.environ['PREWARM_ENABLED'] = 'False'
+import app as app_module  # noqa: E402
+del os.environ['PREWARM_ENABLED']
+
+app_module.data_collector.concurrent = False
+
+
+def test_keyword_filters_reuse_a_partial_analysis(monkeypatch):
+    real = app_module.data_collector.collect_iter
+    calls = []
+
+    def timing_out(query, status=None, priority=0):
+        calls.append(query)
+        yield from real(query, status, priority)
+        status['reddit'] = 'timeout'
+
+    monkeypatch.setattr(app_module.data_collector, 'collect_iter', timing_out)
+    client = app_module.app.test_client()
+    assert client.get('/analyze?query=items partial').get_json()['partial']
+
+    for keyword in ('battery', 'camera', 'review'):
+        response = client.get(f'/analyze/items?query=items partial&keyword={keyword}')
+        assert response.status_code == 200
+        assert response.headers['X-Cache'] == 'PARTIAL'
+    assert calls == ['items partial']
+
+
+def test_items_of_a_complete_analysis_come_from_the_analysis_cache():
+    client = app_module.app.test_client()
+    first = client.get('/analyze/items?query=items complete&platform=twitter&limit=3')
+    assert first.headers['X-Cache'] == 'MISS'
+    page = first.get_json()
+    assert len(page['items']) == 3 and page['next_cursor']
+
+    second = client.get(f"/analyze/items?query=items complete&platform=twitter&cursor={page['next_cursor']}")
+    assert second.headers['X-Cache'] == 'HIT'
+    assert len(second.get_json()['items']) == page['total'] - 3
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+
+os.environ['PREWARM_ENABLED'] = 'False'
+import app as app_module  # noqa: E402
+del os.environ['PREWARM_ENABLED']
+
+# Collect platforms one after the other so event order is predictable
+app_module.data_collector.concurrent = False
+
+
+def events(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_stream_caches_and_replays():
+    client = app_module.app.test_client()
+    first = client.get('/analyze/stream?query=stream replay')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert events(first)[-1]['event'] == 'combined'
+
+    second = client.get('/analyze/stream?query=stream replay')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert [e['event'] for e in events(second)] == ['platform'] * 3 + ['combined']
+
+
+def test_stale_stream_triggers_a_background_refresh(monkeypatch):
+    cache = app_module.analysis_cache
+    client = app_module.app.test_client()
+    client.get('/analyze/stream?query=stream stale').get_data()
+    key = cache.normalize_key('stream stale')
+    value, stored_at = cache._entries[key]
+    cache._entries[key] = (value, stored_at - cache.ttl - 1)
+
+    refreshed = threading.Event()
+    monkeypatch.setattr(app_module, 'run_analysis', lambda query, priority=0: refreshed.set() or value)
+    response = client.get('/analyze/stream?query=stream stale')
+    assert response.headers['X-Cache'] == 'STALE'
+    assert refreshed.wait(2)
+
+
+def test_concurrent_streams_share_one_collection(monkeypatch):
+    calls = []
+    real = app_module.analysis_events
+    gate = threading.Event()
+
+    def counted(query, priority=0):
+        calls.append(query)
+        gate.wait(2)
+        yield from real(query, priority)
+
+    monkeypatch.setattr(app_module, 'analysis_events', counted)
+    client = app_module.app.test_client()
+    bodies = []
+
+    def stream():
+        bodies.append(events(client.get('/analyze/stream?query=stream shared')))
+
+    threads = [threading.Thread(target=stream) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join(10)
+    assert len(calls) == 1
+    assert len(bodies) == 3 and all(body[-1]['event'] == 'combined' for body in bodies)
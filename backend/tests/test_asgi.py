@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+
+import httpx
+from starlette.testclient import TestClient
+
+os.environ['PREWARM_ENABLED'] = 'False'
+import asgi  # noqa: E402
+del os.environ['PREWARM_ENABLED']
+
+from modules.async_collector import AsyncDataCollector  # noqa: E402
+from modules.data_collector import DataCollector  # noqa: E402
+
+
+def test_cache_is_used_off_the_event_loop(monkeypatch):
+    cache = asgi.analysis_cache
+    on_loop = []
+
+    def checked(method):
+        def call(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(method.__name__)
+            except RuntimeError:
+                pass
+            return method(*args)
+        return call
+
+    for name in ('lookup', 'get', 'put'):
+        monkeypatch.setattr(cache, name, checked(getattr(cache, name)))
+    with TestClient(asgi.app) as client:
+        assert client.get('/analyze?query=asgi cache').headers['X-Cache'] == 'MISS'
+        assert client.get('/analyze?query=asgi cache').headers['X-Cache'] == 'HIT'
+        client.get('/analyze/stream?query=asgi stream')
+    assert on_loop == []
+
+
+def test_sync_and_async_collectors_parse_tweets_alike():
+    tweet = {'id': 1, 'text': 'hello', 'created_at': '2024-01-01T00:00:00.000Z',
+             'public_metrics': {'like_count': 3}}
+
+    class TweepyTweet:
+        data = tweet
+
+    assert DataCollector._parse_tweets([TweepyTweet()]) == AsyncDataCollector._parse_tweets([tweet]) == [{
+        'text': 'hello', 'created_at': '2024-01-01T00:00:00.000Z', 'id': '1', 'lang': 'en',
+        'retweet_count': 0, 'like_count': 3
+    }]
+
+
+def test_async_twitter_retries_a_rejected_since_id(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(dict(request.url.params))
+        if 'since_id' in request.url.params:
+            return httpx.Response(400, json={'title': 'Invalid Request'})
+        return httpx.Response(200, json={'data': [{'id': '2', 'text': 'fresh tweet'}]})
+
+    collector = AsyncDataCollector(http=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    collector.twitter_token = 'token'
+    monkeypatch.setattr(collector, '_twitter_since_id', lambda query: '1')
+
+    items = asyncio.run(collector.acollect_twitter('python'))
+    assert [item['text'] for item in items] == ['fresh tweet']
+    assert ['since_id' in params for params in requests] == [True, False]
+
+
+def test_async_collector_reports_to_the_health_endpoints_breakers():
+    assert asgi.async_collector.breakers is asgi.data_collector.breakers
+    assert asgi.async_collector._last_good is asgi.data_collector._last_good
+
+
+def stream_events(body):
+    return [json.loads(line) for line in body.splitlines() if line]
+
+
+def test_async_streams_of_a_miss_share_one_collection(monkeypatch):
+    collections = []
+
+    async def collect_iter(query, status=None, priority=0):
+        collections.append(query)
+        await asyncio.sleep(0.1)
+        status['reddit'] = 'ok'
+        yield 'reddit', asgi.async_collector._mock_reddit_data(query)
+
+    monkeypatch.setattr(asgi.async_collector, 'acollect_iter', collect_iter)
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.get('/analyze/stream?query=shared stream') for _ in range(3)))
+
+    responses = asyncio.run(run())
+    assert collections == ['shared stream']
+    for response in responses:
+        events = stream_events(response.text)
+        assert [event['event'] for event in events] == ['platform', 'combined']
+        assert events[-1]['data']['combined'] == stream_events(responses[0].text)[-1]['data']['combined']
+    assert asgi._inflight == {}
+
+
+def test_async_stream_refreshes_a_stale_entry(monkeypatch):
+    cached = {'query': 'stale stream', 'platforms': {}, 'combined': {'total_items': 0}}
+    refreshed = []
+    monkeypatch.setattr(asgi.analysis_cache, 'lookup', lambda query: (cached, 'stale'))
+    monkeypatch.setattr(asgi, '_start_analysis', refreshed.append)
+
+    with TestClient(asgi.app) as client:
+        response = client.get('/analyze/stream?query=stale stream')
+    assert response.headers['X-Cache'] == 'STALE'
+    assert [event['event'] for event in stream_events(response.text)] == ['combined']
+    assert refreshed == ['stale stream']
@@ -0,0 +1,14 @@
+from benchmark import StandInCollector, generate_items
+
+
+def test_stand_in_clients_go_through_the_real_collectors():
+    data = generate_items('phone', 60)
+    collector = StandInCollector(data, {'twitter': 0.0, 'reddit': 0.0, 'youtube': 0.0})
+    collected = collector.collect_all('phone')
+
+    assert [item['id'] for item in collected['twitter']] == [item['id'] for item in data['twitter']]
+    assert [item['id'] for item in collected['reddit']] == [item['id'] for item in data['reddit']]
+    # The YouTube collector only asks for a few comments from a few videos
+    assert collected['youtube']
+    assert {item['id'] for item in collected['youtube']} <= {item['id'] for item in data['youtube']}
+    assert collected['reddit'][0]['url'] == data['reddit'][0]['url']
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from modules.cache_backends import SQLiteCacheBackend, make_cache_backend
+from modules.result_cache import ResultCache
+
+
+def test_values_round_trip_and_expire(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    backend.set('a', {'items': [1, 2]}, time.time(), 60)
+    value, stored_at = backend.get('a')
+    assert value == {'items': [1, 2]} and stored_at <= time.time()
+
+    backend.set('old', 'x', time.time() - 120, 60)
+    assert backend.get('old') is None and backend.get('missing') is None
+
+
+def test_oldest_entries_are_evicted(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'), max_entries=2)
+    for i, key in enumerate('abc'):
+        backend.set(key, i, time.time() + i, 60)
+    assert backend.get('a') is None
+    assert backend.stats()['entries'] == 2
+
+
+def test_locks_are_exclusive_until_released_or_expired(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first, second = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+    token = first.acquire_lock('k', 60)
+    assert token and second.acquire_lock('k', 60) is None and second.is_locked('k')
+    # Only the holder's token releases it
+    second.release_lock('k', 'not the token')
+    assert second.is_locked('k')
+    first.release_lock('k', token)
+    assert second.acquire_lock('k', 0.05)
+    time.sleep(0.1)
+    assert first.acquire_lock('k', 60)
+
+
+def test_result_caches_in_two_processes_share_entries(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = ResultCache(backend=SQLiteCacheBackend(path))
+    second = ResultCache(backend=SQLiteCacheBackend(path))
+    calls = []
+    assert first.get_or_compute('Phone', lambda: calls.append(1) or 'result') == ('result', 'miss')
+    assert second.get_or_compute('phone', lambda: calls.append(2) or 'other') == ('result', 'hit')
+    assert calls == [1] and second.shared_hits == 1
+
+
+def test_make_cache_backend_urls(tmp_path):
+    assert make_cache_backend(None) is None
+    assert isinstance(make_cache_backend(f'sqlite:///{tmp_path}/cache.db'), SQLiteCacheBackend)
+    with pytest.raises(ValueError):
+        make_cache_backend('memcached://localhost')
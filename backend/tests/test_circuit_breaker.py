@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from modules.async_collector import AsyncDataCollector
+from modules.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyWindow
+from modules.data_collector import DataCollector
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker('twitter', failure_threshold=2, slow_call=1, open_seconds=0.05, probes=2)
+    breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+    # A slow success counts as a failure
+    breaker.record(True, 2)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.status()['open_count'] == 1 and breaker.status()['short_circuits'] == 2
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker('reddit', failure_threshold=1, open_seconds=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN and breaker.status()['open_count'] == 2
+
+
+def test_latency_window_percentile():
+    window = LatencyWindow(size=10, min_samples=5)
+    for seconds in range(4):
+        window.add(seconds)
+    assert window.percentile(50) is None
+    for seconds in range(4, 20):
+        window.add(seconds)
+    # Only the last 10 samples (10..19) are kept
+    assert window.percentile(0) == 10 and window.percentile(95) == 19
+
+
+def hedging(collector_class):
+    collector = collector_class()
+    collector.hedge_percentile = 50
+    for _ in range(20):
+        collector._search_latency.add(0.01)
+    return collector
+
+
+class InlineSecond:
+    """Runs the hedged (second) attempt inline, so both attempts are done before they are waited on"""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.calls = 0
+
+    def submit(self, fn, *args):
+        self.calls += 1
+        if self.calls == 1:
+            return self.executor.submit(fn, *args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_hedged_search_prefers_the_successful_attempt():
+    collector = hedging(DataCollector)
+    collector._hedge_executor = InlineSecond(collector._hedge_executor)
+    second_started = threading.Event()
+    attempts = []
+
+    def search():
+        attempts.append(1)
+        if len(attempts) == 1:
+            second_started.wait(1)
+            raise RuntimeError('first attempt failed')
+        second_started.set()
+        # Give the first attempt time to fail
+        time.sleep(0.05)
+        return 'ok'
+
+    assert collector._hedged_search('youtube', 100, 0, search) == 'ok'
+
+
+def test_hedged_search_raises_when_both_attempts_fail():
+    collector = hedging(DataCollector)
+
+    def search():
+        time.sleep(0.05)
+        raise RuntimeError('down')
+
+    with pytest.raises(RuntimeError):
+        collector._hedged_search('youtube', 100, 0, search)
+
+
+def test_async_hedged_search_prefers_the_successful_attempt():
+    collector = hedging(AsyncDataCollector)
+
+    async def run():
+        second_started = asyncio.Event()
+        attempts = []
+
+        async def search():
+            attempts.append(1)
+            if len(attempts) == 1:
+                await second_started.wait()
+                raise RuntimeError('first attempt failed')
+            # Finishes in the same loop iteration that wakes the first attempt
+            second_started.set()
+            return 'ok'
+
+        return await collector._ahedged_search('youtube', 100, 0, search)
+
+    assert asyncio.run(run()) == 'ok'
+
+
+def test_cancelled_call_counts_as_a_failure():
+    collector = AsyncDataCollector()
+
+    async def call():
+        with collector._guarded('twitter'):
+            await asyncio.sleep(10)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(call(), 0.01))
+    assert collector.breakers['twitter'].failures == 1
+
+
+def test_async_collector_shares_the_sync_collectors_state():
+    sync = DataCollector()
+    collector = AsyncDataCollector(shared=sync)
+    assert collector.breakers is sync.breakers
+    assert collector._search_latency is sync._search_latency
+
+    items = [{'text': 'cached', 'platform': 'reddit'}]
+    sync._remember('phone', 'reddit', items)
+    assert collector._fallback('phone', 'reddit', lambda query: []) == items
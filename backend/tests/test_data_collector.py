@@ -0,0 +1,193 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from modules.data_collector import TWITTER_EPOCH_MS, DataCollector, tweet_timestamp
+from modules.item_store import ItemStore
+
+
+def make_collector(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return DataCollector()
+
+
+def test_collect_all_keeps_platform_order(monkeypatch):
+    collector = make_collector(monkeypatch)
+    status = {}
+    data = collector.collect_all('python', status)
+    assert list(data) == ['twitter', 'reddit', 'youtube']
+    assert status == {'twitter': 'ok', 'reddit': 'ok', 'youtube': 'ok'}
+
+
+def test_slow_platform_times_out_without_blocking_the_others(monkeypatch):
+    collector = make_collector(monkeypatch, COLLECT_PLATFORM_TIMEOUT=0.3, COLLECT_DEADLINE=5)
+
+    def slow(query, priority=0):
+        time.sleep(1)
+        return [{'text': 'late'}]
+
+    monkeypatch.setattr(collector, 'collect_reddit', slow)
+    status = {}
+    started = time.monotonic()
+    data = collector.collect_all('python', status)
+    assert time.monotonic() - started < 0.9
+    assert 'reddit' not in data
+    assert status['reddit'] == 'timeout'
+    assert status['twitter'] == status['youtube'] == 'ok'
+
+
+def test_collector_error_is_reported(monkeypatch):
+    collector = make_collector(monkeypatch)
+
+    def broken(query, priority=0):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(collector, 'collect_youtube', broken)
+    status = {}
+    data = collector.collect_all('python', status)
+    assert 'youtube' not in data
+    assert status['youtube'] == 'error'
+
+
+class BadRequest(Exception):
+    """Looks like tweepy's 400 error to rejected_request"""
+
+    class response:
+        status_code = 400
+
+
+class StubTwitter:
+    """Rejects every since_id, like recent search does for ids older than 7 days"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search_recent_tweets(self, query, since_id=None, **params):
+        self.calls.append(since_id)
+        if since_id is not None:
+            raise BadRequest('since_id too old')
+        return SimpleNamespace(data=[{'id': str(snowflake(time.time())), 'text': 'fresh tweet'}])
+
+
+def snowflake(timestamp: float) -> int:
+    return (int(timestamp * 1000) - TWITTER_EPOCH_MS) << 22
+
+
+def twitter_collector(monkeypatch, watermark):
+    collector = make_collector(monkeypatch)
+    collector.item_store = ItemStore(':memory:')
+    collector.item_store.add('python', 'twitter', [], watermark=watermark)
+    collector.twitter_client = StubTwitter()
+    return collector
+
+
+def test_twitter_watermark_outside_the_search_window_is_ignored(monkeypatch):
+    collector = twitter_collector(monkeypatch, snowflake(time.time() - 8 * 24 * 3600))
+    items = collector.collect_twitter('python')
+    assert collector.twitter_client.calls == [None]
+    assert [item['text'] for item in items] == ['fresh tweet']
+
+
+def test_rejected_since_id_is_retried_without_it(monkeypatch):
+    watermark = snowflake(time.time() - 3600)
+    assert abs(tweet_timestamp(watermark) - (time.time() - 3600)) < 1
+    collector = twitter_collector(monkeypatch, watermark)
+    items = collector.collect_twitter('python')
+    assert collector.twitter_client.calls == [str(watermark), None]
+    assert [item['text'] for item in items] == ['fresh tweet']
+
+
+def test_time_queued_for_a_worker_does_not_count_against_the_timeout(monkeypatch):
+    # Two analyses need six collectors but there are only three threads
+    collector = make_collector(monkeypatch, COLLECT_MAX_WORKERS=3, COLLECT_PLATFORM_TIMEOUT=0.45, COLLECT_DEADLINE=5)
+
+    def slow(query, priority=0):
+        time.sleep(0.3)
+        return [{'text': query}]
+
+    for platform in ('twitter', 'reddit', 'youtube'):
+        monkeypatch.setattr(collector, f'collect_{platform}', slow)
+    statuses = [{}, {}]
+    threads = [
+        threading.Thread(target=collector.collect_all, args=(query, status))
+        for query, status in zip(('first', 'second'), statuses)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert statuses == [{'twitter': 'ok', 'reddit': 'ok', 'youtube': 'ok'}] * 2
+
+
+def test_queued_collectors_still_respect_the_deadline(monkeypatch):
+    collector = make_collector(monkeypatch, COLLECT_MAX_WORKERS=1, COLLECT_PLATFORM_TIMEOUT=5, COLLECT_DEADLINE=0.5)
+
+    def slow(query, priority=0):
+        time.sleep(0.3)
+        return []
+
+    for platform in ('twitter', 'reddit', 'youtube'):
+        monkeypatch.setattr(collector, f'collect_{platform}', slow)
+    status = {}
+    collector.collect_all('python', status)
+    assert status['twitter'] == 'ok'
+    assert status['youtube'] == 'timeout'
+
+
+class StubComments:
+    """commentThreads client answering after a per-video delay, tracking calls and concurrency"""
+
+    def __init__(self, delays, per_video=5):
+        self.delays = delays
+        self.per_video = per_video
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def commentThreads(self):
+        return self
+
+    def list(self, videoId, **params):
+        return SimpleNamespace(execute=lambda http=None: self._answer(videoId))
+
+    def _answer(self, video_id):
+        with self._lock:
+            self.calls.append(video_id)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delays[video_id])
+        with self._lock:
+            self.running -= 1
+        return {'items': [
+            {'id': f'{video_id}-{i}', 'snippet': {'topLevelComment': {'snippet': {
+                'textDisplay': f'{video_id} comment {i}', 'publishedAt': '2024-01-01T00:00:00Z'
+            }}}}
+            for i in range(self.per_video)
+        ]}
+
+
+def videos(count):
+    return [{'id': {'videoId': f'v{i}'}, 'snippet': {'title': f'video {i}'}} for i in range(count)]
+
+
+def test_comments_keep_video_order_when_videos_finish_out_of_order(monkeypatch):
+    collector = make_collector(monkeypatch, YOUTUBE_COMMENT_CONCURRENCY=2, RESULT_LIMIT=100)
+    # Earlier videos answer last
+    collector.youtube_client = client = StubComments({'v0': 0.15, 'v1': 0.1, 'v2': 0.05, 'v3': 0.0})
+    comments = collector._fetch_youtube_comments(videos(4))
+    assert [c['video_id'] for c in comments] == ['v0'] * 5 + ['v1'] * 5 + ['v2'] * 5 + ['v3'] * 5
+    assert [c['id'] for c in comments[:5]] == [f'v0-{i}' for i in range(5)]
+    assert client.max_running == 2
+
+
+def test_queued_comment_requests_are_cancelled_at_the_result_limit(monkeypatch):
+    collector = make_collector(monkeypatch, YOUTUBE_COMMENT_CONCURRENCY=2, RESULT_LIMIT=10)
+    collector.youtube_client = client = StubComments({f'v{i}': 0.05 for i in range(8)})
+    comments = collector._fetch_youtube_comments(videos(8))
+    # The first two videos cover the limit; at most the two requests
+    # started meanwhile ran, the rest were cancelled before starting
+    assert [c['video_id'] for c in comments[:10]] == ['v0'] * 5 + ['v1'] * 5
+    time.sleep(0.2)
+    assert len(client.calls) <= 4
@@ -0,0 +1,34 @@
+from modules.dedup import Deduplicator
+
+
+def test_retweets_and_near_duplicates_share_a_group():
+    texts = [
+        'The new phone has a great camera and battery',
+        'RT @fan: The new phone has a great camera and battery https://t.co/x',
+        'Totally unrelated post about the weather today',
+        'the NEW phone has a great camera, and battery!!',
+        'The new phone has a great camera and battery life'
+    ]
+    representatives, groups = Deduplicator().assign(texts)
+    assert representatives == [0, 2]
+    assert groups.tolist() == [0, 0, 1, 0, 0]
+
+    representatives, weights = Deduplicator().group(texts)
+    assert weights.tolist() == [4, 1]
+
+
+def test_short_texts_only_group_on_exact_matches():
+    representatives, weights = Deduplicator().group(['so good', 'So good!', 'so so good'])
+    assert representatives == [0, 2]
+    assert weights.tolist() == [2, 1]
+
+
+def test_empty_input():
+    representatives, weights = Deduplicator().group([])
+    assert representatives == [] and len(weights) == 0
+
+
+def test_reordered_words_with_opposite_sentiment_stay_apart():
+    texts = ['this phone is not good it is bad', 'this phone is not bad it is good']
+    representatives, groups = Deduplicator().assign(texts)
+    assert representatives == [0, 1]
@@ -0,0 +1,46 @@
+import threading
+
+from modules import http_pool
+from modules.data_collector import DataCollector
+
+
+def test_pooled_session_mounts_a_sized_adapter():
+    session = http_pool.pooled_session()
+    adapter = session.get_adapter('https://api.twitter.com')
+    assert adapter._pool_maxsize == http_pool.POOL_MAXSIZE
+    assert adapter.max_retries.total == 0
+
+
+def test_clients_are_created_once_on_first_use(monkeypatch):
+    collector = DataCollector()
+    created = []
+    gate = threading.Event()
+
+    def create():
+        gate.wait(1)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(collector, '_create_reddit_client', create)
+    assert collector._clients == {}
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(collector.reddit_client)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join(2)
+    assert len(created) == 1 and seen == created * 4
+
+
+def test_failed_client_init_falls_back_to_none(monkeypatch):
+    collector = DataCollector()
+
+    def broken():
+        raise RuntimeError('bad credentials')
+
+    monkeypatch.setattr(collector, '_create_youtube_client', broken)
+    assert collector.youtube_client is None
+    # Stand-ins can be set directly, e.g. in tests and benchmarks
+    collector.youtube_client = 'stand-in'
+    assert collector.youtube_client == 'stand-in'
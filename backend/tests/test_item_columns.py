@@ -0,0 +1,58 @@
+import pickle
+
+import numpy as np
+
+from modules.item_columns import ItemColumns
+from modules.keywords import KeywordExtractor
+
+
+def make_columns(texts, labels, weights=None, indexed=True):
+    index = {} if indexed else None
+    if indexed:
+        KeywordExtractor().count(texts, index=index)
+    return ItemColumns(
+        texts, np.array(labels), np.linspace(-1, 1, len(texts)),
+        [{'text': text, 'id': f'id{i}'} for i, text in enumerate(texts)],
+        weights=np.array(weights) if weights is not None else None, index=index
+    )
+
+
+TEXTS = ['Battery life is great', 'the battery died', 'Life is good', 'great screen, poor battery life']
+
+
+def test_rows_are_built_on_demand():
+    columns = make_columns(TEXTS, [1, -1, 1, 0], weights=[3, 1, 1, 1])
+    row = columns.to_dicts([0], max_text=7)[0]
+    assert row == {'text': 'Battery', 'sentiment': 'positive', 'score': -1.0, 'id': 'id0', 'duplicates': 2}
+    assert len(columns.to_dicts()) == 4
+
+
+def test_index_and_scan_agree_on_matches():
+    indexed, scanned = make_columns(TEXTS, [1, -1, 1, 0]), make_columns(TEXTS, [1, -1, 1, 0], indexed=False)
+    for keyword in ('battery', 'battery life', 'BATTERY'):
+        assert list(indexed.matches(keyword)) == list(scanned.matches(keyword))
+    assert list(indexed.matches('battery life')) == [0, 3]
+    # Rows 0 and 3 have both words, but never in this order
+    assert list(indexed.matches('life battery')) == []
+    assert list(indexed.matches('missing')) == []
+
+
+def test_select_by_keywords_and_sentiment():
+    columns = make_columns(TEXTS, [1, -1, 1, 0])
+    assert list(columns.select(['screen', 'died'])) == [1, 3]
+    assert list(columns.select('battery', 'negative')) == [1]
+    assert list(columns.select(sentiment='positive')) == [0, 2]
+    assert list(columns.select(sentiment='bogus')) == []
+
+
+def test_sentiment_counts_include_duplicates():
+    columns = make_columns(TEXTS, [1, -1, 1, 0], weights=[3, 1, 1, 1])
+    assert columns.sentiment_counts(columns.matches('battery')) == {'positive': 3, 'neutral': 1, 'negative': 1}
+
+
+def test_pickles_without_the_lowered_texts():
+    columns = make_columns(TEXTS, [1, -1, 1, 0], indexed=False)
+    columns.matches('battery')
+    copy = pickle.loads(pickle.dumps(columns))
+    assert copy._lowered is None
+    assert list(copy.matches('battery')) == [0, 1, 3]
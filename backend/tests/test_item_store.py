@@ -0,0 +1,28 @@
+from modules.item_store import ItemStore, item_timestamp
+
+
+def test_items_are_kept_per_query_newest_first():
+    store = ItemStore(':memory:')
+    store.add('Phone', 'twitter', [
+        {'id': '1', 'text': 'old', 'created_at': '2024-01-01T00:00:00Z'},
+        {'id': '2', 'text': 'new', 'created_at': '2024-01-02T00:00:00Z'}
+    ], watermark=2)
+    store.add('phone ', 'twitter', [{'id': '2', 'text': 'new', 'created_at': '2024-01-02T00:00:00Z'}])
+
+    assert [item['text'] for item in store.recent('phone', 'twitter', 10)] == ['new', 'old']
+    assert store.recent('phone', 'reddit', 10) == []
+    assert store.recent('laptop', 'twitter', 10) == []
+
+
+def test_watermark_only_moves_when_given():
+    store = ItemStore(':memory:')
+    assert store.watermark('phone', 'reddit') is None
+    store.add('phone', 'reddit', [{'id': 'a', 'created_at': 1700000000.0}], watermark=1700000000.0)
+    store.add('phone', 'reddit', [{'id': 'b', 'created_at': 1600000000.0}])
+    assert store.watermark('phone', 'reddit') == '1700000000.0'
+
+
+def test_item_timestamp_per_platform():
+    assert item_timestamp('reddit', 1700000000.0) == 1700000000.0
+    assert item_timestamp('youtube', '2024-01-01T00:00:00Z') == 1704067200.0
+    assert item_timestamp('twitter', 'garbage') == 0.0
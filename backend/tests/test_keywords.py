@@ -0,0 +1,32 @@
+from modules.keywords import KeywordExtractor
+
+
+def test_keywords_and_adjacent_phrases():
+    words, phrases = KeywordExtractor().count([
+        'The battery life is great!',
+        'Battery life could be better; the screen is great.'
+    ])
+    assert words['battery'] == 2 and words['great'] == 2
+    assert 'the' not in words and 'could' not in words
+    assert phrases['battery life'] == 2
+    # A stop word between two keywords breaks the phrase
+    assert 'screen great' not in phrases
+
+
+def test_weights_count_each_text_several_times():
+    words, phrases = KeywordExtractor().count(['battery life', 'screen'], weights=[3, 1])
+    assert words['battery'] == 3 and words['screen'] == 1
+    assert phrases['battery life'] == 3
+
+
+def test_index_maps_every_token_to_its_texts():
+    index = {}
+    KeywordExtractor().count(['the battery the battery', 'screen', 'The screen'], index=index)
+    assert list(index['battery']) == [0]
+    assert list(index['screen']) == [1, 2]
+    assert list(index['the']) == [0, 2]
+
+
+def test_top_orders_by_count():
+    words, _ = KeywordExtractor().count(['apple apple banana', 'apple banana cherry'])
+    assert KeywordExtractor.top(words, 2) == ['apple', 'banana']
@@ -0,0 +1,38 @@
+import time
+
+from modules import metrics
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    counter = metrics.Counter('test_items_total', 'Items')
+    counter.inc(2, platform='reddit')
+    counter.inc(platform='reddit')
+    assert counter.render()[-1] == 'test_items_total{platform="reddit"} 3'
+
+    histogram = metrics.Histogram('test_seconds', 'Latency', buckets=(0.1, 1.0))
+    histogram.observe(0.5, stage='nlp')
+    histogram.observe(2.0, stage='nlp')
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="nlp",le="0.1"} 0' in lines
+    assert 'test_seconds_bucket{stage="nlp",le="1.0"} 1' in lines
+    assert 'test_seconds_bucket{stage="nlp",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{stage="nlp"} 2' in lines
+
+
+def test_spans_are_added_to_the_current_request():
+    timings = metrics.start_request()
+    with metrics.span('collect', 'twitter'):
+        time.sleep(0.01)
+    with metrics.span('nlp'):
+        pass
+    spans = timings.as_dict()
+    assert set(spans) == {'collect.twitter', 'nlp'}
+    assert spans['collect.twitter'] >= 10
+    assert timings.server_timing().startswith('collect.twitter;dur=')
+    assert timings.server_timing().split(', ')[-1].startswith('total;dur=')
+
+
+def test_render_exports_numeric_gauges_only():
+    text = metrics.render({'fab_cache': {'hits': 3, 'backend': None, 'enabled': True}})
+    assert 'fab_cache_hits 3' in text
+    assert 'fab_cache_backend' not in text and 'fab_cache_enabled' not in text
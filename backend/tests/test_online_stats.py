@@ -0,0 +1,47 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from modules.nlp_processor import NLPProcessor
+from modules.online_stats import RunningSentiment, TopK
+from modules.sentiment_engine import SentimentEngine, shared_analyzer
+
+
+def test_topk_is_exact_until_it_overflows():
+    top = TopK(capacity=2)
+    top.update(Counter({'a': 5, 'b': 3}))
+    top.update(Counter({'a': 1, 'c': 2}))
+    assert top.most_common(3) == [('a', 6), ('b', 3), ('c', 2)] and top.error == 0
+
+    top.update(Counter({'d': 1, 'e': 1}))
+    assert len(top.counts) == 2 and top.most_common(2) == [('a', 6), ('b', 3)]
+    assert top.error == 2
+
+
+def test_running_sentiment_matches_one_batch():
+    engine = SentimentEngine(shared_analyzer())
+    texts = ['I love it', 'I hate it', 'It is a phone', 'Absolutely wonderful', 'Terrible battery']
+    weights = np.array([2, 1, 1, 3, 1])
+    running = RunningSentiment()
+    running.add(engine.score_batch(texts[:2]), weights[:2])
+    running.add(engine.score_batch(texts[2:]), weights[2:])
+    running.add(engine.score_batch([]))
+
+    whole = engine.score_batch(texts)
+    assert running.counts() == whole.counts(weights)
+    for label, mean in whole.means(weights).items():
+        assert running.means()[label] == pytest.approx(mean)
+
+
+def test_paged_processing_agrees_with_processing_everything():
+    items = [{'text': text, 'id': str(i)} for i, text in enumerate(
+        ['great phone', 'awful phone', 'phone battery', 'great battery life', 'awful screen'] * 4
+    )]
+    processor = NLPProcessor()
+    whole = processor.process({'reddit': items}, 'phone')
+    paged = processor.process_pages([('reddit', items[i:i + 3]) for i in range(0, len(items), 3)], 'phone')
+
+    assert paged['platforms']['reddit']['sentiment_counts'] == whole['platforms']['reddit']['sentiment_counts']
+    assert paged['combined']['sentiment_counts'] == whole['combined']['sentiment_counts']
+    assert paged['platforms']['reddit']['top_keywords'][:3] == whole['platforms']['reddit']['top_keywords'][:3]
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from modules.cache_backends import SQLiteCacheBackend
+from modules.prewarmer import Prewarmer
+
+
+def make_prewarmer(published, backend=None, interval=60):
+    return Prewarmer(
+        refresh=lambda query: f'result for {query}',
+        publish=lambda query, value: published.append((query, value)),
+        interval=interval, jitter=0.1, backend=backend
+    )
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_watched_query_is_refreshed_right_away():
+    published = []
+    prewarmer = make_prewarmer(published)
+    prewarmer.watch('  new   phone ')
+    prewarmer.start()
+    try:
+        assert wait_for(lambda: published)
+        assert published == [('new phone', 'result for new phone')]
+        assert prewarmer.status()['refreshes'] == 1
+    finally:
+        prewarmer.stop()
+    assert prewarmer.unwatch('new phone') and not prewarmer.unwatch('new phone')
+    assert prewarmer.watched() == []
+
+
+def test_workers_share_the_watch_list(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    first, second = make_prewarmer([], backend), make_prewarmer([], SQLiteCacheBackend(str(tmp_path / 'cache.db')))
+
+    first.watch('phone')
+    assert second.watched() == ['phone']
+    assert second.unwatch('phone')
+    assert first.watched() == []
+
+
+def test_only_one_worker_refreshes_a_query_per_interval(tmp_path):
+    published = []
+    workers = [make_prewarmer(published, SQLiteCacheBackend(str(tmp_path / 'cache.db'))) for _ in range(3)]
+    for worker in workers:
+        worker.watch('phone')
+    threads = [threading.Thread(target=worker._refresh, args=('phone',)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(published) == 1
+    assert sum(worker.skipped for worker in workers) == 2
+    # The others come back when the query is next due, not right away
+    assert all(worker._due['phone'] > time.monotonic() + 30 for worker in workers)
@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from modules.rate_limiter import RateLimitManager, parse_limit, rate_limit_retry_after
+
+
+def test_bucket_allows_a_burst_then_refuses():
+    limiter = RateLimitManager({'twitter': (0.0, 2)}, max_wait=0.05)
+    assert limiter.acquire('twitter') and limiter.acquire('twitter')
+    assert not limiter.acquire('twitter')
+    # Platforms without a limit are never held back
+    assert limiter.acquire('reddit')
+
+
+def test_throttle_blocks_until_retry_after():
+    limiter = RateLimitManager({'youtube': (100.0, 5)}, max_wait=0.05)
+    limiter.throttle('youtube', retry_after=0.2)
+    assert limiter.is_throttled('youtube')
+    assert not limiter.acquire('youtube')
+    assert limiter.acquire('youtube', timeout=1)
+    assert limiter.status()['youtube']['throttle_count'] == 1
+
+
+def test_zero_remaining_quota_blocks_until_reset():
+    limiter = RateLimitManager({'twitter': (100.0, 5)})
+    limiter.update_quota('twitter', 0, time.time() + 60)
+    assert limiter.is_throttled('twitter')
+    assert limiter.status()['twitter']['remaining_quota'] == 0
+
+
+def test_waiters_are_served_by_priority():
+    limiter = RateLimitManager({'reddit': (10.0, 1)}, max_wait=2)
+    assert limiter.acquire('reddit')
+    order = []
+
+    def waiter(priority):
+        limiter.acquire('reddit', priority=priority)
+        order.append(priority)
+
+    threads = [threading.Thread(target=waiter, args=(p,)) for p in (1, 0)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(2)
+    assert order == [0, 1]
+
+
+def test_parse_limit_and_retry_after():
+    assert parse_limit('60:10') == (1.0, 10.0)
+    too_many = type('TooManyRequests', (Exception,), {})()
+    too_many.response = SimpleNamespace(status_code=429, headers={'retry-after': '7'})
+    assert rate_limit_retry_after(too_many) == 7.0
+    assert rate_limit_retry_after(RuntimeError('boom')) is None
+
+
+def test_queued_waiter_gives_up_at_its_deadline():
+    limiter = RateLimitManager({'reddit': (1.0, 1)})
+    assert limiter.acquire('reddit')
+    # The head of the queue waits about a second for its token
+    head = threading.Thread(target=limiter.acquire, args=('reddit',), kwargs={'timeout': 2})
+    head.start()
+    time.sleep(0.05)
+
+    for timeout in (0.2, 0):
+        started, cpu = time.monotonic(), time.process_time()
+        assert not limiter.acquire('reddit', priority=1, timeout=timeout)
+        assert time.monotonic() - started < timeout + 0.1
+        # Waiting, not spinning
+        assert time.process_time() - cpu < 0.1
+    head.join(2)
+
+
+def test_try_acquire_never_waits():
+    limiter = RateLimitManager({'youtube': (1.0, 2)})
+    assert limiter.try_acquire('youtube')
+    assert not limiter.try_acquire('youtube', cost=2)
+    assert limiter.try_acquire('reddit')
+
+    # A caller waiting at the head of the queue keeps its turn
+    assert limiter.acquire('youtube')
+    head = threading.Thread(target=limiter.acquire, args=('youtube',), kwargs={'timeout': 2})
+    head.start()
+    time.sleep(0.05)
+    started, cpu = time.monotonic(), time.process_time()
+    assert not limiter.try_acquire('youtube')
+    assert time.monotonic() - started < 0.05 and time.process_time() - cpu < 0.05
+    head.join(2)
+
+    limiter.throttle('youtube', retry_after=60)
+    assert not limiter.try_acquire('youtube')
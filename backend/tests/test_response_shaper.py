@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from modules.item_columns import ItemColumns
+from modules.response_shaper import decode_cursor, encode_cursor, filter_items, shape_results
+
+
+def columns(texts, labels):
+    return ItemColumns(
+        texts, np.array(labels), np.zeros(len(texts)),
+        [{'text': text, 'id': str(i)} for i, text in enumerate(texts)]
+    )
+
+
+def results():
+    return {
+        'query': 'phone',
+        'combined': {'total_items': 3},
+        'platforms': {
+            'twitter': {'total_items': 2, 'all_items': columns(['great battery', 'bad screen'], [1, -1])},
+            'reddit': {'total_items': 1, 'all_items': columns(['battery died'], [-1])}
+        }
+    }
+
+
+def test_shape_results_selects_fields_and_drops_items_by_default():
+    shaped = shape_results(results(), fields=['query', 'platforms.total_items'])
+    assert set(shaped) == {'query', 'platforms'}
+    assert shaped['platforms']['twitter'] == {'total_items': 2}
+
+    full = shape_results(results(), include=['all_items'])
+    assert full['platforms']['reddit']['all_items'][0]['text'] == 'battery died'
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) == 0
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
+
+
+def test_filter_items_pages_across_platforms():
+    first = filter_items(results(), limit=2)
+    assert first['total'] == 3 and first['counts'] == {'reddit': 1, 'twitter': 2}
+    assert [item['platform'] for item in first['items']] == ['reddit', 'twitter']
+    rest = filter_items(results(), cursor=first['next_cursor'], limit=2)
+    assert [item['text'] for item in rest['items']] == ['bad screen']
+    assert rest['next_cursor'] is None
+
+
+def test_filter_items_by_keyword_and_sentiment():
+    page = filter_items(results(), keyword='battery', sentiment='negative')
+    assert [item['text'] for item in page['items']] == ['battery died']
+    assert page['keywords']['battery']['sentiment_counts'] == {'positive': 1, 'neutral': 0, 'negative': 1}
+
+
+def test_keyword_breakdown_counts_duplicates_like_the_sentiment_counts():
+    data = results()
+    data['platforms']['reddit']['all_items'].weights = np.array([3])
+    breakdown = filter_items(data, keyword='battery')['keywords']['battery']
+    assert breakdown['sentiment_counts'] == {'positive': 1, 'neutral': 0, 'negative': 3}
+    assert breakdown['total'] == 4 and breakdown['unique'] == 2
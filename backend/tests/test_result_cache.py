@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from modules.result_cache import ResultCache
+
+
+def backdate(cache, query, seconds):
+    """Make an entry look ``seconds`` older than it is"""
+    key = cache.normalize_key(query)
+    value, stored_at = cache._entries[key]
+    cache._entries[key] = (value, stored_at - seconds)
+
+
+def test_keys_are_normalized():
+    cache = ResultCache()
+    cache.put('  iPhone   16 ', 1)
+    assert cache.lookup('iphone 16') == (1, 'hit')
+
+
+def test_fresh_stale_and_expired_entries():
+    cache = ResultCache(ttl=10, stale_ttl=20)
+    cache.put('q', 'value')
+    assert cache.lookup('q') == ('value', 'hit')
+    backdate(cache, 'q', 15)
+    assert cache.lookup('q') == ('value', 'stale')
+    backdate(cache, 'q', 20)
+    assert cache.lookup('q') == (None, 'miss')
+
+
+def test_lru_bound_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return 'value'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute('q', compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [('value', 'miss')] * 5
+
+
+def test_stale_entry_is_served_while_refreshing_in_background():
+    cache = ResultCache(ttl=10, stale_ttl=20)
+    cache.put('q', 'old')
+    backdate(cache, 'q', 15)
+    refreshed = threading.Event()
+
+    def compute():
+        refreshed.set()
+        return 'new'
+
+    assert cache.get_or_compute('q', compute) == ('old', 'stale')
+    assert refreshed.wait(2)
+    for _ in range(50):
+        if cache.get('q') == 'new':
+            break
+        time.sleep(0.02)
+    assert cache.lookup('q') == ('new', 'hit')
+
+
+def test_uncacheable_results_and_errors_are_not_stored():
+    cache = ResultCache()
+    assert cache.get_or_compute('q', lambda: {'partial': True}, cacheable=lambda r: not r['partial'])[1] == 'miss'
+    assert cache.get('q') is None
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('other', fail)
+    assert cache.stats()['inflight'] == 0
+
+
+def test_get_or_lead_lets_one_caller_produce_and_the_others_wait():
+    cache = ResultCache()
+    value, state, lead = cache.get_or_lead('q', lambda: 'computed')
+    assert (value, state) == (None, 'miss') and lead is not None
+
+    waiter = []
+    thread = threading.Thread(target=lambda: waiter.append(cache.get_or_lead('q', lambda: 'computed')))
+    thread.start()
+    time.sleep(0.1)
+    assert not waiter
+    lead.finish('streamed')
+    thread.join(2)
+    assert waiter == [('streamed', 'miss', None)]
+    assert cache.lookup('q') == ('streamed', 'hit')
+
+
+def test_failed_lead_releases_waiters_and_later_calls_are_ignored():
+    cache = ResultCache()
+    _, _, lead = cache.get_or_lead('q', lambda: 'computed')
+    errors = []
+
+    def wait():
+        try:
+            cache.get_or_lead('q', lambda: 'computed')
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    time.sleep(0.1)
+    lead.fail(RuntimeError('interrupted'))
+    lead.finish('too late')
+    thread.join(2)
+    assert errors == ['interrupted']
+    assert cache.get('q') is None
+    assert cache.get_or_lead('q', lambda: 'computed')[2] is not None
+
+
+def test_get_or_lead_refreshes_stale_entries():
+    cache = ResultCache(ttl=10, stale_ttl=20)
+    cache.put('q', 'old')
+    backdate(cache, 'q', 15)
+    assert cache.get_or_lead('q', lambda: 'new') == ('old', 'stale', None)
+    for _ in range(50):
+        if cache.lookup('q') == ('new', 'hit'):
+            break
+        time.sleep(0.02)
+    assert cache.lookup('q') == ('new', 'hit')
@@ -0,0 +1,31 @@
+from modules.sentiment_cache import SentimentCache
+
+SCORES = {'pos': 0.5, 'neu': 0.5, 'neg': 0.0, 'compound': 0.6}
+
+
+def test_memo_hit_and_miss():
+    cache = SentimentCache(max_entries=10)
+    assert cache.get('great phone') is None
+    cache.put('great phone', SCORES)
+    assert cache.get('great phone') == SCORES
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+
+def test_lru_bound():
+    cache = SentimentCache(max_entries=2)
+    for text in ('a', 'b', 'c'):
+        cache.put(text, SCORES)
+    assert cache.get('a') is None
+    assert cache.get('c') == SCORES
+
+
+def test_scores_survive_in_the_sqlite_file(tmp_path):
+    path = str(tmp_path / 'sentiment.db')
+    cache = SentimentCache(path=path)
+    cache.put('great phone', SCORES)
+    cache.flush()
+
+    reopened = SentimentCache(path=path)
+    assert reopened.get('great phone') == SCORES
+    assert reopened.stats()['disk_hits'] == 1
@@ -0,0 +1,49 @@
+import numpy as np
+
+from modules.nlp_processor import NLPProcessor
+from modules.sentiment_engine import SentimentEngine, SentimentBatch, shared_analyzer
+
+TEXTS = ['I love this phone', 'Terrible battery, awful support', 'It arrived on Tuesday'] * 20
+
+
+def test_batch_matches_vader_and_labels():
+    analyzer = shared_analyzer()
+    batch = SentimentEngine(analyzer).score_batch(TEXTS)
+    expected = [analyzer.polarity_scores(text)['compound'] for text in TEXTS]
+    assert np.allclose(batch.compound, expected)
+    assert batch.labels()[:3] == ['positive', 'negative', 'neutral']
+    assert batch.counts() == {'positive': 20, 'neutral': 20, 'negative': 20}
+
+
+def test_weighted_counts():
+    batch = SentimentEngine(shared_analyzer()).score_batch(TEXTS[:3])
+    assert batch.counts(np.array([3, 1, 2])) == {'positive': 3, 'neutral': 2, 'negative': 1}
+
+
+def test_process_pool_gives_the_same_scores():
+    analyzer = shared_analyzer()
+    engine = SentimentEngine(analyzer, processes=2, parallel_threshold=10, chunk_size=7)
+    try:
+        pooled = engine.score_batch([f'{text} {i}' for i, text in enumerate(TEXTS)])
+        assert engine._pool._mp_context.get_start_method() == 'forkserver'
+    finally:
+        engine._pool.shutdown()
+    inline = SentimentEngine(analyzer).score_batch([f'{text} {i}' for i, text in enumerate(TEXTS)])
+    assert np.array_equal(pooled.compound, inline.compound)
+
+
+def test_empty_batch():
+    batch = SentimentBatch(np.empty((0, 4)))
+    assert len(batch) == 0
+    assert batch.means() == {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0}
+
+
+def test_shared_analyzer_is_loaded_once_without_the_raw_files():
+    analyzer = shared_analyzer()
+    assert shared_analyzer() is analyzer
+    assert analyzer.lexicon_full_filepath == analyzer.emoji_full_filepath == ''
+    assert analyzer.lexicon['love'] > 0
+
+
+def test_processors_share_the_analyzer():
+    assert NLPProcessor().engine.analyzer is NLPProcessor().engine.analyzer is shared_analyzer()
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from modules.dedup import Deduplicator
+from modules.item_columns import ItemColumns
+from modules.nlp_processor import NLPProcessor
+from modules.trend_store import TrendStore
+
+
+def iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def columns(items, labels, scores=None):
+    return ItemColumns(
+        [item['text'] for item in items], np.array(labels),
+        np.array(scores if scores is not None else [0.5] * len(items)), items
+    )
+
+
+HOUR = 3600 * (int(time.time()) // 3600 - 2)
+
+
+def test_items_are_bucketed_by_posting_time_and_counted_once():
+    store = TrendStore()
+    items = [
+        {'id': '1', 'text': 'good', 'created_at': iso(HOUR + 60)},
+        {'id': '2', 'text': 'bad', 'created_at': iso(HOUR + 120)},
+        {'id': '3', 'text': 'fine', 'created_at': iso(HOUR + 3600)}
+    ]
+    assert store.add('Phone', 'twitter', columns(items, [1, -1, 0], [0.6, -0.4, 0.0])) == 3
+    # A later analysis overlapping the first only adds what is new
+    assert store.add('phone', 'twitter', columns(items[:2], [1, -1])) == 0
+
+    series = store.series('phone', 'hour')
+    assert [bucket['total'] for bucket in series] == [2, 1]
+    assert series[0]['sentiment_counts'] == {'positive': 1, 'neutral': 0, 'negative': 1}
+    assert series[0]['mean_compound'] == 0.1
+    assert store.series('phone', 'day', platform='reddit') == []
+    assert store.platforms('phone') == ['twitter']
+
+
+def test_items_past_retention_are_ignored():
+    store = TrendStore(retention_days=1)
+    old = {'id': 'old', 'text': 'ancient', 'created_at': iso(time.time() - 3 * 86400)}
+    assert store.add('phone', 'twitter', columns([old], [1])) == 0
+
+
+def test_duplicate_groups_are_counted_once_per_member():
+    # Three copies of one tweet; the second analysis only sees two of them,
+    # so its group has a different representative
+    tweets = [
+        {'id': str(i), 'text': f'RT @user{i}: the new phone is great', 'created_at': iso(HOUR + i)}
+        for i in range(3)
+    ]
+    processor = NLPProcessor(dedup=Deduplicator())
+    store = TrendStore()
+    for batch in (tweets, tweets[1:]):
+        result = processor.process({'twitter': batch}, 'phone')['platforms']['twitter']
+        store.add('phone', 'twitter', result['all_items'])
+
+    assert [bucket['total'] for bucket in store.series('phone', 'hour')] == [3]
+
+
+def test_workers_sharing_the_file_count_items_once(tmp_path):
+    # Two gunicorn workers open the same default file
+    first, second = TrendStore(str(tmp_path / 'trends.db')), TrendStore(str(tmp_path / 'trends.db'))
+    items = [{'id': '1', 'text': 'good', 'created_at': iso(HOUR + 60)}]
+    assert first.add('phone', 'twitter', columns(items, [1])) == 1
+    assert second.add('phone', 'twitter', columns(items, [1])) == 0
+    assert second.series('phone', 'hour') == first.series('phone', 'hour')
+    assert [bucket['total'] for bucket in second.series('phone', 'hour')] == [1]
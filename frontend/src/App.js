@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import {
   Chart as ChartJS,
   ArcElement,
@@ -44,6 +44,8 @@ function App() {
   const [results, setResults] = useState(null);
   const [error, setError] = useState(null);
   const [selectedKeyword, setSelectedKeyword] = useState(null);
+  const [streamedPlatforms, setStreamedPlatforms] = useState({});
+  const [filteredData, setFilteredData] = useState(null);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -54,13 +56,42 @@ function App() {
     setResults(null);
     setSelectedKeyword(null); // Reset selected keyword on new search
     
+    setStreamedPlatforms({});
+    
     try {
-      const response = await fetch(`${API_BASE}/analyze?query=${encodeURIComponent(query)}`);
+      // Stream results so each platform shows up as soon as it is processed
+      const response = await fetch(`${API_BASE}/analyze/stream?query=${encodeURIComponent(query)}`);
       if (!response.ok) {
         throw new Error(`Error: ${response.statusText}`);
       }
-      const data = await response.json();
-      setResults(data);
+      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const platforms = {};
+      let buffer = "";
+      
+      const handleEvent = (event) => {
+        if (event.event === "platform") {
+          platforms[event.platform] = event.data;
+          setStreamedPlatforms({ ...platforms });
+        } else if (event.event === "combined") {
+          setResults({ ...event.data, platforms });
+        } else if (event.event === "error") {
+          throw new Error(event.error);
+        }
+      };
+      
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+      }
     } catch (err) {
       setError(err.message);
       console.error("API Error:", err);
@@ -69,47 +100,59 @@ function App() {
     }
   };
 
-  // Filter data by selected keyword
-  const getFilteredData = () => {
-    if (!selectedKeyword || !results) return null;
-
-    const filtered = {
-      keyword: selectedKeyword,
+  // Fetch items for the selected keyword; filtering happens on the server
+  const fetchFilteredItems = async (keyword, cursor, previous) => {
+    const params = new URLSearchParams({ query: results.query, keyword, limit: "100" });
+    if (cursor) params.set("cursor", cursor);
+    
+    const response = await fetch(`${API_BASE}/analyze/items?${params}`);
+    if (!response.ok) {
+      throw new Error(`Error: ${response.statusText}`);
+    }
+    const page = await response.json();
+    
+    const filtered = previous || {
+      keyword: keyword,
       platforms: {},
-      totalItems: 0,
-      items: []
+      totalItems: page.total,
+      nextCursor: null
     };
-
-    // Search through all platforms for items containing the keyword
-    Object.entries(results.platforms).forEach(([platform, data]) => {
-      const platformItems = [];
-      
-      // Use all_items if available, otherwise fall back to sample_items
-      const itemsToSearch = data.all_items || data.sample_items || [];
-      
-      itemsToSearch.forEach(item => {
-        if (item.text && item.text.toLowerCase().includes(selectedKeyword.toLowerCase())) {
-          platformItems.push({
-            ...item,
-            platform: platform
-          });
-        }
-      });
-
-      if (platformItems.length > 0) {
-        filtered.platforms[platform] = {
-          items: platformItems,
-          count: platformItems.length
-        };
-        filtered.items.push(...platformItems);
-        filtered.totalItems += platformItems.length;
-      }
+    
+    page.items.forEach(item => {
+      const platformData = filtered.platforms[item.platform] || {
+        items: [],
+        count: page.counts[item.platform] || 0
+      };
+      platformData.items = [...platformData.items, item];
+      filtered.platforms[item.platform] = platformData;
     });
-
-    return filtered.totalItems > 0 ? filtered : null;
+    
+    return { ...filtered, nextCursor: page.next_cursor };
+  };
+  
+  useEffect(() => {
+    if (!selectedKeyword || !results) {
+      setFilteredData(null);
+      return;
+    }
+    
+    let cancelled = false;
+    fetchFilteredItems(selectedKeyword)
+      .then(filtered => {
+        if (!cancelled) setFilteredData(filtered.totalItems > 0 ? filtered : null);
+      })
+      .catch(err => console.error("API Error:", err));
+    return () => { cancelled = true; };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedKeyword, results]);
+  
+  const loadMoreFiltered = async () => {
+    try {
+      setFilteredData(await fetchFilteredItems(filteredData.keyword, filteredData.nextCursor, filteredData));
+    } catch (err) {
+      console.error("API Error:", err);
+    }
   };
-
-  const filteredData = getFilteredData();
 
   return (
     <>
@@ -183,6 +226,13 @@ function App() {
               <span></span>
               <span></span>
             </div>
+            {Object.entries(streamedPlatforms).map(([platform, data]) => (
+              <p key={platform} className="loading-platform fade-in">
+                {platform === 'twitter' ? '🐦' : platform === 'reddit' ? '🔴' : '📺'}{' '}
+                {platform.charAt(0).toUpperCase() + platform.slice(1)}: {data.total} items
+                {' '}(👍 {data.sentiment_counts.positive} 😐 {data.sentiment_counts.neutral} 👎 {data.sentiment_counts.negative})
+              </p>
+            ))}
           </div>
         </section>
       )}
@@ -449,6 +499,11 @@ function App() {
                   </div>
                 ))}
               </div>
+              {filteredData.nextCursor && (
+                <button className="clear-filter-btn" onClick={loadMoreFiltered}>
+                  Load more
+                </button>
+              )}
             </div>
           )}
           </section>